@@ -0,0 +1,6 @@
+from functions import cli
+import sys
+
+# Same as python -m functions generate <database> <batch files> -o <output>
+if __name__ == "__main__":
+    sys.exit(cli.main(["generate"] + sys.argv[1:]))
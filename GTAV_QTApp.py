@@ -1,19 +1,150 @@
-from functions import xml_parse
+from functions import instrument
+from functions.weapon_flags import FLAG_REGISTRY, WeaponFlags
 import sys
 import logging
 
-from PyQt5.QtWidgets import *
-from PyQt5.QtCore import *
-from PyQt5.QtGui import *
-
-import lxml.etree as LET
+# Parsing modules (xml_parse, db_cache, catalog) import lxml - They are imported
+# where they are first needed so the window shows up without waiting for them
+from PyQt5.QtWidgets import (
+    QAbstractItemView,
+    QAction,
+    QApplication,
+    QCheckBox,
+    QComboBox,
+    QCompleter,
+    QDialog,
+    QDialogButtonBox,
+    QFileDialog,
+    QFileSystemModel,
+    QFormLayout,
+    QGridLayout,
+    QHBoxLayout,
+    QHeaderView,
+    QLabel,
+    QLineEdit,
+    QMainWindow,
+    QMessageBox,
+    QPlainTextEdit,
+    QProgressBar,
+    QPushButton,
+    QScrollArea,
+    QSplitter,
+    QStyledItemDelegate,
+    QTabWidget,
+    QTableView,
+    QTreeView,
+    QVBoxLayout,
+    QWidget,
+    QWidgetItem,
+    qApp,
+)
+from PyQt5.QtCore import (
+    QAbstractTableModel,
+    QFileInfo,
+    QModelIndex,
+    QObject,
+    QSettings,
+    QThread,
+    QTimer,
+    Qt,
+    pyqtSignal,
+)
+from PyQt5.QtGui import QColor, QFont, QFontDatabase, QPalette
 
 APP_VERSION = 2.0
 AUTHOR = "Steeldrgn"
+# Check boxes per row of the WeaponFlags dialog
+FLAG_GRID_COLUMNS = 5
+
+logger = logging.getLogger(__name__)
+
+
+class DBLoadWorker(QObject):
+    """
+    Loads a META/XML database on a background thread
+    Objects are sent to the GUI in batches while the file is parsed
+    """
+
+    progress = pyqtSignal(int, int, int)
+    objects_ready = pyqtSignal(list)
+    # object list, error message, object type, attribute database
+    finished = pyqtSignal(object, object, object, object)
+
+    def __init__(self, xml_path):
+        super().__init__()
+        self.xml_path = xml_path
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+    def run(self):
+        # First load imports lxml on this thread instead of the GUI thread
+        from functions import xml_parse
+
+        try:
+            self.load_db()
+        except xml_parse.LET.XMLSyntaxError:
+            logger.exception(f"{self.xml_path} file not readable.")
+            self.finished.emit(None, "XML/META PARSE ERROR", None, None)
+        except Exception:
+            logger.exception(f"Failed to load {self.xml_path}")
+            self.finished.emit(None, "LOAD FAILED", None, None)
+
+    def load_db(self):
+        from functions import db_cache
+        from functions import xml_parse
+        from functions.param_index import ParamValueIndex
+
+        # Unchanged files come straight from the parsed database cache
+        cache_key, snapshot = db_cache.load_cached_db(self.xml_path)
+        if snapshot:
+            self.objects_ready.emit(snapshot["objects"])
+            self.finished.emit(
+                snapshot["objects"], None, snapshot["object_type"], snapshot["attr_db"]
+            )
+            return
+
+        total_bytes = QFileInfo(self.xml_path).size()
+        object_stream, err_mess, temp_type = xml_parse.stream_meta_parser(
+            self.xml_path,
+            lambda items, bytes_read: self.progress.emit(
+                items, bytes_read, total_bytes
+            ),
+        )
+        if err_mess:
+            self.finished.emit(None, err_mess, None, None)
+            return
+
+        object_list = []
+        object_batch = []
+        for gta_object in object_stream:
+            if self.cancelled:
+                object_stream.close()
+                self.finished.emit(None, "LOAD CANCELLED", None, None)
+                return
+
+            object_list.append(gta_object)
+            object_batch.append(gta_object)
+            if len(object_batch) == xml_parse.PROGRESS_STEP:
+                self.objects_ready.emit(object_batch)
+                object_batch = []
+
+        if object_batch:
+            self.objects_ready.emit(object_batch)
+
+        # Generate the attribute options with the object list
+        attr_db = ParamValueIndex(object_list)
+        if cache_key:
+            db_cache.save_snapshot(
+                cache_key, db_cache.CACHE_DIR, object_list, temp_type, attr_db
+            )
+
+        self.finished.emit(object_list, None, temp_type, attr_db)
 
 
 class GTAVController:
-    """ 
+    """
     Controller class for GUI
     Connects the buttons/ defines the functions each button does
     Passes gui creation to main gui class
@@ -21,12 +152,17 @@ class GTAVController:
 
     def __init__(self, view):
         self.view = view
+        # All loaded/ merged files - None until a database is loaded
+        self.catalog = None
         self.conn_btn_signals()
         self.create_menu_actions()
 
     def conn_btn_signals(self):
         self.view.path_btn.clicked.connect(self.load_db)
+        self.view.merge_btn.clicked.connect(self.merge_file_dialog)
+        self.view.load_cancel_btn.clicked.connect(self.cancel_load_db)
         self.view.template_load_btn.clicked.connect(self.pick_template)
+        self.view.template_filter_edit.returnPressed.connect(self.filter_templates)
         self.view.generate_btn.clicked.connect(self.generate_xml)
 
         self.view.tree.doubleClicked.connect(self.dir_view_select)
@@ -40,6 +176,11 @@ class GTAVController:
         self.view.menu_file.addAction(self.view.load_action)
         self.view.load_action.triggered.connect(self.load_file_dialog)
 
+        self.view.merge_action = QAction("Merge file", self.view)
+        self.view.merge_action.setDisabled(True)
+        self.view.menu_file.addAction(self.view.merge_action)
+        self.view.merge_action.triggered.connect(self.merge_file_dialog)
+
         self.view.exit_action = QAction("Exit", self.view)
         self.view.menu_file.addAction(self.view.exit_action)
         self.view.exit_action.triggered.connect(self.view.closeEvent)
@@ -47,8 +188,11 @@ class GTAVController:
         # Help menu section
         self.view.help_action = QAction("Help", self.view)
         self.view.about_action = QAction("About", self.view)
+        self.view.diagnostics_action = QAction("Diagnostics", self.view)
         self.view.menu_help.addAction(self.view.help_action)
         self.view.help_action.triggered.connect(self.help_dialog)
+        self.view.menu_help.addAction(self.view.diagnostics_action)
+        self.view.diagnostics_action.triggered.connect(self.diagnostics_dialog)
         self.view.menu_help.addAction(self.view.about_action)
         self.view.about_action.triggered.connect(self.about_dialog)
 
@@ -99,7 +243,7 @@ class GTAVController:
         <html> 
         <body style=" font-family:'Arial'; font-size:10pt; font-weight:400; font-style:normal;">
         <h1 align="center">GTA V Addon META Creator V{APP_VERSION}</h1>
-        <h3 align="center"> Author: {AUTHOR} \u00A92020</h3>
+        <h3 align="center"> Author: {AUTHOR} \u00a92020</h3>
         </body>
         </html>
         """
@@ -118,6 +262,71 @@ class GTAVController:
         self.about_dialog.setLayout(self.about_layout)
         self.about_dialog.exec_()
 
+    def diagnostics_dialog(self):
+        """
+        Time spent in each stage (parse, attr_db, build, write) - See functions/instrument.py
+        Not modal so it can stay open while loading and generating
+        """
+        self.diag_dialog = QDialog(self.view)
+        self.diag_dialog.setWindowTitle("Diagnostics")
+        self.diag_dialog.setMinimumSize(700, 300)
+
+        self.diag_layout = QVBoxLayout()
+        self.diag_record_check = QCheckBox("Record timings")
+        self.diag_record_check.setChecked(instrument.enabled)
+        self.diag_alloc_check = QCheckBox("Count Python allocations (slower)")
+        self.diag_alloc_check.setChecked(instrument.track_allocations)
+        self.diag_alloc_check.setEnabled(not instrument.enabled)
+
+        # Level of the log file (program_log.log)
+        self.diag_log_cbox = QComboBox()
+        self.diag_log_cbox.addItems(["DEBUG", "INFO", "WARNING", "ERROR"])
+        self.diag_log_cbox.setCurrentText(
+            logging.getLevelName(logging.getLogger().getEffectiveLevel())
+        )
+        self.diag_log_cbox.currentTextChanged.connect(logging.getLogger().setLevel)
+        self.diag_log_layout = QFormLayout()
+        self.diag_log_layout.addRow("Log level", self.diag_log_cbox)
+
+        self.diag_report = QPlainTextEdit()
+        self.diag_report.setReadOnly(True)
+        self.diag_report.setFont(QFontDatabase.systemFont(QFontDatabase.FixedFont))
+
+        self.diag_btns = QDialogButtonBox(QDialogButtonBox.Close)
+        diag_refresh_btn = self.diag_btns.addButton(
+            "Refresh", QDialogButtonBox.ActionRole
+        )
+        diag_reset_btn = self.diag_btns.addButton("Reset", QDialogButtonBox.ResetRole)
+
+        self.diag_record_check.toggled.connect(self.toggle_instrument)
+        diag_refresh_btn.clicked.connect(self.refresh_diagnostics)
+        diag_reset_btn.clicked.connect(self.reset_diagnostics)
+        self.diag_btns.rejected.connect(self.diag_dialog.close)
+
+        self.diag_layout.addWidget(self.diag_record_check)
+        self.diag_layout.addWidget(self.diag_alloc_check)
+        self.diag_layout.addLayout(self.diag_log_layout)
+        self.diag_layout.addWidget(self.diag_report)
+        self.diag_layout.addWidget(self.diag_btns)
+        self.diag_dialog.setLayout(self.diag_layout)
+
+        self.refresh_diagnostics()
+        self.diag_dialog.show()
+
+    def toggle_instrument(self, checked):
+        if checked:
+            instrument.enable(allocations=self.diag_alloc_check.isChecked())
+        else:
+            instrument.disable()
+        self.diag_alloc_check.setEnabled(not checked)
+
+    def refresh_diagnostics(self):
+        self.diag_report.setPlainText(instrument.format_report())
+
+    def reset_diagnostics(self):
+        instrument.reset()
+        self.refresh_diagnostics()
+
     def load_file_dialog(self):
         self.load_file_dialog = QFileDialog()
         file_path, _ = self.load_file_dialog.getOpenFileName(
@@ -129,9 +338,24 @@ class GTAVController:
         )
         self.view.set_file_path(file_path)
 
+    def merge_file_dialog(self):
+        """
+        Merge a DLC/addon file into the loaded database
+        Objects with the same name replace the loaded ones
+        """
+        file_path, _ = QFileDialog.getOpenFileName(
+            self.view,
+            "Merge META or XML File",
+            "./database",
+            "XML, META Files (*.meta *.xml)",
+            "",
+        )
+        if file_path:
+            self.start_db_load(file_path, merge=True)
+
     def dir_view_select(self, index):
-        """ 
-        Update path_line_edit field with valid peds, weapon, etc. meta or xml file 
+        """
+        Update path_line_edit field with valid peds, weapon, etc. meta or xml file
         QTreeView.doubleclicked event passes QModelIndex object as a parameter
         """
 
@@ -148,49 +372,138 @@ class GTAVController:
         self.view.set_file_path(file_path)
 
     def load_db(self):
-        """ 
+        """
         Initial loading of the object database
+        Parsing runs on a background thread so the window stays responsive
         """
-        self.view.clear_combo_box()
-
         xml_path = self.view.get_path_text()
         if xml_path == "":
             self.err_mess = "PATH EMPTY"
             self.view.error_dialogs(self.err_mess)
             return
 
-        # Load the database and any error messages
-        self.object_list, self.err_mess, temp_type = xml_parse.xml_meta_parser(xml_path)
+        self.view.clear_combo_box()
+        self.catalog = None
+        self.start_db_load(xml_path, merge=False)
+
+    def start_db_load(self, xml_path, merge):
+        """
+        Parse a file on the background thread
+        merge=True adds its objects to the loaded catalog instead of replacing it
+        """
+        self.load_path = xml_path
+        self.merging = merge
+
+        self.view.show_load_progress(True)
+        self.view.set_merge_enabled(False)
+        self.view.template_load_btn.setDisabled(True)
+
+        self.load_thread = QThread()
+        self.load_worker = DBLoadWorker(xml_path)
+        self.load_worker.moveToThread(self.load_thread)
+
+        self.load_thread.started.connect(self.load_worker.run)
+        self.load_worker.progress.connect(self.view.update_load_progress)
+        # Merged files are added to the combo box once duplicates are resolved
+        if not merge:
+            self.load_worker.objects_ready.connect(self.view.populate_cbox)
+        self.load_worker.finished.connect(self.load_db_finished)
+        self.load_worker.finished.connect(self.load_thread.quit)
+
+        self.load_thread.start()
+
+    def cancel_load_db(self):
+        self.load_worker.cancel()
+
+    def load_db_finished(self, object_list, err_mess, temp_type, attr_db):
+        """
+        Background database load is done
+        """
+        self.view.show_load_progress(False)
+        self.err_mess = err_mess
+
+        if not self.err_mess:
+            if not self.merging:
+                from functions.catalog import MetaCatalog
+
+                self.catalog = MetaCatalog()
+            self.err_mess = self.catalog.add_objects(
+                object_list, temp_type, self.load_path
+            )
+
+        # A failed merge keeps the loaded catalog
+        if self.catalog is not None and self.catalog.object_type:
+            self.object_list = self.catalog.object_list
+            self.attr_db = self.catalog.attr_db
+            self.name_index = self.catalog.name_index
+            self.view.template_load_btn.setDisabled(False)
+            # Combo box shows all templates again
+            self.view.template_filter_edit.clear()
+            self.view.template_filter_edit.setDisabled(False)
+            self.view.set_merge_enabled(True)
 
         # Creates error dialog boxes if there are errors
         if self.err_mess:
-            self.view.error_dialogs(self.err_mess)
-        else:
+            if not self.merging:
+                self.view.clear_combo_box()
+            if self.err_mess == "LOAD CANCELLED":
+                self.view.statusBar().showMessage("Database loading cancelled.", 0)
+            else:
+                self.view.error_dialogs(self.err_mess, self.catalog)
+        elif self.merging:
+            self.view.clear_combo_box()
             self.view.populate_cbox(self.object_list)
-            self.view.template_load_btn.setDisabled(False)
 
-            # Generate the attribute options with the object list
-            self.attr_db = xml_parse.attr_db(self.object_list)
+            overridden = len(self.catalog.overridden)
+            self.view.statusBar().showMessage(
+                f"Merged {self.load_path}! {len(self.catalog)} {temp_type} templates "
+                f"from {len(self.catalog.sources)} files ({overridden} overridden).",
+                0,
+            )
+        else:
             self.view.statusBar().showMessage(
                 f"Success! {temp_type} DB Loaded! Choose a {temp_type} template to get started!",
                 0,
             )
 
+    def filter_templates(self):
+        """
+        Only show the templates matching the filter query - Empty shows all
+        Text without a comparison is a ranked search, best template first
+        """
+        query_text = self.view.template_filter_edit.text().strip()
+        if not query_text:
+            matches, err_mess = self.object_list, None
+        elif self.catalog.get_query_index().is_query(query_text):
+            matches, err_mess = self.catalog.query(query_text)
+        else:
+            matches = [
+                gta_object
+                for _, gta_object in self.catalog.search_objects(query_text, None)
+            ]
+            err_mess = None
+
+        if err_mess:
+            self.view.statusBar().showMessage(f"Filter: {err_mess}", 0)
+            return
+
+        self.view.clear_combo_box()
+        self.view.populate_cbox(matches)
+        self.view.statusBar().showMessage(
+            f"{len(matches)} of {len(self.object_list)} templates match.", 0
+        )
+
     def pick_template(self):
         """
         Show params for the picked ped, weapon, etc.
         """
         current_text = self.view.get_template_text()
 
-        self.cur_obj = None
-
-        if current_text in self.attr_db["Name"]:
+        # Case insensitive name lookup
+        self.cur_obj = self.name_index.get(current_text)
 
-            for GTA_object in self.object_list:
-                if GTA_object.Name.upper() == current_text.upper():
-                    self.cur_obj = GTA_object
-
-            temp_type = GTA_object.object_type.upper()
+        if self.cur_obj:
+            temp_type = self.cur_obj.object_type.upper()
 
             self.view.generate_param_form(self.attr_db, self.cur_obj, temp_type)
 
@@ -200,27 +513,19 @@ class GTAVController:
         return self.cur_obj
 
     def generate_xml(self):
-        new_val_dict = {}
-        slot_list = []
-        for param in range(self.view.scroll_form_layout.rowCount()):
-            # itemAt(row, column) - column index [0(Label), 1(Lineedit/combobox)]
-            row_label = self.view.scroll_form_layout.itemAt(param, 0).widget().text()
-            row_param_widget = self.view.scroll_form_layout.itemAt(param, 1).widget()
-
-            if (
-                row_label == "SlotNavigateOrder Number"
-                or row_label == "SlotBestOrder Number"
-            ):
-                slot_list.append((row_label.split(" ")[0], row_param_widget.text()))
-                continue
+        from functions import xml_parse
 
-            if isinstance(row_param_widget, QLineEdit):
-                new_val_dict[row_label] = row_param_widget.text()
+        # Parameters of the template in the current tab
+        param_model = self.view.current_param_model()
+        if param_model is None:
+            return
 
-            elif isinstance(row_param_widget, QComboBox):
-                new_val_dict[row_label] = row_param_widget.currentText()
+        new_val_dict = param_model.new_val_dict()
+        slot_list = param_model.slot_params()
 
-        custom_obj, err_mess = xml_parse.generate_new_object(self.cur_obj, new_val_dict)
+        custom_obj, err_mess = xml_parse.generate_new_object(
+            param_model.template, new_val_dict
+        )
 
         if not err_mess:
             save_dialog = QFileDialog(self.view)
@@ -231,7 +536,12 @@ class GTAVController:
                 pass
             else:
                 temp_type = custom_obj.object_type
-                xml_parse.xml_writer(custom_obj, save_path, temp_type, slot_list)
+                # Existing files are only appended to, not re-parsed and rewritten
+                xml_parse.xml_writer(
+                    custom_obj, save_path, temp_type, slot_list, in_place=True
+                )
+                # New values show up as options for the next object
+                self.attr_db.add_object(custom_obj)
                 QMessageBox.information(
                     QWidget(),
                     "SUCCESS",
@@ -276,6 +586,176 @@ class GTAVController:
             self.view.tab_area.setTabText(index, new_name)
 
 
+class ParamTableModel(QAbstractTableModel):
+    """
+    Parameters of one template for a form tab - Column 0 param name, column 1 value
+    Only edited values are stored, everything else is read from the template
+    """
+
+    SLOT_ROWS = ["SlotNavigateOrder Number", "SlotBestOrder Number"]
+
+    def __init__(self, template, attr_dict, temp_type):
+        super().__init__()
+        self.template = template
+        self.attr_dict = attr_dict
+        self.edits = {}
+
+        # (param, row kind) for every row
+        self.param_rows = []
+        if temp_type == "WEAP":
+            for slot_label in self.SLOT_ROWS:
+                self.param_rows.append((slot_label, "slot"))
+                self.edits[slot_label] = "0"
+
+        for k, v in template.return_att_dict().items():
+            # Only internal use
+            if k == "object_type":
+                continue
+            self.param_rows.append((k, param_row_kind(k, v)))
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.param_rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else 2
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return ["Parameter", "Value"][section]
+        return None
+
+    def flags(self, index):
+        row_flags = Qt.ItemIsEnabled | Qt.ItemIsSelectable
+        if index.column() == 1 and self.param_rows[index.row()][1] in (
+            "slot",
+            "text",
+            "attrib",
+        ):
+            row_flags |= Qt.ItemIsEditable
+        return row_flags
+
+    def data(self, index, role=Qt.DisplayRole):
+        param, row_kind = self.param_rows[index.row()]
+
+        if role == Qt.TextAlignmentRole:
+            return Qt.AlignCenter
+        if role not in (Qt.DisplayRole, Qt.EditRole):
+            return None
+        if index.column() == 0:
+            return param
+        if param in self.edits and row_kind in ("slot", "text", "attrib"):
+            return self.edits[param]
+
+        value = self.param_value(param)
+        if row_kind == "flags":
+            return f"Edit {param} ({len(value) if value else 0} flags)"
+        elif row_kind == "children":
+            return f"Edit {param} ({len(value)} items)"
+        elif row_kind == "attrib":
+            return value.get("value", value.get("ref"))
+        elif row_kind == "xyz":
+            # For params with x,y or x,y,z
+            return "  ".join(f"{xyz}: {val}" for xyz, val in value.items())
+        return value or ""
+
+    def setData(self, index, value, role=Qt.EditRole):
+        if role != Qt.EditRole or not self.flags(index) & Qt.ItemIsEditable:
+            return False
+        self.edits[self.param_rows[index.row()][0]] = value
+        self.dataChanged.emit(index, index)
+        return True
+
+    def options(self, row):
+        """
+        Combo box entries of a param - Only looked up when an editor is opened
+        """
+        param, row_kind = self.param_rows[row]
+        if row_kind != "text" or param == "Name" or param not in self.attr_dict:
+            return None
+        # Most used values first
+        return self.attr_dict.options(param)
+
+    def param_value(self, param):
+        """
+        Edited value of a param, else the template value
+        """
+        if param in self.edits:
+            return self.edits[param]
+        return getattr(self.template, param)
+
+    def refresh_row(self, row):
+        self.dataChanged.emit(self.index(row, 1), self.index(row, 1))
+
+    def new_val_dict(self):
+        # Edited params only, other params stay the same as the template
+        return {
+            param: value
+            for param, value in self.edits.items()
+            if param not in self.SLOT_ROWS
+        }
+
+    def slot_params(self):
+        return [
+            (slot_label.split(" ")[0], self.edits[slot_label])
+            for slot_label, row_kind in self.param_rows
+            if row_kind == "slot"
+        ]
+
+
+def param_row_kind(k, v):
+    """
+    How a param is shown/ edited in the form
+    """
+    # Some lists have items with different tags -> Weapons.meta file
+    if k == "WeaponFlags":
+        return "flags"
+    elif isinstance(v, (list, tuple)):
+        return "children"
+    # Attribute only params
+    elif isinstance(v, dict):
+        # For peds [value]
+        # For weapons: [value, ref, (x,y,z), ]
+        if "value" in v or "ref" in v:
+            return "attrib"
+        return "xyz"
+    return "text"
+
+
+class ParamDelegate(QStyledItemDelegate):
+    """
+    Creates the editor of a param cell when it is edited
+    Params with known values get a combo box filled from the attribute database
+    """
+
+    def createEditor(self, parent, option, index):
+        param_options = index.model().options(index.row())
+
+        if param_options is None:
+            param_edit_line = QLineEdit(parent)
+            param_edit_line.setAlignment(Qt.AlignHCenter)
+            return param_edit_line
+
+        param_cbox = QComboBox(parent)
+        param_cbox.setSizeAdjustPolicy(QComboBox.AdjustToMinimumContentsLength)
+        param_cbox.addItems(param_options)
+        param_cbox.setEditable(True)
+        param_cbox.setInsertPolicy(QComboBox.InsertAtTop)
+        return param_cbox
+
+    def setEditorData(self, editor, index):
+        value = index.model().data(index, Qt.EditRole)
+        if isinstance(editor, QComboBox):
+            editor.setCurrentText(value)
+        else:
+            editor.setText(value)
+
+    def setModelData(self, editor, model, index):
+        if isinstance(editor, QComboBox):
+            model.setData(index, editor.currentText())
+        else:
+            model.setData(index, editor.text())
+
+
 class GTAVMainWindow(QMainWindow):
     """Main GUI"""
 
@@ -323,6 +803,7 @@ class GTAVMainWindow(QMainWindow):
         # Tab widget for form creation
         self.create_tab_area()
         self.create_generate_btn()
+        self.create_load_progress()
 
         self.app_widget.setLayout(self.app_layout)
         self.q_split.addWidget(self.app_widget)
@@ -362,6 +843,31 @@ class GTAVMainWindow(QMainWindow):
         elif close == QMessageBox.Cancel:
             event.ignore()
 
+    def create_load_progress(self):
+        # Database loading progress - Only shown while a file is loading
+        self.load_progress_bar = QProgressBar()
+        self.load_progress_bar.setMaximumWidth(250)
+        self.load_cancel_btn = QPushButton("Cancel")
+
+        self.statusBar().addPermanentWidget(self.load_progress_bar)
+        self.statusBar().addPermanentWidget(self.load_cancel_btn)
+        self.show_load_progress(False)
+
+    def show_load_progress(self, loading):
+        self.load_progress_bar.setValue(0)
+        self.load_progress_bar.setVisible(loading)
+        self.load_cancel_btn.setVisible(loading)
+        self.path_btn.setDisabled(loading)
+
+    def set_merge_enabled(self, enabled):
+        self.merge_btn.setEnabled(enabled)
+        self.merge_action.setEnabled(enabled)
+
+    def update_load_progress(self, items, bytes_read, total_bytes):
+        if total_bytes:
+            self.load_progress_bar.setValue(int(bytes_read * 100 / total_bytes))
+        self.statusBar().showMessage(f"Loading... {items} objects parsed")
+
     def create_menu_bar(self):
         # Create a menubar
         self.menu_bar = self.menuBar()
@@ -422,6 +928,21 @@ class GTAVMainWindow(QMainWindow):
         # Add to app layout
         self.app_layout.addLayout(self.title_layout)
 
+    def load_title_font(self):
+        # Adding a custom font
+        try:
+            # Add custom font into the database
+            font_id = QFontDatabase.addApplicationFont("fonts/pricedownbl.ttf")
+            # Add font to a font family
+            pd_font_fam = QFontDatabase.applicationFontFamilies(font_id)
+            pricedown = QFont(pd_font_fam[0], 20)
+        except:
+            logger.exception("Pricedown font not found! Will default to Arial instead")
+            return
+
+        self.title_label.setFont(pricedown)
+        self.author_label.setFont(pricedown)
+
     def create_load_file(self):
         # Layout
         self.load_xml_layout = QHBoxLayout()
@@ -432,10 +953,14 @@ class GTAVMainWindow(QMainWindow):
         self.path_line_edit.setAlignment(Qt.AlignCenter)
 
         self.path_btn = QPushButton("Load File")
+        # Adds DLC/addon files to the loaded database
+        self.merge_btn = QPushButton("Merge File")
+        self.merge_btn.setDisabled(True)
 
         # Add to self layout
         self.load_xml_layout.addWidget(self.path_line_edit)
         self.load_xml_layout.addWidget(self.path_btn)
+        self.load_xml_layout.addWidget(self.merge_btn)
 
         # Add the main layout
         self.app_layout.addLayout(self.load_xml_layout)
@@ -453,12 +978,29 @@ class GTAVMainWindow(QMainWindow):
         self.template_cbox.setCurrentIndex(0)
         self.template_cbox.setEditable(True)
         self.template_cbox.setInsertPolicy(QComboBox.NoInsert)
+        # Typing part of a name suggests all templates containing it
+        self.template_cbox.completer().setFilterMode(Qt.MatchContains)
+        self.template_cbox.completer().setCompletionMode(QCompleter.PopupCompletion)
         self.template_cbox.setDisabled(True)
 
+        # Query of the templates to show, e.g. Pedtype=COP and Age>30
+        self.template_filter_edit = QLineEdit()
+        self.template_filter_edit.setPlaceholderText("Search or filter: Pedtype=COP")
+        self.template_filter_edit.setToolTip(
+            "Show only the templates matching a query, Enter to apply\n"
+            "Param=TEXT, Param!=TEXT, Damage>=30, AimOffsetMin.x<0.5, "
+            "WeaponFlags has Gun\n"
+            "Combine with and, or, not and ( )\n"
+            "Words without a comparison search all values, best match first "
+            "(carbine, Pedtype:cop)"
+        )
+        self.template_filter_edit.setDisabled(True)
+
         self.template_load_btn = QPushButton("Load Template")
         self.template_load_btn.setDisabled(True)
 
         # Add widgets to self layout
+        self.template_layout.addWidget(self.template_filter_edit)
         self.template_layout.addWidget(self.template_label)
         self.template_layout.addWidget(self.template_cbox)
         self.template_layout.addWidget(self.template_load_btn)
@@ -495,133 +1037,61 @@ class GTAVMainWindow(QMainWindow):
 
     def generate_param_form(self, attr_dict, cur_template, temp_type):
         """
-        Populate the scroll bar area with object params
+        Add a tab with the template params
         Connects the "Load Template" button
+        Editors are only created for the cell being edited (see ParamDelegate)
         """
-        # ONE PAGE
-        scroll_area = QScrollArea()
-        scroll_area.setWidgetResizable(True)
-        scroll_widget = QWidget()
-        self.scroll_form_layout = QFormLayout()
-        scroll_widget.setLayout(self.scroll_form_layout)
-        scroll_area.setWidget(scroll_widget)
-
-        if temp_type == "WEAP":
-            # Slot Navigate order number
-            self.slotnav_name_label = QLabel("SlotNavigateOrder Number")
-            self.slotnav_line_edit = QLineEdit("0")
-            self.slotnav_line_edit.setAlignment(Qt.AlignHCenter)
-            self.scroll_form_layout.addRow(
-                self.slotnav_name_label, self.slotnav_line_edit
-            )
-
-            # Slot best order number
-            self.slotbest_label = QLabel("SlotBestOrder Number")
-            self.slotbest_line_edit = QLineEdit("0")
-            self.slotbest_line_edit.setAlignment(Qt.AlignHCenter)
-            self.scroll_form_layout.addRow(self.slotbest_label, self.slotbest_line_edit)
-
-        for k, v in cur_template.return_att_dict().items():
-            # Only internal use
-            if k == "object_type":
-                pass
-            # Allow editing of name
-            elif k == "Name":
-                self.name_label = QLabel(k)
-                self.name_label.setAlignment(Qt.AlignHCenter)
-                self.name_line_edit = QLineEdit(v)
-                self.name_line_edit.setAlignment(Qt.AlignHCenter)
-                self.scroll_form_layout.addRow(self.name_label, self.name_line_edit)
-            elif v == None:
-                param_label = QLabel(k)
-                param_label.setAlignment(Qt.AlignHCenter)
-                self.scroll_form_layout.addRow(param_label, QLineEdit())
-            # Some lists have items with different tags -> Weapons.meta file
-            # <Fx>, <Explosion>, <WeaponFlags>
-            elif k == "WeaponFlags":
-                # Will have a dialog with checkboxes
-                param_label = QLabel(f"{k} Params")
-                param_label.setAlignment(Qt.AlignHCenter)
-                self.param_btn = QPushButton(f"Edit {k}")
-                # Connecting edit param button with extra parameters
-                # Need a lambda function, x is the first argument which is a boolean
-                self.param_btn.clicked.connect(
-                    lambda x, cur_temp=cur_template, attr_dict=attr_dict: self.edit_weapon_flags(
-                        cur_temp, attr_dict
-                    )
-                )
-                self.scroll_form_layout.addRow(param_label, self.param_btn)
-
-            elif isinstance(v, list):
-                param_label = QLabel(k)
-                param_label.setAlignment(Qt.AlignHCenter)
-
-                # Separate dialog for parameters that have children elements
-                self.param_btn = QPushButton(f"Edit {k}")
-
-                # Clicked returns boolean, so need x as first parameter
-                self.param_btn.clicked.connect(
-                    lambda x, cur_temp=cur_template, btn_text=self.param_btn.text(): self.edit_param_clicked(
-                        cur_temp, btn_text
-                    )
-                )
-
-                self.scroll_form_layout.addRow(param_label, self.param_btn)
-
-            elif isinstance(v, LET._Attrib):
-                param_label = QLabel(k)
-                param_label.setAlignment(Qt.AlignHCenter)
-                # For peds [value]
-                # For weapons: [value, ref, (x,y,z), ]
-                xyz_layout = QHBoxLayout()
-                attrib_keys = v.keys()
-
-                if "value" in attrib_keys:
-                    param_edit_line = QLineEdit(v["value"])
-                elif "ref" in attrib_keys:
-                    param_edit_line = QLineEdit(v["ref"])
-
-                # Some params have x,y or x,y,z
-                elif len(v) >= 2:
-                    for xyz, val in v.items():
-                        xyz_label = QLabel(xyz)
-                        xyz_line_edit = QLineEdit(val)
-                        xyz_line_edit.setAlignment(Qt.AlignHCenter)
-                        xyz_layout.addWidget(xyz_label)
-                        xyz_layout.addWidget(xyz_line_edit)
-
-                # Set alignment for Qlineedit to center
-                param_edit_line.setAlignment(Qt.AlignHCenter)
-
-                if xyz_layout.count() > 0:
-                    self.scroll_form_layout.addRow(param_label, xyz_layout)
-                else:
-                    self.scroll_form_layout.addRow(param_label, param_edit_line)
+        param_model = ParamTableModel(cur_template, attr_dict, temp_type)
+
+        param_view = QTableView()
+        param_view.setModel(param_model)
+        param_view.setItemDelegate(ParamDelegate(param_view))
+        param_view.verticalHeader().hide()
+        param_view.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        param_view.horizontalHeader().setSectionResizeMode(1, QHeaderView.Stretch)
+        param_view.setSelectionMode(QAbstractItemView.SingleSelection)
+        param_view.setEditTriggers(
+            QAbstractItemView.DoubleClicked
+            | QAbstractItemView.EditKeyPressed
+            | QAbstractItemView.AnyKeyPressed
+        )
 
-            elif isinstance(v, str):
-                param_label = QLabel(k)
-                param_label.setAlignment(Qt.AlignHCenter)
+        # Params with children elements are edited in a separate dialog
+        param_view.doubleClicked.connect(
+            lambda index, model=param_model: self.param_double_clicked(model, index)
+        )
 
-                if k in attr_dict.keys():
-                    param_cbox = QComboBox()
-                    param_cbox.setSizeAdjustPolicy(
-                        QComboBox.AdjustToMinimumContentsLength
-                    )
-                    param_cbox.addItems(attr_dict[k])
-                    param_cbox.setEditable(True)
-                    param_cbox.setInsertPolicy(QComboBox.InsertAtTop)
-                    param_cbox.setCurrentText(v)
-                    self.scroll_form_layout.addRow(param_label, param_cbox)
+        self.tab_area.addTab(param_view, f"{temp_type}: {cur_template.Name}")
+        self.tab_area.setCurrentWidget(param_view)
+        self.generate_btn.setDisabled(False)
 
-                else:
-                    param_edit_line = QLineEdit(v)
-                    param_edit_line.setAlignment(Qt.AlignHCenter)
-                    self.scroll_form_layout.addRow(param_label, param_edit_line)
+    def current_param_model(self):
+        param_view = self.tab_area.currentWidget()
+        if param_view is None:
+            return None
+        return param_view.model()
+
+    def param_double_clicked(self, param_model, index):
+        param, row_kind = param_model.param_rows[index.row()]
+
+        # Dialogs return the new params - The template is never changed
+        if row_kind == "flags":
+            new_params = self.edit_weapon_flags(param_model.param_value(param))
+        elif row_kind == "children":
+            new_params = self.edit_param_clicked(
+                param_model.param_value(param), f"Edit {param}"
+            )
+        else:
+            return
 
-        self.tab_area.addTab(scroll_area, f"{temp_type}: {cur_template.Name}")
-        self.generate_btn.setDisabled(False)
+        if new_params:
+            param_model.edits.update(new_params)
+            param_model.refresh_row(index.row())
 
-    def edit_param_clicked(self, cur_temp, btn_text):
+    def edit_param_clicked(self, children_list, btn_text):
+        """
+        Dialog of a param with children - Returns {param: new value} or None if cancelled
+        """
         param = btn_text.split(" ")[-1]
         param_dialog = QDialog()
         # (Width, Height)
@@ -642,15 +1112,12 @@ class GTAVMainWindow(QMainWindow):
         dialog_scroll_widget.setLayout(dialog_form_layout)
         dialog_scroll.setWidget(dialog_scroll_widget)
 
-        # getattr() for accessing attribute of class with variable
-        children_list = getattr(cur_temp, param)
         # Empty parameter set - e.g. AttachPoints for melee weapons
         if len(children_list) < 1:
             QMessageBox.information(
                 self, "No Extra Params", f"There is nothing to edit for {param}."
             )
-            cur_temp.param = None
-            return
+            return None
 
         # TODO: Recursion?
         elif param == "OverrideForces":
@@ -764,9 +1231,13 @@ class GTAVMainWindow(QMainWindow):
         result = param_dialog.exec_()
 
         if result == QDialog.Accepted:
-            self.save_params(cur_temp, param, dialog_form_layout)
+            return self.save_params(param, dialog_form_layout)
+        return None
 
-    def save_params(self, cur_temp, param, layout_items):
+    def save_params(self, param, layout_items):
+        """
+        {param: new value} from the form of an edit dialog
+        """
         row_pair_list = []
         new_pair = []
         count = 0
@@ -855,11 +1326,14 @@ class GTAVMainWindow(QMainWindow):
                     row_pair_list.append(tuple(new_pair))
                     new_pair = []
 
-        new_params = xml_parse.element_maker(param, row_pair_list)
+        from functions import xml_parse
 
-        cur_temp.update_attr(new_params)
+        return xml_parse.element_maker(param, row_pair_list)
 
-    def edit_weapon_flags(self, cur_temp, attr_dict):
+    def edit_weapon_flags(self, cur_flags):
+        """
+        WeaponFlags dialog - Returns {"WeaponFlags": new flags} or None if cancelled
+        """
         flag_dialog = QDialog()
         flag_dialog.setWindowTitle("Edit WeaponFlags")
         flag_dialog_btns = QDialogButtonBox(
@@ -875,36 +1349,15 @@ class GTAVMainWindow(QMainWindow):
         flag_dialog_vlayout.addLayout(flag_checkbox_layout)
         flag_dialog_vlayout.addWidget(flag_dialog_btns)
 
-        weapon_flags = cur_temp.WeaponFlags
-        weapflag_list = weapon_flags.split(" ")
+        weapon_flags = WeaponFlags(cur_flags or 0)
 
-        flag_qobjects = []
-        for weap_flag in sorted(attr_dict["WeaponFlags"]):
-            if weap_flag in weapflag_list:
-                flag_check = QCheckBox(weap_flag)
-                flag_check.setChecked(True)
-                flag_qobjects.append(flag_check)
-            else:
-                flag_check = QCheckBox(weap_flag)
-                flag_check.setChecked(False)
-                flag_qobjects.append(flag_check)
-
-        # Making grid labels for gridlayout - 96 different flags
-        grid_list = []
-        # Rows -> Columns
-        for i in range(20):
-            for j in range(5):
-                grid_list.append((i, j))
-
-        num = 0
-        try:
-            for flag_obj in flag_qobjects:
-                flag_checkbox_layout.addWidget(
-                    flag_obj, grid_list[num][0], grid_list[num][1]
-                )
-                num += 1
-        except IndexError:
-            pass
+        # Every flag of every loaded file - Rows grow with the number of flags
+        for flag_num, weap_flag in enumerate(sorted(FLAG_REGISTRY)):
+            flag_check = QCheckBox(weap_flag)
+            flag_check.setChecked(weap_flag in weapon_flags)
+            flag_checkbox_layout.addWidget(
+                flag_check, *divmod(flag_num, FLAG_GRID_COLUMNS)
+            )
 
         flag_dialog.setLayout(flag_dialog_vlayout)
 
@@ -920,7 +1373,8 @@ class GTAVMainWindow(QMainWindow):
                 if item.widget().isChecked():
                     checked_flags.append(item.widget().text())
 
-            cur_temp.WeaponFlags = " ".join(checked_flags)
+            return {"WeaponFlags": WeaponFlags(checked_flags)}
+        return None
 
     def error_dialogs(self, error, other_message=None):
         """
@@ -934,10 +1388,24 @@ class GTAVMainWindow(QMainWindow):
                 error,
                 "ERROR: \nFile cannot be found. Are you pointing to the right place?",
             )
-        elif error == "XML PARSE ERROR":
+        elif error in ("XML PARSE ERROR", "XML/META PARSE ERROR"):
             QMessageBox.warning(
                 self, error, "Error: \n Could not parse file. Possible Corruption?"
             )
+        elif error == "NOT A VALID META/XML FILE":
+            QMessageBox.warning(
+                self, error, "ERROR: \nNot a peds or weapons META/XML file."
+            )
+        elif error == "LOAD FAILED":
+            QMessageBox.warning(
+                self, error, "ERROR: \nCould not load file. Check program_log.log."
+            )
+        elif error == "TYPE MISMATCH":
+            QMessageBox.warning(
+                self,
+                error,
+                f"ERROR: \nOnly {other_message.object_type} files can be merged.",
+            )
         elif error == "INVALID TEMPLATE":
             QMessageBox.warning(
                 self, error, f"ERROR: \n{other_message} is not a valid template."
@@ -962,6 +1430,16 @@ class GTAVMainWindow(QMainWindow):
 
 
 def main():
+    app, main_ui, controller = start_app()
+
+    sys.exit(app.exec_())
+
+
+def start_app():
+    """
+    Create the application and show the main window
+    Returns (app, main window, controller) - Also used by benchmarks/startup.py
+    """
     app = QApplication(sys.argv)  # Can accept cmdline arguments
     app.setStyle("Fusion")
 
@@ -980,18 +1458,6 @@ def main():
 
     app.setPalette(palette)
 
-    # Adding a custom font
-    # Create new QFontdatabase class
-    try:
-        font_db = QFontDatabase()
-        # Add custom font into the database
-        font_id = font_db.addApplicationFont("fonts/pricedownbl.ttf")
-        # Add font to a font family
-        pd_font_fam = font_db.applicationFontFamilies(font_id)
-        pricedown = QFont(pd_font_fam[0])
-    except:
-        logger.exception("Pricedown font not found! Will default to Arial instead")
-
     # Set all other text to Arial size 11
     app.setFont(QFont("Arial", 11))
     q_settings = False
@@ -1010,18 +1476,15 @@ def main():
     # Controller
     controller = GTAVController(view=main_ui)
 
-    sys.exit(app.exec_())
-
+    # The title font is only used by 2 labels - Loaded once the window is painted
+    QTimer.singleShot(0, main_ui.load_title_font)
 
-if __name__ == "__main__":
+    return app, main_ui, controller
 
-    logger = logging.getLogger(__name__)
-    logger.setLevel(logging.DEBUG)
 
-    file_handler = logging.FileHandler("program_log.log")
-    file_format = logging.Formatter("%(name)s - %(levelname)s - %(message)s")
-    file_handler.setFormatter(file_format)
+if __name__ == "__main__":
+    from functions import log_setup
 
-    logger.addHandler(file_handler)
+    log_setup.setup_logging(logging.INFO)
 
     main()
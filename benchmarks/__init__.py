@@ -0,0 +1,3 @@
+"""
+Benchmarks of the parse/ generate/ write hot paths - python -m benchmarks --help
+"""
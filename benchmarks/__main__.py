@@ -0,0 +1,6 @@
+import sys
+
+from benchmarks import run_benchmarks
+
+if __name__ == "__main__":
+    sys.exit(run_benchmarks.main())
@@ -0,0 +1,115 @@
+"""
+Scaled up copies of the bundled databases for the benchmarks
+"""
+
+from pathlib import Path
+import re
+
+from functions import meta_scan
+from functions import xml_parse
+
+# Bundled databases -> object type
+DATABASES = {
+    "peds": ("database/peds.ymt.xml", "ped"),
+    "weapons": ("database/weapons.meta", "weap"),
+}
+
+NAME_PATTERN = re.compile(rb"<Name>([^<]*)</Name>")
+
+
+def scale_meta_file(source_file, dest_file, factor):
+    """
+    Write a copy of a META file with every object repeated factor times
+    Copies get a numbered Name so names stay unique. Returns the object count
+    """
+    source_data = Path(source_file).read_bytes()
+    object_type = xml_parse.META_ROOT_TAGS[xml_parse.meta_root_tag(str(source_file))]
+    spans = meta_scan.object_spans(source_data, object_type)
+
+    position = 0
+    with open(dest_file, "wb") as dest:
+        for span_start, span_end in spans:
+            dest.write(source_data[position:span_end])
+            position = span_end
+
+            object_data = source_data[span_start:span_end]
+            # Indent of the object line so the copies are pretty printed too
+            line_start = source_data.rfind(b"\n", 0, span_start) + 1
+            indent = source_data[line_start:span_start]
+            for copy_number in range(1, factor):
+                object_copy = NAME_PATTERN.sub(
+                    lambda name: b"<Name>%s_X%d</Name>" % (name.group(1), copy_number),
+                    object_data,
+                    count=1,
+                )
+                dest.write(b"\n" + indent + object_copy)
+
+        dest.write(source_data[position:])
+
+    return len(spans) * factor
+
+
+def dataset_files(scales, data_dir, synthetic_seed=None):
+    """
+    (dataset name, file, object type, scale) of every database at every scale
+    Scaled files are made once and reused from data_dir
+    synthetic_seed -> Scaled files are sampled by benchmarks.synthetic instead of copied
+    """
+    data_dir = Path(data_dir)
+    datasets = []
+
+    for database_name, (source_file, object_type) in DATABASES.items():
+        for scale in scales:
+            if scale == 1:
+                dataset_file = Path(source_file)
+            elif synthetic_seed is not None:
+                dataset_file = synthetic_file(
+                    data_dir / f"{database_name}_syn{scale}_seed{synthetic_seed}",
+                    source_file,
+                    object_type,
+                    scale,
+                    synthetic_seed,
+                )
+            else:
+                dataset_file = (
+                    data_dir
+                    / f"{database_name}_x{scale}{dataset_file_suffix(source_file)}"
+                )
+                if not dataset_file.exists():
+                    data_dir.mkdir(parents=True, exist_ok=True)
+                    scale_meta_file(source_file, dataset_file, scale)
+
+            # Synthetic results are not compared with copied ones
+            scale_label = "syn" if synthetic_seed is not None and scale != 1 else "x"
+            datasets.append(
+                (
+                    f"{database_name}_{scale_label}{scale}",
+                    dataset_file,
+                    object_type,
+                    scale,
+                )
+            )
+
+    return datasets
+
+
+def synthetic_file(output_dir, source_file, object_type, scale, seed):
+    """
+    Synthetic database with scale times the objects of the source file
+    """
+    # Only needed for synthetic datasets
+    from benchmarks import synthetic
+
+    object_list, _, _ = xml_parse.xml_meta_parser(source_file)
+    meta_file_path = xml_parse.meta_path(output_dir, object_type)
+    if not meta_file_path.exists():
+        output_dir.mkdir(parents=True, exist_ok=True)
+        synthetic.write_synthetic_meta(
+            output_dir, object_type, len(object_list) * scale, seed, source_file
+        )
+
+    return meta_file_path
+
+
+def dataset_file_suffix(source_file):
+    return "".join(Path(source_file).suffixes)
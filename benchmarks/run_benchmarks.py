@@ -0,0 +1,317 @@
+"""
+Time and measure peak memory of the parse/ generate/ write hot paths
+Results are written as JSON so runs can be compared (--compare)
+"""
+
+from functools import lru_cache
+from pathlib import Path
+import argparse
+import json
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from lxml import etree as LET
+
+from benchmarks import datasets
+from functions import parallel_parse
+from functions import xml_parse
+from functions.object_table import load_object_table
+
+DATA_DIR = "benchmarks/data"
+RESULTS_DIR = "benchmarks/results"
+
+# Objects generated by the generate_new_object case
+GENERATE_COUNT = 1000
+
+
+def setup_objects(dataset_file, object_type, work_dir):
+    return parsed_objects(dataset_file)
+
+
+@lru_cache(maxsize=1)
+def parsed_objects(dataset_file):
+    """
+    Objects of the current dataset - Parsed once for all cases that only read them
+    """
+    object_list, _, _ = xml_parse.xml_meta_parser(str(dataset_file))
+    return object_list
+
+
+def setup_elements(dataset_file, object_type, work_dir):
+    """
+    Object elements of a file - Same selection as xml_meta_parser
+    """
+    xml_root = LET.parse(str(dataset_file)).getroot()
+    if object_type == "ped":
+        return xml_root.findall("./InitDatas/Item")
+    return [
+        item
+        for item in xml_root.find("Infos").iter("Item")
+        if item.get("type") == "CWeaponInfo"
+    ]
+
+
+def setup_writer(dataset_file, object_type, work_dir):
+    """
+    Output dir holding a copy of the dataset and one new object to append to it
+    """
+    shutil.copyfile(dataset_file, xml_parse.meta_path(work_dir, object_type))
+
+    template = parsed_objects(dataset_file)[0]
+    new_object, _ = xml_parse.generate_new_object(template, {"Name": "BENCH_OBJECT"})
+    slot_params = None
+    if object_type == "weap":
+        slot_params = [("SlotNavigateOrder", "999"), ("SlotBestOrder", "999")]
+
+    return work_dir, new_object, object_type, slot_params
+
+
+def run_meta_parser(dataset_file, object_type, state):
+    object_list, _, _ = xml_parse.xml_meta_parser(str(dataset_file))
+    return len(object_list)
+
+
+def run_parallel_meta_parser(dataset_file, object_type, state):
+    # Default workers - Falls back to one process where a pool can't be faster
+    [(object_list, _, _)] = parallel_parse.parallel_meta_parser([str(dataset_file)])
+    return len(object_list)
+
+
+def run_create_parsed_objects(dataset_file, object_type, element_list):
+    return len(xml_parse.create_parsed_objects(element_list, object_type))
+
+
+def run_attr_db(dataset_file, object_type, object_list):
+    xml_parse.attr_db(object_list)
+    return len(object_list)
+
+
+def setup_object_table(dataset_file, object_type, work_dir):
+    object_table, _, _ = load_object_table(str(dataset_file))
+    return object_table
+
+
+def run_attr_db_table(dataset_file, object_type, object_table):
+    object_table.attr_db()
+    return len(object_table)
+
+
+def run_generate(dataset_file, object_type, object_list):
+    for count in range(GENERATE_COUNT):
+        template = object_list[count % len(object_list)]
+        xml_parse.generate_new_object(template, {"Name": f"BENCH_{count}"})
+    return GENERATE_COUNT
+
+
+def run_writer(dataset_file, object_type, state, in_place=False):
+    work_dir, new_object, object_type, slot_params = state
+    xml_parse.xml_writer(new_object, work_dir, object_type, slot_params, in_place)
+    return 1
+
+
+def run_writer_in_place(dataset_file, object_type, state):
+    return run_writer(dataset_file, object_type, state, in_place=True)
+
+
+# Case name -> (setup, run). Setup runs before every repeat and is not timed
+BENCHMARK_CASES = {
+    "xml_meta_parser": (None, run_meta_parser),
+    "parallel_meta_parser": (None, run_parallel_meta_parser),
+    "create_parsed_objects": (setup_elements, run_create_parsed_objects),
+    "attr_db": (setup_objects, run_attr_db),
+    "attr_db_table": (setup_object_table, run_attr_db_table),
+    "generate_new_object": (setup_objects, run_generate),
+    "xml_writer": (setup_writer, run_writer),
+    "xml_writer_in_place": (setup_writer, run_writer_in_place),
+}
+
+
+def run_case(case_name, dataset_file, object_type, repeat):
+    """
+    Time a case repeat times, then run it once more under tracemalloc
+    Peak memory is Python allocations only - lxml's C allocations are not traced
+    """
+    case_setup, case_run = BENCHMARK_CASES[case_name]
+    timings = []
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        for _ in range(repeat + 1):
+            state = (
+                case_setup(dataset_file, object_type, work_dir) if case_setup else None
+            )
+
+            if len(timings) < repeat:
+                start_time = time.perf_counter()
+                item_count = case_run(dataset_file, object_type, state)
+                timings.append(time.perf_counter() - start_time)
+            else:
+                tracemalloc.start()
+                case_run(dataset_file, object_type, state)
+                _, peak_bytes = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+
+    return {
+        "case": case_name,
+        "items": item_count,
+        "repeat": repeat,
+        "min_s": min(timings),
+        "median_s": statistics.median(timings),
+        "items_per_s": item_count / min(timings) if min(timings) else None,
+        "peak_py_kib": peak_bytes // 1024,
+    }
+
+
+def run_benchmarks(scales, case_names, repeat, data_dir=DATA_DIR, synthetic_seed=None):
+    """
+    Run the cases on every dataset - Returns the list of result dictionaries
+    """
+    results = []
+    for dataset_name, dataset_file, object_type, scale in datasets.dataset_files(
+        scales, data_dir, synthetic_seed
+    ):
+        for case_name in case_names:
+            result = run_case(case_name, dataset_file, object_type, repeat)
+            result.update(
+                dataset=dataset_name,
+                scale=scale,
+                file_bytes=Path(dataset_file).stat().st_size,
+            )
+            results.append(result)
+            print_result(result)
+
+    return results
+
+
+def print_result(result):
+    print(
+        f"{result['dataset']:<14} {result['case']:<22} "
+        f"{result['min_s'] * 1000:>10.2f} ms {result['items']:>8} items "
+        f"{result['peak_py_kib']:>9} KiB",
+        flush=True,
+    )
+
+
+def run_metadata():
+    """
+    Where and on what the benchmarks ran
+    """
+    try:
+        git_commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        git_commit = None
+
+    return {
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "git_commit": git_commit,
+        "python": platform.python_version(),
+        "lxml": ".".join(str(part) for part in LET.LXML_VERSION),
+        "platform": platform.platform(),
+    }
+
+
+def compare_results(results, baseline_file, threshold):
+    """
+    Print the cases that got slower than threshold x the baseline run
+    Returns the number of regressions
+    """
+    with open(baseline_file, "r", encoding="utf-8") as baseline:
+        baseline_results = {
+            (result["dataset"], result["case"]): result
+            for result in json.load(baseline)["results"]
+        }
+
+    regressions = 0
+    for result in results:
+        old_result = baseline_results.get((result["dataset"], result["case"]))
+        if not old_result or not old_result["min_s"]:
+            continue
+
+        ratio = result["min_s"] / old_result["min_s"]
+        if ratio > threshold:
+            regressions += 1
+            print(
+                f"REGRESSION: {result['dataset']} {result['case']} "
+                f"{old_result['min_s'] * 1000:.2f} ms -> {result['min_s'] * 1000:.2f} ms "
+                f"({ratio:.2f}x)"
+            )
+
+    return regressions
+
+
+def build_arg_parser():
+    arg_parser = argparse.ArgumentParser(
+        prog="python -m benchmarks",
+        description="Benchmark parsing, attr_db, generation and writing",
+    )
+    arg_parser.add_argument(
+        "--scales",
+        nargs="+",
+        type=int,
+        default=[1, 10, 100],
+        help="Database sizes as multiples of the bundled files (default: 1 10 100)",
+    )
+    arg_parser.add_argument(
+        "--cases",
+        nargs="+",
+        choices=list(BENCHMARK_CASES),
+        default=list(BENCHMARK_CASES),
+        help="Cases to run (default: all)",
+    )
+    arg_parser.add_argument(
+        "--repeat", type=int, default=3, help="Timed runs per case (default: 3)"
+    )
+    arg_parser.add_argument(
+        "--data-dir", default=DATA_DIR, help="Where the scaled databases are kept"
+    )
+    arg_parser.add_argument(
+        "--synthetic",
+        type=int,
+        metavar="SEED",
+        help="Sample the scaled databases with benchmarks.synthetic instead of copying",
+    )
+    arg_parser.add_argument(
+        "-o", "--output", help=f"Results JSON file (default: {RESULTS_DIR}/<time>.json)"
+    )
+    arg_parser.add_argument(
+        "--compare", metavar="RESULTS", help="Results JSON file of an earlier run"
+    )
+    arg_parser.add_argument(
+        "--threshold",
+        type=float,
+        default=1.25,
+        help="Slowdown vs --compare that counts as a regression (default: 1.25)",
+    )
+    return arg_parser
+
+
+def main(argv=None):
+    args = build_arg_parser().parse_args(argv)
+
+    metadata = run_metadata()
+    results = run_benchmarks(
+        args.scales, args.cases, args.repeat, args.data_dir, args.synthetic
+    )
+
+    output_file = Path(
+        args.output or f"{RESULTS_DIR}/{metadata['time'].replace(':', '')}.json"
+    )
+    output_file.parent.mkdir(parents=True, exist_ok=True)
+    with open(output_file, "w", encoding="utf-8") as results_file:
+        json.dump({"metadata": metadata, "results": results}, results_file, indent=2)
+    print(f"Results written to {output_file}")
+
+    if args.compare and compare_results(results, args.compare, args.threshold):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
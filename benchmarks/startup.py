@@ -0,0 +1,100 @@
+"""
+GUI startup time check - Time from import to the first painted main window
+Each run is a new Python process so no module is already imported
+Fails (exit code 1) when startup is over the budget or a deferred module was loaded
+"""
+
+from pathlib import Path
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+# Seconds from the start of the import to the painted window (fastest run)
+STARTUP_BUDGET = 0.5
+
+# Modules the window must not wait for - Imported on first use
+DEFERRED_MODULES = ["lxml.etree", "functions.xml_parse", "tracemalloc"]
+
+STARTUP_PROBE = """
+import json
+import sys
+import time
+
+start_time = time.perf_counter()
+import GTAV_QTApp
+
+import_time = time.perf_counter()
+app, main_ui, controller = GTAV_QTApp.start_app()
+app.processEvents()
+window_time = time.perf_counter()
+
+print(json.dumps({
+    "import_s": import_time - start_time,
+    "window_s": window_time - start_time,
+    "loaded": [name for name in %r if name in sys.modules],
+}))
+"""
+
+
+def measure_startup(repeat):
+    """
+    Startup timings of repeat new processes - List of result dictionaries
+    """
+    repo_root = Path(__file__).resolve().parent.parent
+    env = dict(os.environ)
+    # No display needed (CI, ssh)
+    env.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+    results = []
+    for _ in range(repeat):
+        probe = subprocess.run(
+            [sys.executable, "-c", STARTUP_PROBE % DEFERRED_MODULES],
+            cwd=repo_root,
+            env=env,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        results.append(json.loads(probe.stdout.strip().splitlines()[-1]))
+
+    return results
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.startup",
+        description="Check the GUI startup time against a budget",
+    )
+    arg_parser.add_argument(
+        "--repeat", type=int, default=5, help="Processes to start (default: 5)"
+    )
+    arg_parser.add_argument(
+        "--budget",
+        type=float,
+        default=STARTUP_BUDGET,
+        help=f"Seconds to the painted window (default: {STARTUP_BUDGET})",
+    )
+    args = arg_parser.parse_args(argv)
+
+    results = measure_startup(args.repeat)
+    import_s = min(result["import_s"] for result in results)
+    window_s = min(result["window_s"] for result in results)
+    loaded = sorted({name for result in results for name in result["loaded"]})
+
+    print(f"import {import_s * 1000:.1f} ms, window painted {window_s * 1000:.1f} ms")
+
+    failed = False
+    if window_s > args.budget:
+        print(f"OVER BUDGET: {window_s:.3f} s > {args.budget:.3f} s")
+        failed = True
+    if loaded:
+        print(f"LOADED AT STARTUP: {', '.join(loaded)}")
+        failed = True
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
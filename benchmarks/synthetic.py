@@ -0,0 +1,204 @@
+"""
+Seeded generator of large, realistic peds/weapons META files
+Values are sampled from the parameter value distributions of a source database
+(the bundled files by default) so the output has the same schema and value mix
+"""
+
+from collections import Counter
+import argparse
+import os
+import random
+import sys
+
+from benchmarks import datasets
+from functions import xml_parse
+from functions.weapon_flags import WeaponFlags
+from functions.xml_parse import GTAObjects, ParamNode
+
+# Share of numeric attribute values that are changed a little instead of copied
+JITTER_RATE = 0.2
+# Largest relative change of a jittered number
+JITTER_SPREAD = 0.5
+
+
+class ValueSampler:
+    """
+    Per parameter value pools of a source database
+    Pools keep duplicates so values are drawn with their frequency in the source
+    """
+
+    def __init__(self, object_list, seed=None, jitter_rate=JITTER_RATE):
+        self.rng = random.Random(seed)
+        self.jitter_rate = jitter_rate
+        self.templates = object_list
+
+        # Param -> list of values, (Param, child tag) -> list of ParamNodes
+        self.value_pools = {}
+        self.child_pools = {}
+        # OverrideForces items and the number of items per object
+        self.force_items = []
+        self.force_counts = []
+        # WeaponFlags single flags and the number of flags per object
+        self.flag_counts = Counter()
+        self.flags_per_object = []
+
+        for gta_object in object_list:
+            self.add_object(gta_object)
+
+    def add_object(self, gta_object):
+        for param, value in gta_object.return_att_dict().items():
+            self.value_pools.setdefault(param, []).append(value)
+
+            if param == "OverrideForces" and value:
+                self.force_items.extend(value)
+                self.force_counts.append(len(value))
+            elif param == "WeaponFlags" and value:
+                # Sorted - Bit order depends on what else was parsed before
+                object_flags = sorted(value)
+                self.flag_counts.update(object_flags)
+                self.flags_per_object.append(len(object_flags))
+            elif is_node_tuple(value):
+                for child in value:
+                    self.child_pools.setdefault((param, child.tag), []).append(child)
+
+    def sample_object(self, name):
+        """
+        New object with a random template's params, each filled with a sampled value
+        """
+        template = self.rng.choice(self.templates)
+        param_dictionary = {}
+
+        for param in template.return_att_dict():
+            if param == "object_type":
+                param_dictionary[param] = template.object_type
+            elif param == "Name":
+                param_dictionary[param] = name
+            else:
+                param_dictionary[param] = self.sample_value(param)
+
+        return GTAObjects(param_dictionary)
+
+    def sample_value(self, param):
+        if param == "OverrideForces" and self.force_items:
+            force_count = self.rng.choice(self.force_counts)
+            return [self.rng.choice(self.force_items) for _ in range(force_count)]
+        elif param == "WeaponFlags" and self.flags_per_object:
+            return self.sample_flags()
+
+        value = self.rng.choice(self.value_pools[param])
+        if isinstance(value, dict):
+            return {attr: self.jitter(attr_value) for attr, attr_value in value.items()}
+        elif is_node_tuple(value) and all(child.tag != "Item" for child in value):
+            # Named children (Fx, Explosion) - Sample every child on its own
+            return tuple(self.sample_child(param, child.tag) for child in value)
+
+        return value
+
+    def sample_child(self, param, child_tag):
+        child = self.rng.choice(self.child_pools[(param, child_tag)])
+        if not child.attrs:
+            return child
+        return child._replace(
+            attrs=tuple((attr, self.jitter(value)) for attr, value in child.attrs)
+        )
+
+    def sample_flags(self):
+        """
+        Distinct flags, common flags are picked more often
+        """
+        flag_count = self.rng.choice(self.flags_per_object)
+        flags = list(self.flag_counts)
+        weights = [self.flag_counts[flag] for flag in flags]
+
+        picked_flags = []
+        while len(picked_flags) < min(flag_count, len(flags)):
+            flag = self.rng.choices(flags, weights)[0]
+            if flag not in picked_flags:
+                picked_flags.append(flag)
+
+        return WeaponFlags(picked_flags)
+
+    def jitter(self, text):
+        """
+        Sometimes change a number by up to JITTER_SPREAD, keeping its format
+        """
+        if self.rng.random() >= self.jitter_rate:
+            return text
+
+        try:
+            number = float(text)
+        except (TypeError, ValueError):
+            return text
+
+        number *= 1 + self.rng.uniform(-JITTER_SPREAD, JITTER_SPREAD)
+        if "." in text:
+            decimals = len(text.split(".")[1])
+            return f"{number:.{decimals}f}"
+        return str(int(round(number)))
+
+
+def is_node_tuple(value):
+    return isinstance(value, tuple) and value and isinstance(value[0], ParamNode)
+
+
+def iter_synthetic_objects(sampler, count, name_prefix):
+    """
+    (object, slot params) pairs for xml_stream_writer - Objects are made on demand
+    """
+    for object_number in range(count):
+        yield sampler.sample_object(f"{name_prefix}_{object_number:07d}"), None
+
+
+def write_synthetic_meta(
+    output_dir, object_type, count, seed=None, source_file=None, name_prefix=None
+):
+    """
+    Stream count sampled objects to output_dir/peds.meta or weapons.meta
+    Same seed and source -> same file
+    """
+    if source_file is None:
+        source_file = next(
+            database_file
+            for database_file, database_type in datasets.DATABASES.values()
+            if database_type == object_type
+        )
+
+    object_list, err_message, source_type = xml_parse.xml_meta_parser(source_file)
+    if err_message or source_type != object_type:
+        raise ValueError(f"{source_file} is not a {object_type} database")
+
+    sampler = ValueSampler(object_list, seed)
+    name_prefix = name_prefix or f"SYN_{object_type.upper()}"
+    os.makedirs(output_dir, exist_ok=True)
+    xml_parse.xml_stream_writer(
+        iter_synthetic_objects(sampler, count, name_prefix), output_dir, object_type
+    )
+
+    return xml_parse.meta_path(output_dir, object_type)
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.synthetic",
+        description="Generate a large synthetic peds.meta or weapons.meta file",
+    )
+    arg_parser.add_argument("object_type", choices=["ped", "weap"])
+    arg_parser.add_argument("count", type=int, help="Number of objects")
+    arg_parser.add_argument("-o", "--output", default=".", help="Output directory")
+    arg_parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    arg_parser.add_argument(
+        "--source", help="Database to sample values from (default: bundled file)"
+    )
+    args = arg_parser.parse_args(argv)
+
+    meta_file_path = write_synthetic_meta(
+        args.output, args.object_type, args.count, args.seed, args.source
+    )
+    print(
+        f"{args.count} synthetic {args.object_type} objects written to {meta_file_path}"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
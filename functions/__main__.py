@@ -0,0 +1,7 @@
+import sys
+
+from functions import cli
+
+# Guarded so parsing processes started with spawn (Windows) don't run the CLI again
+if __name__ == "__main__":
+    sys.exit(cli.main())
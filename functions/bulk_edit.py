@@ -0,0 +1,233 @@
+"""
+Bulk edits - Change the same params of many objects in one vectorized pass (needs numpy)
+Selector -> queries that must all match (see functions.query),
+e.g. ["Group=GROUP_RIFLE", "Damage>=20 or WeaponFlags has Gun"]
+Expressions -> "Param = expression", e.g. "Damage = Damage * 1.1",
+"AimOffsetMin.x = clip(AimOffsetMin.x + 0.1, 0, 1)" or "DamageType = 'MELEE'"
+Expressions are parsed with ast and only arithmetic on params/ numbers is allowed
+"""
+
+import ast
+import logging
+import re
+
+import numpy as np
+
+from functions import instrument
+from functions import xml_parse
+from functions.numeric_view import NumericView
+from functions.query import QueryIndex
+
+logger = logging.getLogger(__name__)
+
+BINARY_OPS = {
+    ast.Add: np.ma.add,
+    ast.Sub: np.ma.subtract,
+    ast.Mult: np.ma.multiply,
+    ast.Div: np.ma.true_divide,
+    ast.FloorDiv: np.ma.floor_divide,
+    ast.Mod: np.ma.mod,
+    ast.Pow: np.ma.power,
+}
+
+UNARY_OPS = {ast.USub: np.ma.negative, ast.UAdd: np.ma.asarray}
+
+# Functions expressions can call -> numpy function
+FUNCTIONS = {
+    "abs": np.ma.abs,
+    "min": np.ma.minimum,
+    "max": np.ma.maximum,
+    "round": np.ma.round,
+    "clip": np.ma.clip,
+}
+# Number of arguments of each function
+FUNCTION_ARGS = {"abs": 1, "min": 2, "max": 2, "round": 1, "clip": 3}
+
+# Largest value an int column can hold
+INT_LIMIT = 2.0**63
+
+
+def bulk_edit(object_list, selector, expressions):
+    """
+    Copies of the objects matching the selector with the expressions applied
+    The database objects are not changed - The copies keep their Name
+    Returns a list of edited objects and an error message
+    """
+    try:
+        assignments = [parse_assignment(expression) for expression in expressions]
+
+        selected_rows = select_rows(object_list, selector)
+        if not selected_rows:
+            return [], None
+
+        edited_objects = [
+            xml_parse.generate_new_object(object_list[row], {})[0]
+            for row in selected_rows
+        ]
+        with instrument.span("bulk_edit", items=len(edited_objects)):
+            change_count = apply_assignments(edited_objects, assignments)
+    except ValueError as err:
+        logger.error(f"Bulk edit failed: {err}")
+        return [], str(err)
+
+    logger.info(
+        f"Bulk edit changed {change_count} values of {len(edited_objects)} objects."
+    )
+    return edited_objects, None
+
+
+def parse_assignment(expression):
+    """
+    "Param = expression" -> (param, ast of the expression, params used by it)
+    """
+    target, equals, source = expression.partition("=")
+    target = target.strip()
+    if not equals or not re.fullmatch(r"[\w.]+", target):
+        raise ValueError(f"INVALID EXPRESSION: {expression}")
+
+    try:
+        expression_tree = ast.parse(source.strip(), mode="eval").body
+    except SyntaxError:
+        raise ValueError(f"INVALID EXPRESSION: {expression}") from None
+
+    used_params = set()
+    check_expression(expression_tree, used_params, expression)
+    return target, expression_tree, used_params
+
+
+def check_expression(node, used_params, expression):
+    """
+    Only allow numbers, strings, params, arithmetic and FUNCTIONS - Collects used params
+    """
+    if isinstance(node, ast.Constant) and isinstance(node.value, (int, float, str)):
+        return
+    elif isinstance(node, (ast.Name, ast.Attribute)):
+        used_params.add(dotted_name(node, expression))
+    elif isinstance(node, ast.BinOp) and type(node.op) in BINARY_OPS:
+        check_expression(node.left, used_params, expression)
+        check_expression(node.right, used_params, expression)
+    elif isinstance(node, ast.UnaryOp) and type(node.op) in UNARY_OPS:
+        check_expression(node.operand, used_params, expression)
+    elif (
+        isinstance(node, ast.Call)
+        and isinstance(node.func, ast.Name)
+        and node.func.id in FUNCTIONS
+        and not node.keywords
+    ):
+        arg_count = FUNCTION_ARGS[node.func.id]
+        if len(node.args) != arg_count:
+            raise ValueError(
+                f"{node.func.id} TAKES {arg_count} ARGUMENTS: {expression}"
+            )
+        for arg in node.args:
+            check_expression(arg, used_params, expression)
+    else:
+        raise ValueError(f"NOT ALLOWED IN EXPRESSION: {expression}")
+
+
+def dotted_name(node, expression):
+    """
+    Column name of a Name/ Attribute node - AimOffsetMin.x, Fx.FlashFxChanceSP
+    """
+    if isinstance(node, ast.Name):
+        return node.id
+    elif isinstance(node, ast.Attribute):
+        return f"{dotted_name(node.value, expression)}.{node.attr}"
+    raise ValueError(f"NOT ALLOWED IN EXPRESSION: {expression}")
+
+
+def select_rows(object_list, selector):
+    """
+    Rows (indexes into object_list) matching all queries of the selector
+    """
+    if not selector:
+        return list(range(len(object_list)))
+
+    query_text = " and ".join(f"({query_text})" for query_text in selector)
+    return QueryIndex(object_list).find_rows(query_text)
+
+
+def apply_assignments(edited_objects, assignments):
+    """
+    Apply the assignments in order to all edited objects at once
+    Later expressions see the values set by earlier ones. Returns the changed value count
+    """
+    used_params = set()
+    for target, _, params in assignments:
+        used_params.add(target.split(".")[0])
+        used_params.update(param.split(".")[0] for param in params)
+
+    view = NumericView(edited_objects, used_params)
+    change_count = 0
+
+    for target, expression_tree, params in assignments:
+        if isinstance(expression_tree, ast.Constant) and isinstance(
+            expression_tree.value, str
+        ):
+            # Text params - Same value for every object that has the param
+            for edited_object in edited_objects:
+                if hasattr(edited_object, target):
+                    edited_object.update_attr({target: expression_tree.value})
+                    change_count += 1
+        elif target in view:
+            view.set_values(
+                target, checked_values(expression_tree, params, view, target)
+            )
+        else:
+            raise ValueError(f"NOT A NUMERIC PARAMETER: {target}")
+
+    return change_count + view.write_back()
+
+
+def checked_values(expression_tree, used_params, view, target):
+    """
+    Values of an expression for the target column
+    Overflow, division by zero and other invalid results raise ValueError
+    Rows missing a used param are masked and not changed, they are not errors
+    """
+    # numpy warnings are turned into the error below
+    with np.errstate(all="ignore"):
+        values = np.ma.masked_invalid(
+            np.ma.array(evaluate(expression_tree, view), dtype=np.float64, ndmin=1)
+        )
+        if view[target].dtype.kind == "i":
+            values = np.ma.masked_where(np.ma.getdata(abs(values)) >= INT_LIMIT, values)
+
+    missing = np.ma.getmaskarray(view[target])
+    for param in used_params:
+        missing = missing | np.ma.getmaskarray(view[param])
+
+    invalid_count = np.count_nonzero(np.ma.getmaskarray(values) & ~missing)
+    if invalid_count:
+        raise ValueError(
+            f"INVALID RESULT (OVERFLOW OR DIVISION BY ZERO) FOR {invalid_count} "
+            f"OBJECTS: {target}"
+        )
+    return values
+
+
+def evaluate(node, view):
+    """
+    Value of a checked expression - Masked arrays of the view columns
+    Objects missing a used param get a masked value and are not changed
+    """
+    if isinstance(node, ast.Constant):
+        if isinstance(node.value, str):
+            raise ValueError(f"TEXT IN NUMERIC EXPRESSION: {node.value}")
+        try:
+            return float(node.value)
+        except OverflowError:
+            raise ValueError(f"NUMBER TOO LARGE: {node.value}") from None
+    elif isinstance(node, (ast.Name, ast.Attribute)):
+        name = dotted_name(node, "")
+        if name not in view:
+            raise ValueError(f"NOT A NUMERIC PARAMETER: {name}")
+        # Float math - Int columns would wrap around on overflow
+        return view[name].astype(np.float64)
+    elif isinstance(node, ast.BinOp):
+        return BINARY_OPS[type(node.op)](
+            evaluate(node.left, view), evaluate(node.right, view)
+        )
+    elif isinstance(node, ast.UnaryOp):
+        return UNARY_OPS[type(node.op)](evaluate(node.operand, view))
+    return FUNCTIONS[node.func.id](*(evaluate(arg, view) for arg in node.args))
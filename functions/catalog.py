@@ -0,0 +1,197 @@
+from concurrent.futures import ThreadPoolExecutor
+import logging
+
+from lxml import etree as LET
+
+from functions import db_cache
+from functions import weapon_flags
+from functions import xml_parse
+from functions.name_index import NameIndex
+from functions.param_index import ParamValueIndex
+from functions.query import QueryIndex
+from functions.search import SearchIndex
+
+logger = logging.getLogger(__name__)
+
+# "last" -> Files added later override earlier ones (stock file first, then addons)
+# "first" -> The first file that has a name keeps it
+PRECEDENCES = ("last", "first")
+
+
+class MetaCatalog:
+
+    """
+    Many META/XML files of the same type merged into one catalog
+    Objects are deduplicated by Name (case insensitive) with the configured precedence
+    Only the parsed objects are kept - No lxml tree is held once a file is loaded
+    """
+
+    def __init__(self, precedence="last"):
+        if precedence not in PRECEDENCES:
+            raise ValueError(f"precedence must be one of {PRECEDENCES}")
+
+        self.precedence = precedence
+        self.object_type = None
+        # Files in the order they were merged
+        self.sources = []
+        # NAME -> object, NAME -> file it came from
+        self.objects = {}
+        self.provenance = {}
+        # NAME -> files whose object lost to the current one
+        self.overridden = {}
+
+        # Kept up to date as files are merged
+        self.attr_db = ParamValueIndex()
+        self.name_index = NameIndex()
+        # Built on the first query/ search after a merge
+        self.query_index = None
+        self.search_index = None
+
+    def __len__(self):
+        return len(self.objects)
+
+    def __contains__(self, name):
+        return name.upper() in self.objects
+
+    @property
+    def object_list(self):
+        return list(self.objects.values())
+
+    def source_of(self, name):
+        """
+        File the current object of a name came from
+        """
+        return self.provenance.get(name.upper())
+
+    def objects_with_flags(self, with_flags=(), without_flags=()):
+        """
+        Weapons having all of with_flags and none of without_flags (names or WeaponFlags)
+        """
+        return weapon_flags.filter_objects(self.object_list, with_flags, without_flags)
+
+    def query(self, query_text):
+        """
+        Objects matching a query (see functions.query) - Object list and error message
+        """
+        return self.get_query_index().find(query_text)
+
+    def get_query_index(self):
+        if self.query_index is None:
+            self.query_index = QueryIndex(self.object_list)
+        return self.query_index
+
+    def search(self, search_text, limit=20):
+        """
+        Best (object, param) hits of the search words (see functions.search)
+        """
+        return self.get_search_index().search(search_text, limit)
+
+    def search_objects(self, search_text, limit=20):
+        """
+        Best objects for the search words - List of (score, object)
+        """
+        return self.get_search_index().search_objects(search_text, limit)
+
+    def get_search_index(self):
+        if self.search_index is None:
+            self.search_index = SearchIndex(self.object_list)
+        return self.search_index
+
+    def numeric_view(self):
+        """
+        NumericView (numpy columns) of the numeric params of the catalog objects
+        """
+        # Only imported when used - numpy is optional
+        from functions.numeric_view import NumericView
+
+        return NumericView(self.object_list)
+
+    def add_objects(self, object_list, object_type, source):
+        """
+        Merge the objects of one file - Returns an error message or None
+        """
+        if self.object_type is None:
+            self.object_type = object_type
+        elif object_type != self.object_type:
+            logger.error(
+                f"{source} has {object_type} objects, catalog has {self.object_type}."
+            )
+            return "TYPE MISMATCH"
+
+        added_objects = []
+        for gta_object in object_list:
+            name = gta_object.Name.upper()
+            old_object = self.objects.get(name)
+
+            if old_object is None:
+                pass
+            elif self.precedence == "first":
+                self.overridden.setdefault(name, []).append(source)
+                continue
+            else:
+                self.overridden.setdefault(name, []).append(self.provenance[name])
+                self.attr_db.remove_object(old_object)
+
+            self.objects[name] = gta_object
+            self.provenance[name] = source
+            self.attr_db.add_object(gta_object)
+            added_objects.append(gta_object)
+
+        self.name_index.add_objects(added_objects)
+        self.sources.append(source)
+        self.query_index = None
+        self.search_index = None
+
+        logger.info(
+            f"{len(added_objects)} of {len(object_list)} objects merged from {source}."
+        )
+        return None
+
+    def load_files(self, xml_files, use_cache=True, max_workers=None, processes=False):
+        """
+        Parse files in parallel then merge them in the given order
+        processes=True parses in a process pool (large files are split), skipping the cache
+        Returns a list of (file, error message) for the files that were not merged
+        """
+        if processes:
+            # Only imported when used - Starts no processes until then
+            from functions import parallel_parse
+
+            parsed_files = parallel_parse.parallel_meta_parser(xml_files, max_workers)
+        else:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                parsed_files = list(
+                    executor.map(
+                        lambda xml_file: load_meta_file(xml_file, use_cache), xml_files
+                    )
+                )
+
+        error_list = []
+        for xml_file, (object_list, err_message, object_type) in zip(
+            xml_files, parsed_files
+        ):
+            if not err_message:
+                err_message = self.add_objects(object_list, object_type, xml_file)
+            if err_message:
+                error_list.append((xml_file, err_message))
+
+        return error_list
+
+
+def load_meta_file(xml_file, use_cache=True):
+    """
+    Parse one file for the catalog - Returns object list, error message and object type
+    """
+    if use_cache:
+        object_list, err_message, object_type, _ = db_cache.cached_meta_parser(xml_file)
+        return object_list, err_message, object_type
+
+    object_stream, err_message, object_type = xml_parse.stream_meta_parser(xml_file)
+    if err_message:
+        return None, err_message, None
+
+    try:
+        return list(object_stream), None, object_type
+    except LET.XMLSyntaxError:
+        logger.exception(f"{xml_file} file not readable.")
+        return None, "XML/META PARSE ERROR", None
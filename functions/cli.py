@@ -0,0 +1,506 @@
+"""
+Headless command line interface - python -m functions <command>
+Never imports PyQt5. Parsing modules are only imported by the command that needs them
+"""
+
+import argparse
+import os
+import sys
+
+# Batch file columns/ keys that are not object parameters
+SLOT_LABELS = ["SlotNavigateOrder", "SlotBestOrder"]
+
+
+def read_batch_file(batch_file, object_type, templates=None):
+    """
+    Read (template name, new_val_dict, slot params) rows from a CSV or JSON file
+    CSV -> Template column, optional slot number columns, one column per parameter
+    JSON -> [{"template": name, "overrides": {param: value}, "slots": {label: number}}]
+    JSON numbers are used as text. templates (NameIndex) -> Rows are also checked
+    against their template: known template, known params and values that fit them
+    Returns the batch rows and an error message naming the first invalid row
+    """
+    import csv
+    import json
+
+    batch_rows = []
+
+    if os.path.splitext(batch_file)[1].lower() == ".json":
+        with open(batch_file, "r", encoding="utf-8") as json_file:
+            entries = json.load(json_file)
+        if not isinstance(entries, list):
+            return [], f"{batch_file}: EXPECTED A LIST OF ENTRIES"
+
+        for entry_number, entry in enumerate(entries, 1):
+            if not isinstance(entry, dict):
+                return [], f"{batch_file} entry {entry_number}: NOT AN OBJECT"
+            template_name = entry.get("template")
+            overrides = json_text_values(entry.get("overrides", {}))
+            slots = entry.get("slots", {})
+            err_message = check_batch_row(template_name, overrides, slots, templates)
+            if err_message:
+                return [], f"{batch_file} entry {entry_number}: {err_message}"
+            batch_rows.append(
+                (template_name, overrides, slot_params(slots, object_type))
+            )
+    else:
+        with open(batch_file, "r", encoding="utf-8", newline="") as csv_file:
+            csv_reader = csv.DictReader(csv_file)
+            if "Template" not in (csv_reader.fieldnames or ()):
+                return [], f"{batch_file}: MISSING Template COLUMN"
+
+            # Line 1 is the header
+            for line_number, row in enumerate(csv_reader, 2):
+                template_name = row.pop("Template")
+                slots = {label: row.pop(label) for label in SLOT_LABELS if label in row}
+                # Empty cells keep the template value
+                overrides = {k: v for k, v in row.items() if v not in (None, "")}
+                err_message = check_batch_row(
+                    template_name, overrides, slots, templates
+                )
+                if err_message:
+                    return [], f"{batch_file} line {line_number}: {err_message}"
+                batch_rows.append(
+                    (template_name, overrides, slot_params(slots, object_type))
+                )
+
+    return batch_rows, None
+
+
+def json_text_values(overrides):
+    """
+    JSON numbers -> text like CSV cells (30 -> "30"), also in attribute dicts
+    Other values are left for check_batch_row
+    """
+    if not isinstance(overrides, dict):
+        return overrides
+
+    text_values = {}
+    for param, value in overrides.items():
+        if isinstance(value, dict):
+            value = json_text_values(value)
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            value = str(value)
+        text_values[param] = value
+    return text_values
+
+
+def check_batch_row(template_name, overrides, slots, templates=None):
+    """
+    Error message of an invalid batch row - None if it is valid
+    """
+    if not isinstance(template_name, str) or not template_name.strip():
+        return "MISSING TEMPLATE"
+    elif not isinstance(overrides, dict):
+        return "OVERRIDES MUST BE AN OBJECT OF PARAM: VALUE"
+    elif None in overrides:
+        # Extra CSV cells without a header
+        return "MORE CELLS THAN COLUMNS"
+    elif not isinstance(slots, dict):
+        return "SLOTS MUST BE AN OBJECT OF LABEL: NUMBER"
+    elif templates is None:
+        return None
+
+    from functions import xml_parse
+
+    object_template = templates.get(template_name.upper())
+    if object_template is None:
+        return f"INVALID TEMPLATE: {template_name}"
+    return xml_parse.check_new_values(object_template, overrides)
+
+
+def slot_params(slots, object_type):
+    """
+    Slot params for xml_batch_writer - Same defaults as the GUI form
+    """
+    if object_type != "weap":
+        return None
+    return [(label, str(slots.get(label) or "0")) for label in SLOT_LABELS]
+
+
+def load_database(
+    database, use_cache=True, merge_files=(), precedence="last", jobs=None
+):
+    """
+    Parse a database file - Returns object list, error message and object type
+    merge_files are merged on top of the database (see catalog.MetaCatalog)
+    jobs -> Number of parsing processes (parallel_parse), None parses in this process
+    """
+    if merge_files or jobs:
+        from functions.catalog import MetaCatalog
+
+        meta_catalog = MetaCatalog(precedence)
+        error_list = meta_catalog.load_files(
+            [database] + list(merge_files), use_cache, jobs, processes=bool(jobs)
+        )
+        for xml_file, err_message in error_list:
+            print(f"ERROR: {xml_file}: {err_message}", file=sys.stderr)
+        if error_list:
+            return None, error_list[0][1], None
+        return meta_catalog.object_list, None, meta_catalog.object_type
+
+    if use_cache:
+        from functions import db_cache
+
+        object_list, err_message, object_type, _ = db_cache.cached_meta_parser(database)
+    else:
+        from functions import xml_parse
+
+        object_list, err_message, object_type = xml_parse.xml_meta_parser(database)
+
+    if err_message:
+        print(f"ERROR: {err_message}", file=sys.stderr)
+    return object_list, err_message, object_type
+
+
+def generate_command(args):
+    """
+    Generate addon objects from a batch file into one META file
+    """
+    from functions import xml_parse
+    from functions.name_index import NameIndex
+
+    object_list, err_message, object_type = load_database(
+        args.database, not args.no_cache, args.merge, args.precedence, args.jobs
+    )
+    if err_message:
+        return 1
+
+    # Every row is checked against its template before anything is generated
+    templates = NameIndex(object_list)
+    batch_rows = []
+    for batch_file in args.batch_files:
+        file_rows, err_message = read_batch_file(batch_file, object_type, templates)
+        if err_message:
+            print(f"ERROR: {err_message}", file=sys.stderr)
+            return 1
+        batch_rows.extend(file_rows)
+
+    # Output directory is only made once the batch is known to be valid
+    os.makedirs(args.output, exist_ok=True)
+    if args.stream:
+        return stream_generate(object_list, batch_rows, object_type, args.output)
+
+    new_objects, error_list = xml_parse.generate_batch(object_list, batch_rows)
+    for error in error_list:
+        print(f"ERROR: {error}", file=sys.stderr)
+
+    if new_objects:
+        xml_parse.xml_batch_writer(new_objects, args.output, object_type, args.in_place)
+        print(
+            f"{len(new_objects)} {object_type} objects written to "
+            f"{xml_parse.meta_path(args.output, object_type)}"
+        )
+
+    return 1 if error_list else 0
+
+
+def stream_generate(object_list, batch_rows, object_type, output):
+    """
+    generate --stream - Objects are written to a new META file as they are created
+    """
+    from functions import xml_parse
+
+    error_list = []
+    new_objects = xml_parse.iter_generate_batch(object_list, batch_rows, error_list)
+    slot_entries = xml_parse.batch_slot_entries(object_list, batch_rows)
+
+    xml_parse.xml_stream_writer(new_objects, output, object_type, slot_entries)
+    for error in error_list:
+        print(f"ERROR: {error}", file=sys.stderr)
+
+    print(
+        f"{len(batch_rows) - len(error_list)} {object_type} objects written to "
+        f"{xml_parse.meta_path(output, object_type)}"
+    )
+    return 1 if error_list else 0
+
+
+def edit_command(args):
+    """
+    Bulk edit the objects matching --where with the --set expressions
+    The edited objects keep their Name and are written to one META file
+    """
+    from functions import bulk_edit
+    from functions import xml_parse
+
+    object_list, err_message, object_type = load_database(
+        args.database, not args.no_cache, args.merge, args.precedence, args.jobs
+    )
+    if err_message:
+        return 1
+
+    edited_objects, err_message = bulk_edit.bulk_edit(object_list, args.where, args.set)
+    if err_message:
+        print(f"ERROR: {err_message}", file=sys.stderr)
+        return 1
+    if not edited_objects:
+        print("No objects match the selector.")
+        return 0
+
+    new_objects = [
+        (edited_object, slot_params({}, object_type))
+        for edited_object in edited_objects
+    ]
+    os.makedirs(args.output, exist_ok=True)
+    xml_parse.xml_batch_writer(new_objects, args.output, object_type, args.in_place)
+    print(
+        f"{len(new_objects)} {object_type} objects written to "
+        f"{xml_parse.meta_path(args.output, object_type)}"
+    )
+    return 0
+
+
+def query_command(args):
+    """
+    Print the names of the objects matching a query
+    """
+    from functions.query import QueryIndex
+
+    object_list, err_message, object_type = load_database(
+        args.database, not args.no_cache, args.merge, args.precedence, args.jobs
+    )
+    if err_message:
+        return 1
+
+    matches, err_message = QueryIndex(object_list).find(args.query)
+    if err_message:
+        print(f"ERROR: {err_message}", file=sys.stderr)
+        return 1
+
+    if args.count:
+        print(len(matches))
+    else:
+        for gta_object in matches:
+            print(gta_object.Name)
+    return 0
+
+
+def search_command(args):
+    """
+    Print the best search hits of one or more databases (peds and weapons together)
+    """
+    from functions.search import SearchIndex
+
+    search_index = SearchIndex()
+    databases = [(args.database, args.merge)] + [(add, ()) for add in args.add]
+    for database, merge_files in databases:
+        object_list, err_message, object_type = load_database(
+            database, not args.no_cache, merge_files, args.precedence, args.jobs
+        )
+        if err_message:
+            return 1
+        search_index.add_objects(object_list)
+
+    if args.objects:
+        for score, gta_object in search_index.search_objects(args.text, args.limit):
+            print(f"{score:7.2f}  {gta_object.object_type}  {gta_object.Name}")
+    else:
+        for hit in search_index.search(args.text, args.limit):
+            print(
+                f"{hit.score:7.2f}  {hit.gta_object.object_type}  "
+                f"{hit.gta_object.Name}  {hit.param}: {hit.text}"
+            )
+    return 0
+
+
+def list_command(args):
+    """
+    Print the template names of a database file
+    """
+    object_list, err_message, object_type = load_database(
+        args.database, not args.no_cache, args.merge, args.precedence, args.jobs
+    )
+    if err_message:
+        return 1
+
+    for gta_object in object_list:
+        print(gta_object.Name)
+    return 0
+
+
+def build_arg_parser():
+    arg_parser = argparse.ArgumentParser(
+        prog="python -m functions",
+        description="GTA V addon META generator without the GUI",
+    )
+    sub_parsers = arg_parser.add_subparsers(dest="command", required=True)
+
+    generate_parser = sub_parsers.add_parser(
+        "generate", help="Generate many addon objects into one META file"
+    )
+    generate_parser.add_argument(
+        "database", help="peds.ymt.xml, peds.meta or weapons.meta"
+    )
+    generate_parser.add_argument(
+        "batch_files", nargs="+", help="CSV or JSON files of templates/changes"
+    )
+    generate_parser.add_argument(
+        "-o", "--output", default=".", help="Directory of the generated META file"
+    )
+    generate_parser.add_argument(
+        "--in-place",
+        action="store_true",
+        help="Splice the objects into an existing META file instead of rewriting it",
+    )
+    generate_parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Write a new META file (replacing an existing one) while objects are created",
+    )
+    generate_parser.set_defaults(func=generate_command)
+
+    edit_parser = sub_parsers.add_parser(
+        "edit", help="Change params of all objects matching a selector (needs numpy)"
+    )
+    edit_parser.add_argument("database", help="peds.ymt.xml, peds.meta or weapons.meta")
+    edit_parser.add_argument(
+        "-w",
+        "--where",
+        action="append",
+        default=[],
+        metavar="CONDITION",
+        help='Query of the objects to edit, e.g. "Group=GROUP_RIFLE", can be repeated',
+    )
+    edit_parser.add_argument(
+        "-s",
+        "--set",
+        action="append",
+        required=True,
+        metavar="EXPRESSION",
+        help='Change to make, e.g. "Damage = Damage * 1.1", can be repeated',
+    )
+    edit_parser.add_argument(
+        "-o", "--output", default=".", help="Directory of the generated META file"
+    )
+    edit_parser.add_argument(
+        "--in-place",
+        action="store_true",
+        help="Splice the objects into an existing META file instead of rewriting it",
+    )
+    edit_parser.set_defaults(func=edit_command)
+
+    query_parser = sub_parsers.add_parser(
+        "query", help="List the templates matching a query"
+    )
+    query_parser.add_argument(
+        "database", help="peds.ymt.xml, peds.meta or weapons.meta"
+    )
+    query_parser.add_argument(
+        "query", help='e.g. "Pedtype=COP and Age>30" or "WeaponFlags has Gun"'
+    )
+    query_parser.add_argument(
+        "-c", "--count", action="store_true", help="Only print the number of matches"
+    )
+    query_parser.set_defaults(func=query_command)
+
+    search_parser = sub_parsers.add_parser(
+        "search", help="Ranked search of parameter values (typos/ parts of words too)"
+    )
+    search_parser.add_argument(
+        "database", help="peds.ymt.xml, peds.meta or weapons.meta"
+    )
+    search_parser.add_argument(
+        "text", help='Words to find, e.g. "carbine" or "Pedtype:cop male"'
+    )
+    search_parser.add_argument(
+        "-a",
+        "--add",
+        action="append",
+        default=[],
+        metavar="FILE",
+        help="Also search another database (e.g. weapons.meta with peds), can be repeated",
+    )
+    search_parser.add_argument(
+        "-n", "--limit", type=int, default=20, help="Hits to print (default: 20)"
+    )
+    search_parser.add_argument(
+        "--objects",
+        action="store_true",
+        help="Rank templates instead of (template, parameter) hits",
+    )
+    search_parser.set_defaults(func=search_command)
+
+    list_parser = sub_parsers.add_parser("list", help="List the templates of a file")
+    list_parser.add_argument("database", help="peds.ymt.xml, peds.meta or weapons.meta")
+    list_parser.set_defaults(func=list_command)
+
+    for command_parser in (
+        generate_parser,
+        edit_parser,
+        query_parser,
+        search_parser,
+        list_parser,
+    ):
+        command_parser.add_argument(
+            "--no-cache",
+            action="store_true",
+            help="Always parse the database file (skip the parsed database cache)",
+        )
+        command_parser.add_argument(
+            "-m",
+            "--merge",
+            action="append",
+            default=[],
+            metavar="FILE",
+            help="Merge another database file (DLC/addon) on top, can be repeated",
+        )
+        command_parser.add_argument(
+            "--precedence",
+            choices=["last", "first"],
+            default="last",
+            help="Which file wins when merged files share a Name (default: last)",
+        )
+        command_parser.add_argument(
+            "-j",
+            "--jobs",
+            type=int,
+            metavar="N",
+            help="Parse the files with N processes (large files are split, no cache)",
+        )
+        command_parser.add_argument(
+            "--log-level",
+            choices=["DEBUG", "INFO", "WARNING", "ERROR"],
+            default="INFO",
+            help="Lowest level written to program_log.log (default: INFO)",
+        )
+        command_parser.add_argument(
+            "--log-sample",
+            type=int,
+            default=1,
+            metavar="N",
+            help="Keep 1 of every N debug/info records of each log call (default: 1)",
+        )
+        command_parser.add_argument(
+            "--profile",
+            action="store_true",
+            help="Print the time spent in each stage (parse, build, write) to stderr",
+        )
+        command_parser.add_argument(
+            "--profile-memory",
+            action="store_true",
+            help="Same as --profile and also count Python allocations (slower)",
+        )
+
+    return arg_parser
+
+
+def main(argv=None):
+    args = build_arg_parser().parse_args(argv)
+
+    from functions import log_setup
+
+    log_setup.setup_logging(args.log_level, sample_rate=args.log_sample)
+
+    if not (args.profile or args.profile_memory):
+        return args.func(args)
+
+    # Stages run in -j worker processes are not included
+    from functions import instrument
+
+    instrument.enable(allocations=args.profile_memory)
+    try:
+        return args.func(args)
+    finally:
+        print(instrument.format_report(), file=sys.stderr)
+        instrument.disable()
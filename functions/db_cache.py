@@ -0,0 +1,134 @@
+from pathlib import Path
+import hashlib
+import logging
+import pickle
+
+from functions import instrument
+from functions import xml_parse
+from functions.param_index import ParamValueIndex
+
+logger = logging.getLogger(__name__)
+
+# Bump when the layout of the parsed objects changes so old snapshots are ignored
+CACHE_VERSION = 4
+CACHE_DIR = "db_cache"
+
+
+def cached_meta_parser(xml_file, cache_dir=CACHE_DIR):
+    """
+    Same as xml_meta_parser but also returns the parameter database
+    (ParamValueIndex - Used like the attr_db dictionary)
+    A snapshot keyed by path, mtime, size and content hash is kept in cache_dir
+    so loading an unchanged file again skips lxml entirely
+    """
+    cache_key, snapshot = load_cached_db(xml_file, cache_dir)
+
+    if snapshot:
+        return (
+            snapshot["objects"],
+            None,
+            snapshot["object_type"],
+            snapshot["attr_db"],
+        )
+
+    object_list, err_message, object_type = xml_parse.xml_meta_parser(xml_file)
+    if err_message:
+        return None, err_message, None, None
+
+    parameter_db = ParamValueIndex(object_list)
+
+    if cache_key:
+        save_snapshot(cache_key, cache_dir, object_list, object_type, parameter_db)
+
+    return object_list, err_message, object_type, parameter_db
+
+
+def load_cached_db(xml_file, cache_dir=CACHE_DIR):
+    """
+    Return the cache key of a file and its snapshot (None if not cached)
+    The key is needed to save a snapshot after parsing the file
+    """
+    cache_key = file_cache_key(xml_file)
+    if not cache_key:
+        return None, None
+
+    snapshot = load_snapshot(cache_key, cache_dir)
+    if snapshot:
+        logger.info(f"{xml_file} loaded from cache.")
+    return cache_key, snapshot
+
+
+def file_cache_key(xml_file):
+    """
+    Return the (path, mtime, size, sha1) of a file or None if it can't be read
+    """
+    file_path = Path(xml_file)
+    try:
+        file_stat = file_path.stat()
+        with instrument.span("file_read", items=1, bytes=file_stat.st_size):
+            file_hash = hashlib.sha1(file_path.read_bytes()).hexdigest()
+    except OSError:
+        return None
+
+    return (
+        str(file_path.resolve()),
+        file_stat.st_mtime_ns,
+        file_stat.st_size,
+        file_hash,
+    )
+
+
+def snapshot_path(cache_key, cache_dir=CACHE_DIR):
+    """
+    One snapshot file per source path
+    """
+    path_hash = hashlib.sha1(cache_key[0].encode("utf-8")).hexdigest()
+    return Path(cache_dir) / f"{path_hash}.pickle"
+
+
+def load_snapshot(cache_key, cache_dir=CACHE_DIR):
+    """
+    Return the cached snapshot dictionary or None if missing, stale or unreadable
+    """
+    cache_file = snapshot_path(cache_key, cache_dir)
+    if not cache_file.exists():
+        return None
+
+    try:
+        with open(cache_file, "rb") as snapshot_file, instrument.span(
+            "cache_load", items=1, bytes=cache_file.stat().st_size
+        ):
+            snapshot = pickle.load(snapshot_file)
+    except Exception:
+        logger.exception(f"Cache file {cache_file} not readable. Will re-parse.")
+        return None
+
+    if snapshot.get("version") != CACHE_VERSION or snapshot.get("key") != cache_key:
+        logger.info(f"Cache file {cache_file} is stale.")
+        return None
+
+    return snapshot
+
+
+def save_snapshot(cache_key, cache_dir, object_list, object_type, parameter_db):
+    """
+    Write the parsed objects and parameter database to the cache dir
+    A failed write is logged only - The cache is never required for loading
+    """
+    cache_file = snapshot_path(cache_key, cache_dir)
+    snapshot = {
+        "version": CACHE_VERSION,
+        "key": cache_key,
+        "object_type": object_type,
+        "objects": object_list,
+        "attr_db": parameter_db,
+    }
+
+    try:
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        cache_file.write_bytes(pickle.dumps(snapshot, pickle.HIGHEST_PROTOCOL))
+    except Exception:
+        logger.exception(f"Could not write cache file {cache_file}.")
+        return
+
+    logger.info(f"Cache file {cache_file} written.")
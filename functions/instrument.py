@@ -0,0 +1,227 @@
+"""
+Opt-in timing spans and counters for the parse/ generate/ write hot paths
+Off by default - A disabled span() only costs a function call
+enable() -> run something -> report()/ format_report() -> disable()
+"""
+
+import threading
+import time
+
+enabled = False
+track_allocations = False
+# True if enable() started tracemalloc - Tracing started by someone else is left on
+started_tracemalloc = False
+
+# Stage name -> StageStats
+stage_stats = {}
+stats_lock = threading.Lock()
+
+
+class StageStats:
+    """
+    Totals of every span of one stage
+    """
+
+    __slots__ = ("calls", "seconds", "items", "bytes", "alloc_bytes")
+
+    def __init__(self):
+        self.calls = 0
+        self.seconds = 0.0
+        self.items = 0
+        self.bytes = 0
+        self.alloc_bytes = 0
+
+
+class Span:
+    """
+    Times a with block - items/ bytes can be set inside the block
+    Spans nest, the time of a stage includes the stages inside it
+    """
+
+    __slots__ = ("stage", "items", "bytes", "start_time", "start_alloc")
+
+    def __init__(self, stage, items=0, bytes=0):
+        self.stage = stage
+        self.items = items
+        self.bytes = bytes
+
+    def __enter__(self):
+        self.start_alloc = traced_bytes()
+        self.start_time = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        seconds = time.perf_counter() - self.start_time
+        record(
+            self.stage,
+            seconds,
+            self.items,
+            self.bytes,
+            traced_bytes() - self.start_alloc,
+        )
+        return False
+
+
+class NullSpan:
+    """
+    Span used while instrumentation is off
+    """
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    # Setting items/ bytes on a disabled span does nothing
+    def __setattr__(self, name, value):
+        pass
+
+
+NULL_SPAN = NullSpan()
+
+
+def span(stage, items=0, bytes=0):
+    """
+    with instrument.span("lxml_parse", bytes=file_size): ...
+    """
+    if not enabled:
+        return NULL_SPAN
+    return Span(stage, items, bytes)
+
+
+def count(stage, items=1, bytes=0):
+    """
+    Add items/ bytes to a stage without timing anything
+    """
+    if enabled:
+        record(stage, 0.0, items, bytes, 0, calls=0)
+
+
+def timed_iter(stage, iterable):
+    """
+    Yield from iterable, timing only the time spent producing each item
+    Used for lxml iterparse where parsing happens while the loop runs
+    """
+    iterator = iter(iterable)
+    while True:
+        with span(stage):
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+        yield item
+
+
+def record(stage, seconds, items, bytes, alloc_bytes, calls=1):
+    with stats_lock:
+        stats = stage_stats.get(stage)
+        if stats is None:
+            stats = stage_stats[stage] = StageStats()
+        stats.calls += calls
+        stats.seconds += seconds
+        stats.items += items
+        stats.bytes += bytes
+        stats.alloc_bytes += alloc_bytes
+
+
+def traced_bytes():
+    if track_allocations:
+        import tracemalloc
+
+        return tracemalloc.get_traced_memory()[0]
+    return 0
+
+
+def enable(allocations=False):
+    """
+    Start recording. allocations=True also tracks Python allocations (tracemalloc)
+    which makes everything a few times slower
+    """
+    # tracemalloc is only imported when used - Keeps app startup fast
+    import tracemalloc
+
+    global enabled, track_allocations, started_tracemalloc
+
+    if allocations and not tracemalloc.is_tracing():
+        tracemalloc.start()
+        started_tracemalloc = True
+    elif not allocations and started_tracemalloc:
+        tracemalloc.stop()
+        started_tracemalloc = False
+    track_allocations = allocations
+    enabled = True
+
+
+def disable():
+    """
+    Stop recording. tracemalloc is only stopped if enable() started it
+    """
+    global enabled, track_allocations, started_tracemalloc
+
+    if started_tracemalloc:
+        import tracemalloc
+
+        tracemalloc.stop()
+        started_tracemalloc = False
+    track_allocations = False
+    enabled = False
+
+
+def reset():
+    with stats_lock:
+        stage_stats.clear()
+
+
+def report():
+    """
+    Stage -> calls, seconds, items, items/s, bytes, bytes/s, net allocated KiB
+    """
+    stage_report = {}
+    with stats_lock:
+        for stage, stats in stage_stats.items():
+            stage_report[stage] = {
+                "calls": stats.calls,
+                "seconds": stats.seconds,
+                "items": stats.items,
+                "items_per_s": stats.items / stats.seconds if stats.seconds else None,
+                "bytes": stats.bytes,
+                "bytes_per_s": stats.bytes / stats.seconds if stats.seconds else None,
+                "alloc_kib": stats.alloc_bytes // 1024 if track_allocations else None,
+            }
+    return stage_report
+
+
+def format_report(stage_report=None):
+    """
+    report() as a text table, slowest stage first
+    """
+    if stage_report is None:
+        stage_report = report()
+    if not stage_report:
+        return "No timings recorded."
+
+    report_lines = [
+        f"{'Stage':<20} {'Calls':>8} {'Time (ms)':>11} {'Items':>9} "
+        f"{'Items/s':>11} {'MiB/s':>9} {'Alloc KiB':>10}"
+    ]
+    for stage, stats in sorted(
+        stage_report.items(), key=lambda item: -item[1]["seconds"]
+    ):
+        items_per_s = stats["items_per_s"]
+        mib_per_s = stats["bytes_per_s"] / (1 << 20) if stats["bytes"] else None
+        report_lines.append(
+            f"{stage:<20} {stats['calls']:>8} {stats['seconds'] * 1000:>11.2f} "
+            f"{stats['items']:>9} "
+            f"{format_rate(items_per_s if stats['items'] else None):>11} "
+            f"{format_rate(mib_per_s):>9} "
+            f"{'-' if stats['alloc_kib'] is None else stats['alloc_kib']:>10}"
+        )
+
+    return "\n".join(report_lines)
+
+
+def format_rate(rate):
+    return "-" if rate is None else f"{rate:.1f}"
@@ -0,0 +1,89 @@
+"""
+Application logging - Set up once by the entry point (GUI, command line)
+Records are put on a queue and written to the log file by a listener thread
+so logging never waits on disk I/O. Library modules only create loggers
+"""
+
+from logging.handlers import QueueHandler, QueueListener
+import atexit
+import logging
+import queue
+
+LOG_FILE = "program_log.log"
+LOG_FORMAT = "%(asctime)s: %(name)s - %(levelname)s - %(message)s"
+
+# Running QueueListener and the handler it was set up with
+listener = None
+queue_handler = None
+
+
+class SampleFilter(logging.Filter):
+
+    """
+    Keep only the first of every sample_rate records of each log call
+    Warnings and errors are always kept
+    """
+
+    def __init__(self, sample_rate):
+        super().__init__()
+        self.sample_rate = sample_rate
+        # (file, line) of the log call -> records seen
+        self.call_counts = {}
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+
+        call_site = (record.pathname, record.lineno)
+        seen = self.call_counts.get(call_site, 0)
+        self.call_counts[call_site] = seen + 1
+        return seen % self.sample_rate == 0
+
+
+def setup_logging(level=logging.INFO, log_file=LOG_FILE, sample_rate=1):
+    """
+    Send the records of all loggers through a queue to log_file
+    sample_rate -> keep 1 of every sample_rate debug/ info records per log call
+    Only the first call sets up logging, later calls return the running listener
+    """
+    global listener, queue_handler
+
+    if listener:
+        return listener
+
+    file_handler = logging.FileHandler(log_file, encoding="utf-8", delay=True)
+    file_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = QueueHandler(log_queue)
+    if sample_rate > 1:
+        queue_handler.addFilter(SampleFilter(sample_rate))
+
+    root_logger = logging.getLogger()
+    root_logger.setLevel(level)
+    root_logger.addHandler(queue_handler)
+
+    listener = QueueListener(log_queue, file_handler)
+    listener.start()
+    # Write the records still in the queue before the program ends
+    atexit.register(stop_logging)
+
+    return listener
+
+
+def stop_logging():
+    """
+    Flush the queue, stop the listener thread and close the log file
+    """
+    global listener, queue_handler
+
+    if not listener:
+        return
+
+    logging.getLogger().removeHandler(queue_handler)
+    listener.stop()
+    for handler in listener.handlers:
+        handler.close()
+
+    listener = None
+    queue_handler = None
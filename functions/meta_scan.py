@@ -0,0 +1,136 @@
+"""
+Byte level tag scanner for META/XML files
+Finds element boundaries without building an lxml tree so large files can be
+split for parallel parsing or patched in place
+"""
+
+from functools import lru_cache
+import re
+
+# Start tag of an object Item - Ped objects always start with their Name param
+OBJECT_START_PATTERNS = {
+    "ped": re.compile(rb"<Item>\s*<Name>"),
+    "weap": re.compile(rb'<Item\b[^>]*type="CWeaponInfo"'),
+}
+
+# Bytes read at a time by next_object_start, windows overlap by SCAN_OVERLAP
+SCAN_WINDOW = 1 << 16
+SCAN_OVERLAP = 1 << 10
+
+
+@lru_cache(maxsize=None)
+def tag_pattern(tags):
+    """
+    Regex matching comments and the start, end and empty tags of the given tags
+    Groups -> "/" of end tags, tag name, attributes, "/" of empty tags
+    """
+    tag_names = b"|".join(re.escape(tag.encode("utf-8")) for tag in tags)
+    return re.compile(
+        rb"<!--.*?-->|<(/?)(" + tag_names + rb")\b([^>]*?)(/?)>", re.DOTALL
+    )
+
+
+def iter_tags(data, tags, start=0, end=None):
+    """
+    Yield (kind, tag, start offset, end offset, attributes) of the given tags
+    kind -> "start", "end" or "empty". Tags inside comments are skipped
+    """
+    if end is None:
+        end = len(data)
+
+    for tag_match in tag_pattern(tuple(tags)).finditer(data, start, end):
+        if tag_match.group(2) is None:
+            # Comment
+            continue
+
+        if tag_match.group(1):
+            kind = "end"
+        elif tag_match.group(4):
+            kind = "empty"
+        else:
+            kind = "start"
+
+        yield (
+            kind,
+            tag_match.group(2).decode("utf-8"),
+            tag_match.start(),
+            tag_match.end(),
+            tag_match.group(3),
+        )
+
+
+def find_element(data, tag, start=0):
+    """
+    (start offset, end offset) of the first tag element after start
+    Nested elements with the same tag are skipped. None if not found
+    """
+    depth = 0
+    element_start = None
+
+    for kind, _, tag_start, tag_end, _ in iter_tags(data, (tag,), start):
+        if kind == "empty" and depth == 0:
+            return tag_start, tag_end
+        elif kind == "start":
+            if depth == 0:
+                element_start = tag_start
+            depth += 1
+        elif kind == "end" and depth:
+            depth -= 1
+            if depth == 0:
+                return element_start, tag_end
+
+    return None
+
+
+def object_spans(data, obj_type, in_init_datas=False):
+    """
+    (start offset, end offset) of every object Item of a META/XML file
+    Peds -> Items directly in InitDatas, Weapons -> Items with type="CWeaponInfo"
+    in_init_datas -> data starts inside the InitDatas list (a chunk cut at a ped Item)
+    """
+    spans = []
+    # Open Items -> (start offset, is an object)
+    open_items = []
+
+    for kind, tag, tag_start, tag_end, attributes in iter_tags(
+        data, ("Item", "InitDatas")
+    ):
+        if tag == "InitDatas":
+            in_init_datas = kind == "start"
+            continue
+
+        if obj_type == "ped":
+            is_object = in_init_datas and not open_items
+        else:
+            is_object = b'type="CWeaponInfo"' in attributes
+
+        if kind == "empty":
+            if is_object:
+                spans.append((tag_start, tag_end))
+        elif kind == "start":
+            open_items.append((tag_start, is_object))
+        elif open_items:
+            item_start, item_is_object = open_items.pop()
+            if item_is_object:
+                spans.append((item_start, tag_end))
+
+    return spans
+
+
+def next_object_start(meta_file, offset, obj_type):
+    """
+    Offset of the first object Item starting at or after offset. None if there is none
+    Reads from offset SCAN_WINDOW bytes at a time and stops at the first object found
+    """
+    object_start = OBJECT_START_PATTERNS[obj_type]
+
+    while True:
+        meta_file.seek(offset)
+        data = meta_file.read(SCAN_WINDOW)
+        start_match = object_start.search(data)
+        if start_match:
+            return offset + start_match.start()
+        if len(data) < SCAN_WINDOW:
+            return None
+        # Overlap so a start tag cut by the window is still found
+        offset += SCAN_WINDOW - SCAN_OVERLAP
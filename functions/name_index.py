@@ -0,0 +1,95 @@
+from bisect import bisect_left, insort
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Sorts after any character a name can have - End of a prefix range
+LAST_CHARACTER = "\U0010ffff"
+
+# Batches smaller than this part of the names are inserted one at a time
+INSORT_FRACTION = 0.05
+
+
+class NameIndex:
+
+    """
+    Case insensitive Name -> object index used for template lookup
+    Exact lookup is a dictionary lookup, prefix search uses a sorted name list
+    Later objects with the same name replace earlier ones
+    """
+
+    def __init__(self, object_list=()):
+        self.objects = {}
+        self.sorted_names = []
+        self.add_objects(object_list)
+
+    def __len__(self):
+        return len(self.objects)
+
+    def __contains__(self, name):
+        return name.upper() in self.objects
+
+    def add_objects(self, object_list):
+        new_names = []
+        for gta_object in object_list:
+            name = gta_object.Name.upper()
+            if name not in self.objects:
+                new_names.append(name)
+            self.objects[name] = gta_object
+
+        if len(new_names) <= len(self.sorted_names) * INSORT_FRACTION:
+            for name in new_names:
+                insort(self.sorted_names, name)
+        else:
+            # Two sorted runs - sort() merges them in one linear pass
+            new_names.sort()
+            self.sorted_names.extend(new_names)
+            self.sorted_names.sort()
+
+        logger.info(f"Name index has {len(self.objects)} names")
+
+    def remove_names(self, names):
+        for name in names:
+            name = name.upper()
+            if self.objects.pop(name, None) is not None:
+                del self.sorted_names[bisect_left(self.sorted_names, name)]
+
+    def prefix_range(self, prefix):
+        """
+        (start, end) of the sorted names starting with prefix
+        """
+        prefix = prefix.upper()
+        start = bisect_left(self.sorted_names, prefix)
+        end = bisect_left(self.sorted_names, prefix + LAST_CHARACTER, start)
+        return start, end
+
+    def get(self, name, default=None):
+        return self.objects.get(name.upper(), default)
+
+    def prefix_search(self, prefix, limit=None):
+        """
+        Objects whose name starts with prefix, sorted by name
+        """
+        start, end = self.prefix_range(prefix)
+        if limit is not None:
+            end = min(end, start + limit)
+
+        sorted_names = self.sorted_names
+        return [self.objects[sorted_names[index]] for index in range(start, end)]
+
+    def search(self, text, limit=None):
+        """
+        Objects whose name contains text, prefix matches first
+        """
+        text = text.upper()
+        matches = self.prefix_search(text, limit)
+        if limit is not None and len(matches) >= limit:
+            return matches
+
+        for name in self.sorted_names:
+            if text in name and not name.startswith(text):
+                matches.append(self.objects[name])
+                if len(matches) == limit:
+                    break
+
+        return matches
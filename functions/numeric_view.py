@@ -0,0 +1,348 @@
+"""
+Vectorized view of the numeric parameters of many objects (needs numpy)
+Every numeric attribute (Damage value="...", AimOffsetMin x/y/z, Fx chances, etc.)
+becomes a typed column with one row per object. Objects without the value are masked
+Range filters, statistics and bulk changes are array operations - Changed values are
+written back to the objects with write_back(), in the number format they had
+"""
+
+import copy
+import math
+
+import numpy as np
+
+from functions.xml_parse import ParamNode
+
+# Attribute of single value params - Not added to the column name
+VALUE_ATTRIB = "value"
+
+# Decimals of values written without decimals (int columns)
+INT_DECIMALS = -1
+# Decimals of nan/inf - Written as the shortest text of the float
+SHORTEST_DECIMALS = -2
+# Decimals of exponent values (1e-05, 1.5E3) - EXPONENT_DECIMALS - mantissa decimals
+EXPONENT_DECIMALS = -3
+
+
+class MaskedColumns:
+
+    """
+    Named numeric columns with a missing value mask - Base of the views below
+    Int columns (all values written without decimals) are int64, others float64
+    """
+
+    def __init__(self, row_count):
+        self.row_count = row_count
+        # Column name -> numpy masked array, mask is True where the value is missing
+        self.columns = {}
+        # Column name -> decimals each value is written with (see parse_number)
+        self.decimals = {}
+        # Column name -> values at load/ last write_back, to find changed values
+        self.saved = {}
+
+    def __len__(self):
+        return self.row_count
+
+    def __contains__(self, name):
+        return name in self.columns
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    def __setitem__(self, name, values):
+        self.set_values(name, values)
+
+    def set_values(self, name, values, rows=slice(None)):
+        """
+        Set the values of a column or of some rows (index or bool array)
+        Missing values stay missing, masked new values keep the old value
+        Float values are rounded for int columns
+        """
+        column = self.columns[name]
+        keep = np.ma.getmaskarray(column)[rows] | np.ma.getmaskarray(values)
+        values = np.ma.getdata(values)
+        if column.dtype.kind == "i":
+            values = np.rint(values)
+        column.data[rows] = np.where(keep, column.data[rows], values)
+
+    def names(self):
+        return list(self.columns)
+
+    def add_columns(self, column_cells):
+        """
+        Build the arrays - column_cells -> column name -> (rows, numbers, decimals)
+        """
+        for name, (rows, numbers, decimals) in column_cells.items():
+            is_int = all(cell_decimals == INT_DECIMALS for cell_decimals in decimals)
+            data = np.zeros(self.row_count, dtype=np.int64 if is_int else np.float64)
+            data[rows] = numbers
+            mask = np.ones(self.row_count, dtype=bool)
+            mask[rows] = False
+
+            self.columns[name] = np.ma.MaskedArray(data, mask)
+            self.decimals[name] = np.full(self.row_count, INT_DECIMALS, dtype=np.int8)
+            self.decimals[name][rows] = decimals
+            self.saved[name] = data.copy()
+
+    def where(self, name, low=None, high=None):
+        """
+        Bool array of the rows with low <= value <= high - Missing values never match
+        """
+        column = self.columns[name]
+        row_mask = ~np.ma.getmaskarray(column)
+        if low is not None:
+            row_mask &= column.data >= low
+        if high is not None:
+            row_mask &= column.data <= high
+        return row_mask
+
+    def stats(self, name):
+        """
+        Count, min, max, mean and standard deviation of the values of a column
+        """
+        column = self.columns[name]
+        count = int(column.count())
+        if not count:
+            return {"count": 0, "min": None, "max": None, "mean": None, "std": None}
+
+        return {
+            "count": count,
+            "min": column.min().item(),
+            "max": column.max().item(),
+            "mean": float(column.mean()),
+            "std": float(column.std()),
+        }
+
+    def changed_cells(self):
+        """
+        Yield (column name, row, text) of every value changed since load/ last write_back
+        """
+        for name, column in self.columns.items():
+            changed = column.data != self.saved[name]
+            if column.dtype.kind == "f":
+                # nan != nan - Unchanged nan values are not written
+                changed &= ~(np.isnan(column.data) & np.isnan(self.saved[name]))
+            changed &= ~np.ma.getmaskarray(column)
+            for row in np.flatnonzero(changed):
+                yield name, int(row), format_number(
+                    column.data[row], self.decimals[name][row]
+                )
+            self.saved[name] = column.data.copy()
+
+
+class NumericView(MaskedColumns):
+
+    """
+    Numeric columns of an object list - One row per object, in object list order
+    Column names: Damage, AimOffsetMin.x, Fx.TracerFxChanceMP, FlashFxLightRGBAMin.x etc.
+    OverrideForces have their own view (forces) with one row per force item
+    """
+
+    def __init__(self, object_list, params=None):
+        """
+        params -> Only build the columns of these params (e.g. ["Damage", "Fx"])
+        """
+        self.objects = list(object_list)
+        super().__init__(len(self.objects))
+
+        # Column name -> (param, child tag or None, attribute)
+        self.cells = {}
+        column_cells = {}
+        for row, gta_object in enumerate(self.objects):
+            for cell, text in numeric_cells(gta_object, params):
+                number = parse_number(text)
+                if number is None:
+                    continue
+
+                name = column_name(*cell)
+                self.cells[name] = cell
+                rows, numbers, decimals = column_cells.setdefault(name, ([], [], []))
+                rows.append(row)
+                numbers.append(number[0])
+                decimals.append(number[1])
+
+        self.add_columns(column_cells)
+        if params is None or "OverrideForces" in params:
+            self.forces = ForceView(self.objects)
+        else:
+            self.forces = ForceView([])
+
+    def select(self, row_mask):
+        """
+        Objects of the rows of a bool array (e.g. view.where("Damage", 50))
+        """
+        return [self.objects[row] for row in np.flatnonzero(row_mask)]
+
+    def write_back(self):
+        """
+        Write changed values to the objects (and their OverrideForces)
+        Returns the number of changed values
+        """
+        # (row, param) -> new param value, built once per changed object/ param
+        new_values = {}
+        changed_count = 0
+
+        for name, row, text in self.changed_cells():
+            param, child_tag, attrib = self.cells[name]
+            key = (row, param)
+            if key not in new_values:
+                new_values[key] = copy_param(getattr(self.objects[row], param))
+
+            param_value = new_values[key]
+            if child_tag is None:
+                param_value[attrib] = text
+            else:
+                for child_num, child in enumerate(param_value):
+                    if child.tag == child_tag:
+                        param_value[child_num] = child._replace(
+                            attrs=replace_attrib(child.attrs, attrib, text)
+                        )
+            changed_count += 1
+
+        for (row, param), param_value in new_values.items():
+            if isinstance(param_value, list):
+                param_value = tuple(param_value)
+            setattr(self.objects[row], param, param_value)
+
+        return changed_count + self.forces.write_back()
+
+
+class ForceView(MaskedColumns):
+
+    """
+    OverrideForces items of an object list - One row per force item
+    owners -> row of the object (NumericView row) each item belongs to
+    bone_tags -> BoneTag of each item. Columns: ForceFront, ForceBack
+    """
+
+    def __init__(self, object_list):
+        self.objects = object_list
+        owners = []
+        bone_tags = []
+        # Row of each item in the OverrideForces list of its object
+        self.item_numbers = []
+
+        column_cells = {}
+        for row, gta_object in enumerate(object_list):
+            for item_number, force in enumerate(
+                getattr(gta_object, "OverrideForces", None) or ()
+            ):
+                item_row = len(owners)
+                owners.append(row)
+                self.item_numbers.append(item_number)
+                bone_tags.append(None)
+
+                for item_param in force["Item"]:
+                    for tag, value in item_param.items():
+                        if tag == "BoneTag":
+                            bone_tags[item_row] = value
+                            continue
+                        number = parse_number(value.get(VALUE_ATTRIB))
+                        if number is None:
+                            continue
+                        rows, numbers, decimals = column_cells.setdefault(
+                            tag, ([], [], [])
+                        )
+                        rows.append(item_row)
+                        numbers.append(number[0])
+                        decimals.append(number[1])
+
+        super().__init__(len(owners))
+        self.owners = np.array(owners, dtype=np.int64)
+        self.bone_tags = np.array(bone_tags, dtype=object)
+        self.add_columns(column_cells)
+
+    def write_back(self):
+        # Object row -> copy of its OverrideForces list
+        new_forces = {}
+        changed_count = 0
+
+        for tag, item_row, text in self.changed_cells():
+            row = int(self.owners[item_row])
+            if row not in new_forces:
+                new_forces[row] = copy.deepcopy(self.objects[row].OverrideForces)
+
+            force = new_forces[row][self.item_numbers[item_row]]
+            for item_param in force["Item"]:
+                if tag in item_param:
+                    item_param[tag] = {**item_param[tag], VALUE_ATTRIB: text}
+            changed_count += 1
+
+        for row, forces in new_forces.items():
+            self.objects[row].OverrideForces = forces
+
+        return changed_count
+
+
+def numeric_cells(gta_object, params=None):
+    """
+    ((param, child tag, attribute), text) of every attribute value of an object
+    Attribute only params and named children (Fx, Explosion) - Not list items
+    """
+    att_dict = gta_object.return_att_dict()
+    if params is not None:
+        att_dict = {param: att_dict.get(param) for param in params}
+
+    for param, value in att_dict.items():
+        if isinstance(value, dict):
+            for attrib, text in value.items():
+                yield (param, None, attrib), text
+        elif isinstance(value, tuple):
+            for child in value:
+                if isinstance(child, ParamNode) and child.tag != "Item":
+                    for attrib, text in child.attrs:
+                        yield (param, child.tag, attrib), text
+
+
+def column_name(param, child_tag, attrib):
+    name = param if child_tag is None else f"{param}.{child_tag}"
+    return name if attrib == VALUE_ATTRIB else f"{name}.{attrib}"
+
+
+def parse_number(text):
+    """
+    (number, decimals) of a META number. None if not a number
+    decimals -> INT_DECIMALS for ints, SHORTEST_DECIMALS for nan/inf,
+    EXPONENT_DECIMALS - mantissa decimals for exponents, else decimals after the point
+    """
+    if not text:
+        return None
+    try:
+        number = float(text)
+    except ValueError:
+        return None
+
+    if not math.isfinite(number):
+        return number, SHORTEST_DECIMALS
+
+    exponent = max(text.find("e"), text.find("E"))
+    mantissa = text[:exponent] if exponent >= 0 else text
+    point = mantissa.find(".")
+    mantissa_decimals = len(mantissa) - point - 1 if point >= 0 else 0
+
+    if exponent >= 0:
+        return number, EXPONENT_DECIMALS - mantissa_decimals
+    if point < 0:
+        return number, INT_DECIMALS
+    return number, mantissa_decimals
+
+
+def format_number(number, decimals):
+    if decimals == INT_DECIMALS:
+        return str(int(round(number)))
+    elif decimals == SHORTEST_DECIMALS or not math.isfinite(number):
+        return repr(float(number))
+    elif decimals <= EXPONENT_DECIMALS:
+        return f"{number:.{EXPONENT_DECIMALS - decimals}e}"
+    return f"{number:.{decimals}f}"
+
+
+def copy_param(value):
+    # Dicts are changed in place, node tuples as lists
+    if isinstance(value, dict):
+        return dict(value)
+    return list(value)
+
+
+def replace_attrib(attrs, attrib, text):
+    return tuple((name, text if name == attrib else value) for name, value in attrs)
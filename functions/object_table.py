@@ -0,0 +1,271 @@
+from array import array
+from collections import Counter
+import copy
+import logging
+import sys
+
+from functions import instrument
+from functions import xml_parse
+from functions.param_index import ParamValueIndex, param_values
+from functions.xml_parse import GTAObjects
+
+logger = logging.getLogger(__name__)
+
+# Value code 0 in every column means the row does not have that parameter
+MISSING = object()
+
+# Smallest array type that can hold the codes of a column
+CODE_TYPES = (("B", 0xFF), ("H", 0xFFFF), ("I", 0xFFFFFFFF))
+
+
+class ObjectTable:
+
+    """
+    Columnar storage for parsed objects of one object type (Peds, Weapons, etc.)
+    Every parameter is a column of small int codes into a list of unique values
+    Rows are handed out as ObjectRow views that act like GTAObjects
+    """
+
+    def __init__(self, object_type=None):
+        self.object_type = object_type
+
+        # Parameter -> array of value codes (one per row)
+        self.columns = {}
+        # Parameter -> list of unique values, index is the value code
+        self.column_values = {}
+        # Parameter -> {value key: value code}
+        self.column_codes = {}
+
+        # Parameter order of each row - Most rows share the same shape
+        self.shapes = []
+        self.shape_codes = {}
+        self.row_shapes = array("I")
+
+    def __len__(self):
+        return len(self.row_shapes)
+
+    def __getitem__(self, row):
+        if row < 0:
+            row += len(self)
+        if not 0 <= row < len(self):
+            raise IndexError("ObjectTable row out of range")
+        return ObjectRow(self, row)
+
+    def __iter__(self):
+        for row in range(len(self)):
+            yield ObjectRow(self, row)
+
+    def append(self, param_dict):
+        """
+        Add a row from a parameter dictionary (GTAObjects.return_att_dict())
+        Returns the ObjectRow view of the new row
+        """
+        row = len(self)
+        self.row_shapes.append(self.shape_code(tuple(param_dict)))
+
+        for param in self.columns:
+            code = (
+                self.value_code(param, param_dict[param]) if param in param_dict else 0
+            )
+            self.columns[param].append(code)
+
+        for param, value in param_dict.items():
+            if param not in self.columns:
+                self.add_column(param)
+                self.columns[param][row] = self.value_code(param, value)
+
+        return ObjectRow(self, row)
+
+    def extend(self, gta_objects):
+        """
+        Add rows from any iterable of GTAObjects (works with the streaming parser)
+        """
+        for gta_object in gta_objects:
+            self.append(gta_object.return_att_dict())
+
+    def add_column(self, param):
+        # New parameter - Rows added before it don't have it
+        self.columns[param] = array("B", bytes(len(self)))
+        self.column_values[param] = [MISSING]
+        self.column_codes[param] = {}
+
+    def shape_code(self, shape):
+        if shape not in self.shape_codes:
+            self.shape_codes[shape] = len(self.shapes)
+            self.shapes.append(shape)
+        return self.shape_codes[shape]
+
+    def value_code(self, param, value):
+        """
+        Return the code of a value in a column, adding the value if it is new
+        """
+        value_key = column_value_key(value)
+        column_codes = self.column_codes[param]
+
+        if value_key is not None and value_key in column_codes:
+            return column_codes[value_key]
+
+        column_values = self.column_values[param]
+        code = len(column_values)
+        if isinstance(value, str):
+            value = sys.intern(value)
+        elif isinstance(value, dict):
+            # Shared by every row with this code - Never handed out (see row_value)
+            value = dict(value)
+        column_values.append(value)
+
+        # Unhashable values (lists) are never shared between rows
+        if value_key is not None:
+            column_codes[value_key] = code
+
+        self.widen_column(param, code)
+        return code
+
+    def widen_column(self, param, code):
+        # Switch to a bigger array type once the codes don't fit anymore
+        column = self.columns[param]
+        for typecode, max_code in CODE_TYPES:
+            if code <= max_code:
+                break
+        if column.itemsize < array(typecode).itemsize:
+            self.columns[param] = array(typecode, column)
+
+    def get_value(self, row, param):
+        value = self.column_values[param][self.columns[param][row]]
+        if value is MISSING:
+            raise AttributeError(param)
+        return row_value(value)
+
+    def set_value(self, row, param, value):
+        shape = self.shapes[self.row_shapes[row]]
+        if param not in shape:
+            self.row_shapes[row] = self.shape_code(shape + (param,))
+        if param not in self.columns:
+            self.add_column(param)
+        self.columns[param][row] = self.value_code(param, value)
+
+    def row_dict(self, row):
+        """
+        Parameter dictionary of a row, same order as the source element
+        """
+        return {
+            param: row_value(self.column_values[param][self.columns[param][row]])
+            for param in self.shapes[self.row_shapes[row]]
+        }
+
+    def attr_db(self):
+        """
+        ParamValueIndex of the table, same counts as ParamValueIndex(object_list)
+        Each unique value of a column is only visited once, counted for all its rows
+        """
+        param_index = ParamValueIndex()
+        param_index.object_count = len(self)
+
+        with instrument.span("attr_db", items=len(self)):
+            for param, column in self.columns.items():
+                column_values = self.column_values[param]
+                # Codes in order of first use - Ties of most used values match too
+                for code, row_count in Counter(column).items():
+                    value = column_values[code]
+                    if value is MISSING:
+                        continue
+                    for option in param_values(param, value):
+                        param_index.add_value(param, option, row_count)
+
+        logger.info("Parameter database populated from object table")
+        return param_index
+
+
+class ObjectRow:
+
+    """
+    Lightweight view of one ObjectTable row
+    Has the same interface as GTAObjects - Attribute access, return_att_dict, update_attr
+    """
+
+    __slots__ = ("_table", "_row")
+
+    def __init__(self, table, row):
+        object.__setattr__(self, "_table", table)
+        object.__setattr__(self, "_row", row)
+
+    def __getattr__(self, name):
+        try:
+            return self._table.get_value(self._row, name)
+        except KeyError:
+            raise AttributeError(name) from None
+
+    def __setattr__(self, name, value):
+        self._table.set_value(self._row, name, value)
+
+    def __eq__(self, other):
+        if not isinstance(other, ObjectRow):
+            return NotImplemented
+        return self._table is other._table and self._row == other._row
+
+    def __hash__(self):
+        return hash((id(self._table), self._row))
+
+    def __deepcopy__(self, memo):
+        # A copy is detached from the table
+        return GTAObjects(copy.deepcopy(self.return_att_dict(), memo))
+
+    def __reduce__(self):
+        return GTAObjects, (self.return_att_dict(),)
+
+    def return_att_dict(self):
+        return self._table.row_dict(self._row)
+
+    def display_attributes(self):
+        # Internal use only - debugging purposes
+        for counter, (attr, val) in enumerate(self.return_att_dict().items(), 1):
+            print(f"{counter}. Attribute: {attr} | Value: {val}")
+
+    peek_attr = GTAObjects.peek_attr
+    update_attr = GTAObjects.update_attr
+    __repr__ = GTAObjects.__repr__
+
+
+def row_value(value):
+    """
+    Value of a row - Attribute dicts are shared by rows, so each read gets a copy
+    Changing it in place doesn't change the table, set the param instead
+    """
+    if isinstance(value, dict):
+        return dict(value)
+    return value
+
+
+def column_value_key(value):
+    """
+    Key used to share identical values in a column. None if the value can't be shared
+    """
+    if isinstance(value, dict):
+        value_key = ("dict", tuple(value.items()))
+    else:
+        # Tag the value so None (empty tag) still gets a key
+        value_key = ("value", value)
+
+    try:
+        hash(value_key)
+    except TypeError:
+        return None
+    return value_key
+
+
+def load_object_table(xml_file):
+    """
+    Parse a META/XML file straight into an ObjectTable with the streaming parser
+    Returns the table, error message and object type like xml_meta_parser
+    """
+    object_stream, err_message, object_type = xml_parse.xml_meta_parser(
+        xml_file, stream=True
+    )
+    if err_message:
+        return None, err_message, None
+
+    object_table = ObjectTable(object_type)
+    object_table.extend(object_stream)
+
+    logger.info(f"{len(object_table)} objects loaded into object table from {xml_file}")
+    return object_table, err_message, object_type
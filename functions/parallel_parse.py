@@ -0,0 +1,212 @@
+"""
+Process pool parser for many (or very large) META/XML files
+Large files are split at object Item boundaries (see meta_scan) so one file
+can also be parsed by several processes
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+import logging
+import os
+
+from lxml import etree as LET
+
+from functions import instrument
+from functions import meta_scan
+from functions import xml_parse
+
+logger = logging.getLogger(__name__)
+
+# Files bigger than this are split into chunks of about this size
+CHUNK_BYTES = 1 << 20
+
+# Object type -> (root tag, list tag) wrapped around a chunk of object Items
+CHUNK_WRAPPERS = {
+    "ped": ("CPedModelInfo__InitDataList", "InitDatas"),
+    "weap": ("CWeaponInfoBlob", "Infos"),
+}
+
+
+def parallel_meta_parser(xml_files, max_workers=None, chunk_bytes=CHUNK_BYTES):
+    """
+    Parse files in worker processes
+    Returns a list of (object list, error message, object type) in xml_files order
+    Objects are in file order, the same as xml_meta_parser returns
+    Parses in this process when a pool can't be faster (one CPU/ worker or one task)
+    """
+    # Parsing is CPU bound - More workers than CPUs only adds overhead
+    cpu_count = os.cpu_count() or 1
+    max_workers = min(max_workers or cpu_count, cpu_count)
+    if max_workers <= 1:
+        return serial_meta_parser(xml_files)
+
+    file_plans = [plan_file(xml_file, chunk_bytes) for xml_file in xml_files]
+
+    # One task per chunk of every file that could be read
+    tasks = []
+    for xml_file, (err_message, object_type, chunks) in zip(xml_files, file_plans):
+        if not err_message:
+            tasks.extend((xml_file, object_type, chunk) for chunk in chunks)
+
+    if len(tasks) <= 1:
+        return serial_meta_parser(xml_files)
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        chunk_results = executor.map(parse_chunk, tasks)
+
+        parsed_files = []
+        for xml_file, (err_message, object_type, chunks) in zip(xml_files, file_plans):
+            if err_message:
+                parsed_files.append((None, err_message, None))
+                continue
+
+            object_list = []
+            for _ in chunks:
+                chunk_records, chunk_error = next(chunk_results)
+                if chunk_error:
+                    err_message = chunk_error
+                else:
+                    object_list.extend(record_objects(chunk_records))
+
+            if err_message:
+                parsed_files.append((None, err_message, None))
+            else:
+                logger.info(f"{len(object_list)} objects parsed from {xml_file}.")
+                parsed_files.append((object_list, None, object_type))
+
+    return parsed_files
+
+
+def serial_meta_parser(xml_files):
+    """
+    Same results as parallel_meta_parser from this process - Nothing is pickled
+    """
+    return [xml_parse.xml_meta_parser(xml_file) for xml_file in xml_files]
+
+
+def plan_file(xml_file, chunk_bytes=CHUNK_BYTES):
+    """
+    Return (error message, object type, chunks) of a file
+    chunks -> [None] to parse the whole file or (start offset, end offset) byte ranges
+    Ranges are cut at object Items found near every chunk_bytes (meta_scan.next_object_start)
+    """
+    try:
+        root_tag = xml_parse.meta_root_tag(xml_file)
+        file_size = os.path.getsize(xml_file)
+    except FileNotFoundError:
+        logger.exception("File not found")
+        return "FILE NOT FOUND", None, None
+    except LET.XMLSyntaxError:
+        logger.exception(f"{xml_file} file not readable.")
+        return "XML/META PARSE ERROR", None, None
+
+    if root_tag not in xml_parse.META_ROOT_TAGS:
+        logger.error(f"{xml_file} is not a peds.meta or weapons.meta file.")
+        return "NOT A VALID META/XML FILE", None, None
+
+    object_type = xml_parse.META_ROOT_TAGS[root_tag]
+    if file_size <= chunk_bytes:
+        return None, object_type, [None]
+
+    # The first range holds the start of the file, the last one its end
+    cut_offsets = [0]
+    with open(xml_file, "rb") as meta_file, instrument.span("file_read", items=1):
+        for cut_target in range(chunk_bytes, file_size, chunk_bytes):
+            if cut_target <= cut_offsets[-1]:
+                # Object bigger than a chunk - Already past this cut
+                continue
+            cut_offset = meta_scan.next_object_start(meta_file, cut_target, object_type)
+            if cut_offset is None:
+                break
+            cut_offsets.append(cut_offset)
+
+    if len(cut_offsets) == 1:
+        return None, object_type, [None]
+
+    cut_offsets.append(file_size)
+    return None, object_type, list(zip(cut_offsets, cut_offsets[1:]))
+
+
+def parse_chunk(task):
+    """
+    Worker - Parse a whole file or one byte range of it
+    Returns (records, error message) - See object_records
+    """
+    xml_file, object_type, chunk = task
+
+    try:
+        if chunk is None:
+            xml_source = xml_file
+        else:
+            xml_source = BytesIO(
+                wrap_chunk(read_chunk(xml_file, chunk, object_type), object_type)
+            )
+
+        param_dicts = xml_parse.iter_object_elements(
+            xml_source, object_type, xml_parse.element_params
+        )
+        return object_records(param_dicts), None
+
+    except OSError:
+        logger.exception(f"{xml_file} could not be read.")
+        return None, "FILE NOT FOUND"
+    except LET.XMLSyntaxError:
+        logger.exception(f"{xml_file} file not readable.")
+        return None, "XML/META PARSE ERROR"
+
+
+def read_chunk(xml_file, chunk, object_type):
+    """
+    Bytes of the object Items of a byte range joined together
+    Weapon objects can sit in different Infos lists so the bytes between them are dropped
+    """
+    chunk_start, chunk_end = chunk
+    with open(xml_file, "rb") as meta_file:
+        meta_file.seek(chunk_start)
+        chunk_data = meta_file.read(chunk_end - chunk_start)
+
+    # Ranges after the first one start at a ped Item inside InitDatas
+    spans = meta_scan.object_spans(chunk_data, object_type, chunk_start > 0)
+    return b"\n".join(chunk_data[span_start:span_end] for span_start, span_end in spans)
+
+
+def object_records(param_dicts):
+    """
+    Compact form of parsed objects to send back from a worker
+    Returns (shapes, values) - Param names are sent once per shape, not once per object
+    values -> (shape code, tuple of param values) of every object
+    """
+    shapes = []
+    shape_codes = {}
+    values = []
+    for param_dict in param_dicts:
+        shape = tuple(param_dict)
+        shape_code = shape_codes.get(shape)
+        if shape_code is None:
+            shape_code = shape_codes[shape] = len(shapes)
+            shapes.append(shape)
+        values.append((shape_code, tuple(param_dict.values())))
+    return shapes, values
+
+
+def record_objects(records):
+    """
+    GTAObjects of the records of one chunk (object_records)
+    """
+    shapes, values = records
+    return [
+        xml_parse.GTAObjects(dict(zip(shapes[shape_code], param_values)))
+        for shape_code, param_values in values
+    ]
+
+
+def wrap_chunk(chunk_data, object_type):
+    """
+    Make a chunk of object Items a small document of the same layout as the file
+    """
+    root_tag, list_tag = CHUNK_WRAPPERS[object_type]
+    return (
+        f"<{root_tag}><{list_tag}>".encode("utf-8")
+        + chunk_data
+        + f"</{list_tag}></{root_tag}>".encode("utf-8")
+    )
@@ -0,0 +1,225 @@
+from collections import Counter
+import logging
+
+from functions import instrument
+from functions.weapon_flags import WeaponFlags
+
+logger = logging.getLogger(__name__)
+
+# Params that have no options to pick from
+SKIPPED_PARAMS = ("OverrideForces", "AttachPoints")
+
+
+class ParamValueIndex:
+
+    """
+    Incremental index of the values used by each parameter with frequency counts
+    Objects can be added (new file merged, new addon generated) or removed at any time
+    Can be used like the attr_db dictionary - index[param] -> set of values
+    """
+
+    def __init__(self, object_list=()):
+        # Param -> Counter of values
+        self.value_counts = {}
+        # Attribute only params -> Counter of attribute (name, value) tuples
+        self.attrib_counts = {}
+        self.object_count = 0
+
+        self.add_objects(object_list)
+
+    def __contains__(self, param):
+        return param in self.value_counts or param in self.attrib_counts
+
+    def __getitem__(self, param):
+        if param in self.value_counts:
+            return set(self.value_counts[param])
+        return self.attrib_value(param)
+
+    def __len__(self):
+        return len(self.keys())
+
+    def keys(self):
+        return self.value_counts.keys() | self.attrib_counts.keys()
+
+    def get(self, param, default=None):
+        return self[param] if param in self else default
+
+    def add_objects(self, object_list):
+        """
+        Count many objects in one pass - Text values and attribute dicts are counted
+        as (param, value) pairs by two Counters, then split by param once at the end
+        """
+        with instrument.span("attr_db") as index_span:
+            start_count = self.object_count
+            text_pairs = Counter()
+            attrib_pairs = Counter()
+
+            for gta_object in object_list:
+                self.object_count += 1
+                att_items = gta_object.return_att_dict().items()
+                text_pairs.update([pair for pair in att_items if type(pair[1]) is str])
+                attrib_pairs.update(
+                    [
+                        (param, tuple(value.items()))
+                        for param, value in att_items
+                        if type(value) is dict
+                    ]
+                )
+                for param, value in att_items:
+                    if value is not None and type(value) not in (str, dict):
+                        for option in param_values(param, value):
+                            self.add_value(param, option)
+
+            # Counters keep first seen order - Ties of most used values don't change
+            for index_counts, pair_counts in (
+                (self.value_counts, text_pairs),
+                (self.attrib_counts, attrib_pairs),
+            ):
+                for (param, value), count in pair_counts.items():
+                    if param in SKIPPED_PARAMS:
+                        continue
+                    param_counts = index_counts.get(param)
+                    if param_counts is None:
+                        param_counts = index_counts[param] = Counter()
+                    param_counts[value] += count
+            index_span.items = self.object_count - start_count
+
+    def remove_objects(self, object_list):
+        for gta_object in object_list:
+            self.remove_object(gta_object)
+
+    def add_object(self, gta_object):
+        self.object_count += 1
+        value_counts = self.value_counts
+        for param, value in gta_object.return_att_dict().items():
+            if isinstance(value, str) and param not in SKIPPED_PARAMS:
+                # Most params are text - Counted here without param_values
+                param_counts = value_counts.get(param)
+                if param_counts is None:
+                    param_counts = value_counts[param] = Counter()
+                param_counts[value] += 1
+            else:
+                for option in param_values(param, value):
+                    self.add_value(param, option)
+
+    def add_value(self, param, value, count=1):
+        """
+        Count one option of a param (from param_values) for count objects
+        """
+        if isinstance(value, dict):
+            value = tuple(value.items())
+            index_counts = self.attrib_counts
+        else:
+            index_counts = self.value_counts
+
+        # Only make a Counter for a new param - Not one per value
+        param_counts = index_counts.get(param)
+        if param_counts is None:
+            param_counts = index_counts[param] = Counter()
+        param_counts[value] += count
+
+    def remove_object(self, gta_object):
+        self.object_count -= 1
+        for param, value in object_param_values(gta_object):
+            if isinstance(value, dict):
+                value = tuple(value.items())
+                index_counts = self.attrib_counts
+            else:
+                index_counts = self.value_counts
+
+            param_counts = index_counts.get(param)
+            if not param_counts or value not in param_counts:
+                continue
+
+            param_counts[value] -= 1
+            if param_counts[value] <= 0:
+                del param_counts[value]
+            if not param_counts:
+                del index_counts[param]
+
+    def count(self, param, value):
+        """
+        Number of objects using a value for a param
+        """
+        return self.value_counts.get(param, {}).get(value, 0)
+
+    def attrib_value(self, param):
+        """
+        Most used attribute dictionary of an attribute only param
+        """
+        attrib_items = self.attrib_counts[param].most_common(1)[0][0]
+        return dict(attrib_items)
+
+    def options(self, param):
+        """
+        Values of a param, most used first (ties sorted by name)
+        """
+        param_counts = self.value_counts.get(param, {})
+        return sorted(param_counts, key=lambda value: (-param_counts[value], value))
+
+    def as_attr_db(self):
+        """
+        Plain dictionary in the same format as xml_parse.attr_db
+        """
+        parameter_database = {
+            param: self.attrib_value(param) for param in self.attrib_counts
+        }
+        for param, param_counts in self.value_counts.items():
+            parameter_database[param] = set(param_counts)
+        return parameter_database
+
+
+def param_value_sets(object_list):
+    """
+    Plain attr_db dictionary in one pass with sets - Nothing is counted
+    Attribute only params keep the last dictionary seen (the original attr_db)
+    """
+    parameter_database = {}
+    for gta_object in object_list:
+        for param, value in gta_object.return_att_dict().items():
+            if type(value) is dict:
+                # Values of the param win over its attributes (like as_attr_db)
+                if type(parameter_database.get(param)) is not set:
+                    if param not in SKIPPED_PARAMS:
+                        parameter_database[param] = value
+                continue
+
+            if type(value) is str and param not in SKIPPED_PARAMS:
+                param_options = (value,)
+            else:
+                param_options = param_values(param, value)
+            for option in param_options:
+                value_set = parameter_database.get(param)
+                if type(value_set) is not set:
+                    value_set = parameter_database[param] = set()
+                value_set.add(option)
+
+    return parameter_database
+
+
+def object_param_values(gta_object):
+    """
+    (param, value) pairs of an object that show up as options in the GUI
+    WeaponFlags give their single flags, params with children give their text values
+    """
+    for param, value in gta_object.return_att_dict().items():
+        for option in param_values(param, value):
+            yield param, option
+
+
+def param_values(param, value):
+    """
+    Options of one param value - Nothing for empty values and SKIPPED_PARAMS
+    """
+    if value is None or param in SKIPPED_PARAMS:
+        return
+    elif param == "WeaponFlags":
+        # Bitmask - Single flags come from the flag registry
+        yield from WeaponFlags(value)
+    elif isinstance(value, (list, tuple)):
+        for child in value:
+            child_text = getattr(child, "text", child)
+            if child_text is not None:
+                yield child_text
+    else:
+        yield value
@@ -0,0 +1,324 @@
+"""
+Query language over loaded objects (peds, weapons)
+    Pedtype=COP and (Personality=SERVICEMALES or Age>30)
+    Damage>=30 and not Group=GROUP_PISTOL
+    WeaponFlags has Gun
+Text is compared case insensitive (= and !=), numbers with = != < <= > >=
+"has" matches one word of a param (a flag of WeaponFlags)
+Dotted names reach attributes and children: AimOffsetMin.x, Fx.FlashFxChanceSP
+Each param gets its indexes on first use - A hash index of its texts/ words and a
+sorted index of its numbers - so a selective query costs about the size of its result
+"""
+
+from bisect import bisect_left, bisect_right
+import math
+import re
+
+from functions.xml_parse import ParamNode
+
+TOKEN_RE = re.compile(
+    r"""\s*(?:(?P<paren>[()])|(?P<op>==|!=|<=|>=|=|<|>)"""
+    r"""|(?P<quoted>"[^"]*"|'[^']*')|(?P<word>[^\s()=!<>"']+))"""
+)
+
+COMPARISONS = ("=", "==", "!=", "<", "<=", ">", ">=", "has")
+
+# Text with "param comparison value" is a query, other text is a search (functions.search)
+QUERY_RE = re.compile(r"[\w.]+\s*(?:[=<>]|!=)")
+HAS_RE = re.compile(r"([\w.]+)\s+has\s+\S", re.IGNORECASE)
+
+
+class ParamIndex:
+
+    """
+    Indexes of one param over an object list
+    TEXT -> rows, WORD -> rows and the numbers in order with their rows
+    """
+
+    def __init__(self, object_list, name):
+        # Rows of the objects that have the param
+        self.present = []
+        self.text_rows = {}
+        self.word_rows = {}
+
+        number_rows = []
+        for row, gta_object in enumerate(object_list):
+            text = param_text(gta_object, name)
+            if text is None:
+                continue
+
+            self.present.append(row)
+            text = text.strip()
+            self.text_rows.setdefault(text.upper(), []).append(row)
+            for word in set(text.upper().split()):
+                self.word_rows.setdefault(word, []).append(row)
+
+            number = parse_float(text)
+            if number is not None:
+                number_rows.append((number, row))
+
+        number_rows.sort()
+        self.numbers = [number for number, _ in number_rows]
+        self.number_rows = [row for _, row in number_rows]
+
+    def rows(self, comparison, value):
+        """
+        Rows matching "param comparison value" - Objects without the param never match
+        """
+        if comparison == "has":
+            return set(self.word_rows.get(value.upper(), ()))
+
+        number = parse_float(value)
+        if comparison in ("=", "=="):
+            if number is not None and self.numbers:
+                return self.number_range(number, number)
+            return set(self.text_rows.get(value.upper(), ()))
+        elif comparison == "!=":
+            return set(self.present) - self.rows("=", value)
+
+        if number is None:
+            raise ValueError(f"NOT A NUMBER: {comparison} {value}")
+        elif comparison == "<":
+            return set(self.number_rows[: bisect_left(self.numbers, number)])
+        elif comparison == "<=":
+            return set(self.number_rows[: bisect_right(self.numbers, number)])
+        elif comparison == ">":
+            return set(self.number_rows[bisect_right(self.numbers, number) :])
+        return set(self.number_rows[bisect_left(self.numbers, number) :])
+
+    def number_range(self, low, high):
+        return set(
+            self.number_rows[
+                bisect_left(self.numbers, low) : bisect_right(self.numbers, high)
+            ]
+        )
+
+
+class QueryIndex:
+
+    """
+    Query engine of an object list - Param indexes are kept between queries
+    Make a new one when the objects change (MetaCatalog does)
+    """
+
+    def __init__(self, object_list):
+        self.objects = list(object_list)
+        self.param_indexes = {}
+        # param -> Param of the objects - Names in queries are case insensitive
+        self.param_names = {}
+        for gta_object in self.objects[:1]:
+            self.param_names = {
+                param.lower(): param for param in gta_object.return_att_dict()
+            }
+
+    def __len__(self):
+        return len(self.objects)
+
+    def index(self, name):
+        param, dot, attrib = name.partition(".")
+        name = self.param_names.get(param.lower(), param) + dot + attrib
+
+        param_index = self.param_indexes.get(name)
+        if param_index is None:
+            param_index = self.param_indexes[name] = ParamIndex(self.objects, name)
+        return param_index
+
+    def is_query(self, text):
+        """
+        Text is a query of these objects - "x has y" only if x is one of their params
+        """
+        return is_query(text, self.param_names)
+
+    def find_rows(self, query_text):
+        """
+        Rows (in object list order) matching a query - Raises ValueError if not valid
+        """
+        return sorted(self.evaluate(parse_query(query_text)))
+
+    def find(self, query_text):
+        """
+        Objects matching a query - Returns the object list and an error message
+        """
+        try:
+            rows = self.find_rows(query_text)
+        except ValueError as err:
+            return [], str(err)
+        return [self.objects[row] for row in rows], None
+
+    def evaluate(self, query_tree):
+        operator = query_tree[0]
+        if operator == "and":
+            # Smallest result first - Later ones only shrink it
+            row_sets = sorted(
+                (self.evaluate(operand) for operand in query_tree[1:]), key=len
+            )
+            return row_sets[0].intersection(*row_sets[1:])
+        elif operator == "or":
+            return set().union(*(self.evaluate(operand) for operand in query_tree[1:]))
+        elif operator == "not":
+            return set(range(len(self.objects))) - self.evaluate(query_tree[1])
+
+        _, name, comparison, value = query_tree
+        return self.index(name).rows(comparison, value)
+
+
+def is_query(text, param_names=None):
+    """
+    Text has a "param comparison value" condition - Other text is a search
+    param_names (lower case) -> "x has y" only counts when x is a param,
+    so "who has a gun" stays a search
+    """
+    if QUERY_RE.search(text):
+        return True
+
+    for match in HAS_RE.finditer(text):
+        param = match.group(1).partition(".")[0].lower()
+        if param_names is None or param in param_names:
+            return True
+    return False
+
+
+def parse_query(query_text):
+    """
+    Query text -> tree of ("and"/"or", operands...), ("not", operand)
+    and ("cond", name, comparison, value) tuples
+    """
+    tokens = tokenize(query_text)
+    if not tokens:
+        raise ValueError("EMPTY QUERY")
+
+    query_tree, position = parse_or(tokens, 0)
+    if position != len(tokens):
+        raise ValueError(f"INVALID QUERY: unexpected {tokens[position][1]}")
+    return query_tree
+
+
+def tokenize(query_text):
+    """
+    (kind, text) tokens - kind is paren, op, quoted or word
+    """
+    tokens = []
+    position = 0
+    query_text = query_text.rstrip()
+
+    while position < len(query_text):
+        match = TOKEN_RE.match(query_text, position)
+        if not match:
+            raise ValueError(f"INVALID QUERY: {query_text[position:]}")
+        kind = match.lastgroup
+        text = match.group(kind)
+        if kind == "quoted":
+            text = text[1:-1]
+        tokens.append((kind, text))
+        position = match.end()
+
+    return tokens
+
+
+def parse_or(tokens, position):
+    operands = []
+    while True:
+        operand, position = parse_and(tokens, position)
+        operands.append(operand)
+        if not is_keyword(tokens, position, "or"):
+            break
+        position += 1
+
+    if len(operands) == 1:
+        return operands[0], position
+    return ("or", *operands), position
+
+
+def parse_and(tokens, position):
+    operands = []
+    while True:
+        operand, position = parse_not(tokens, position)
+        operands.append(operand)
+        if not is_keyword(tokens, position, "and"):
+            break
+        position += 1
+
+    if len(operands) == 1:
+        return operands[0], position
+    return ("and", *operands), position
+
+
+def parse_not(tokens, position):
+    if is_keyword(tokens, position, "not"):
+        operand, position = parse_not(tokens, position + 1)
+        return ("not", operand), position
+
+    if position < len(tokens) and tokens[position] == ("paren", "("):
+        query_tree, position = parse_or(tokens, position + 1)
+        if position >= len(tokens) or tokens[position] != ("paren", ")"):
+            raise ValueError("INVALID QUERY: missing )")
+        return query_tree, position + 1
+
+    return parse_condition(tokens, position)
+
+
+def parse_condition(tokens, position):
+    """
+    name comparison value
+    """
+    if position + 3 > len(tokens):
+        raise ValueError("INVALID QUERY: incomplete condition")
+
+    (name_kind, name), (op_kind, comparison), (value_kind, value) = tokens[
+        position : position + 3
+    ]
+    if op_kind == "word":
+        comparison = comparison.lower()
+    if (
+        name_kind != "word"
+        or comparison not in COMPARISONS
+        or value_kind not in ("word", "quoted")
+    ):
+        raise ValueError(f"INVALID QUERY: {name} {comparison} {value}")
+
+    return ("cond", name, comparison, value), position + 3
+
+
+def is_keyword(tokens, position, keyword):
+    return (
+        position < len(tokens)
+        and tokens[position][0] == "word"
+        and tokens[position][1].lower() == keyword
+    )
+
+
+def param_text(gta_object, name):
+    """
+    Text of a (dotted) param of an object - None if it has no such text
+    Damage -> value attribute, AimOffsetMin.x -> x attribute,
+    Fx.FlashFxChanceSP -> value of the child, Explosion.Default -> text of the child
+    """
+    param, _, attrib = name.partition(".")
+    value = getattr(gta_object, param, None)
+
+    if isinstance(value, tuple):
+        tag, _, attrib = attrib.partition(".")
+        for child in value:
+            if isinstance(child, ParamNode) and child.tag == tag:
+                child_attrs = dict(child.attrs)
+                if attrib:
+                    return child_attrs.get(attrib)
+                return child_attrs.get("value", child.text)
+        return None
+    elif isinstance(value, dict):
+        if attrib:
+            return value.get(attrib)
+        return value.get("value", value.get("ref"))
+    elif attrib or value is None or isinstance(value, list):
+        return None
+    # Text params and WeaponFlags (canonical string)
+    return str(value)
+
+
+def parse_float(text):
+    try:
+        number = float(text)
+    except ValueError:
+        return None
+    # "nan"/ "inf" are text - NaN can't be sorted
+    return number if math.isfinite(number) else None
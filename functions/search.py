@@ -0,0 +1,353 @@
+"""
+Ranked text search over the parameter values of loaded objects
+Any number of databases (peds and weapons) can be added to one SearchIndex
+An inverted index maps every word to the (object, param) it appears in, a trigram
+index of the words finds substrings (carbine -> WEAPON_CARBINERIFLE) and words
+with typos (carbien). Hits are ranked by how well and how rare the words matched
+Param:word only searches one param and only objects matching it are returned
+(Pedtype:cop male -> male cops)
+"""
+
+from collections import Counter, namedtuple
+import heapq
+import math
+import re
+
+from functions.xml_parse import ParamNode
+
+# One ranked search result - text is the matched param value
+SearchHit = namedtuple("SearchHit", ["score", "gta_object", "param", "text"])
+
+WORD_RE = re.compile(r"\w+")
+CAMEL_RE = re.compile(r"[A-Z]+(?![a-z])|[A-Z]?[a-z]+|\d+")
+
+# Weight of the words of the Name param and of other params
+NAME_WEIGHT = 3.0
+VALUE_WEIGHT = 1.0
+
+# Score of a word for a search term
+EXACT_SCORE = 1.0
+PREFIX_SCORE = 0.8
+SUBSTRING_SCORE = 0.6
+# Words with less of the trigrams of a term are not typos of it
+FUZZY_MIN_SIMILARITY = 0.4
+FUZZY_MIN_TRIGRAMS = 2
+FUZZY_SCORE = 0.5
+
+# Search terms resolved to words kept per index
+TERM_CACHE_SIZE = 256
+
+
+class SearchIndex:
+
+    """
+    Inverted index of value words -> (object, param) postings and a trigram index of the words
+    Add objects with add_objects, search with search/ search_objects
+    """
+
+    def __init__(self, object_list=None):
+        self.objects = []
+        # Posting number -> (object number, param)
+        self.postings = []
+        # Object number -> its first posting number (postings of an object are in a row)
+        self.first_postings = []
+        # word -> weight -> posting numbers/ object numbers
+        # Postings of a weight get the same score, so they are merged as sets
+        self.word_postings = {}
+        self.word_objects = {}
+        # param (lower case) -> posting numbers, for Param:word terms
+        self.param_postings = {}
+        # trigram -> words containing it
+        self.trigram_words = {}
+        # term -> [(word, score)], cleared when words are added
+        self.term_cache = {}
+
+        if object_list:
+            self.add_objects(object_list)
+
+    def __len__(self):
+        return len(self.objects)
+
+    def add_objects(self, object_list):
+        for gta_object in object_list:
+            object_number = len(self.objects)
+            self.objects.append(gta_object)
+            self.first_postings.append(len(self.postings))
+
+            for param, value in gta_object.return_att_dict().items():
+                if param == "object_type" or value is None:
+                    continue
+
+                posting_number = len(self.postings)
+                self.postings.append((object_number, param))
+                self.param_postings.setdefault(param.lower(), set()).add(posting_number)
+
+                weight = NAME_WEIGHT if param == "Name" else VALUE_WEIGHT
+                for text in value_texts(value):
+                    for word in text_words(text):
+                        self.add_posting(word, weight, posting_number, object_number)
+
+        self.term_cache.clear()
+
+    def add_posting(self, word, weight, posting_number, object_number):
+        word_postings = self.word_postings.get(word)
+        if word_postings is None:
+            word_postings = self.word_postings[word] = {}
+            self.word_objects[word] = {}
+            for trigram in word_trigrams(word):
+                self.trigram_words.setdefault(trigram, set()).add(word)
+
+        word_postings.setdefault(weight, set()).add(posting_number)
+        self.word_objects[word].setdefault(weight, set()).add(object_number)
+
+    def search(self, search_text, limit=20):
+        """
+        Best (object, param) hits of the search words - List of SearchHit, best first
+        """
+        term_list = search_terms(search_text)
+        filtered_objects = self.filtered_objects(term_list)
+        allowed_postings = None
+        if filtered_objects is not None:
+            allowed_postings = set()
+            for object_number in filtered_objects:
+                allowed_postings.update(self.object_posting_numbers(object_number))
+
+        posting_scores = sum_scores(
+            self.term_scores(param_filter, term, False, allowed_postings)
+            for param_filter, term in term_list
+        )
+
+        hits = []
+        for posting_number in heapq.nlargest(
+            limit or len(posting_scores), posting_scores, key=posting_scores.get
+        ):
+            object_number, param = self.postings[posting_number]
+            gta_object = self.objects[object_number]
+            hits.append(
+                SearchHit(
+                    posting_scores[posting_number],
+                    gta_object,
+                    param,
+                    " ".join(value_texts(getattr(gta_object, param, None))),
+                )
+            )
+        return hits
+
+    def search_objects(self, search_text, limit=20):
+        """
+        Best objects for the search words - List of (score, object), best first
+        Each term counts with the best param it matched, so objects matching every
+        term rank above objects matching one term in many params
+        """
+        term_list = search_terms(search_text)
+        filtered_objects = self.filtered_objects(term_list)
+        object_scores = sum_scores(
+            self.term_scores(
+                param_filter, term, True, None if param_filter else filtered_objects
+            )
+            for param_filter, term in term_list
+        )
+
+        if filtered_objects is not None:
+            object_scores = {
+                object_number: object_scores[object_number]
+                for object_number in filtered_objects
+            }
+
+        return [
+            (object_scores[object_number], self.objects[object_number])
+            for object_number in heapq.nlargest(
+                limit or len(object_scores), object_scores, key=object_scores.get
+            )
+        ]
+
+    def filtered_objects(self, term_list):
+        """
+        Object numbers matching every Param:word term - None if there are none
+        """
+        object_sets = [
+            set(self.term_scores(param_filter, term, by_object=True))
+            for param_filter, term in term_list
+            if param_filter
+        ]
+        if not object_sets:
+            return None
+        return set.intersection(*object_sets)
+
+    def object_posting_numbers(self, object_number):
+        first_posting = self.first_postings[object_number]
+        if object_number + 1 < len(self.first_postings):
+            return range(first_posting, self.first_postings[object_number + 1])
+        return range(first_posting, len(self.postings))
+
+    def term_scores(self, param_filter, term, by_object, allowed_numbers=None):
+        """
+        Posting number (or object number) -> best score of a term
+        allowed_numbers -> Only score these postings (objects for by_object terms
+        without a param filter, those are scored per object)
+        """
+        posting_count = len(self.postings) or 1
+        if param_filter:
+            filter_postings = self.param_postings.get(param_filter, set())
+            # Filtered postings are mapped to their objects below
+            word_sets = self.word_postings
+        else:
+            word_sets = self.word_objects if by_object else self.word_postings
+
+        scored_sets = []
+        for word, match_score in self.term_words(term):
+            weight_sets = self.word_postings[word]
+            # Rare words count more
+            word_count = sum(len(postings) for postings in weight_sets.values())
+            word_score = match_score * math.log(1 + posting_count / word_count)
+
+            for weight, numbers in word_sets[word].items():
+                if param_filter:
+                    numbers = numbers & filter_postings
+                if allowed_numbers is not None:
+                    numbers = numbers & allowed_numbers
+                scored_sets.append((word_score * weight, numbers))
+
+        # Best score last - Overwrites the lower scores of the same number
+        scores = {}
+        for score, numbers in sorted(scored_sets, key=lambda scored: scored[0]):
+            scores.update(dict.fromkeys(numbers, score))
+
+        if param_filter and by_object:
+            object_scores = {}
+            for posting_number, score in scores.items():
+                object_number = self.postings[posting_number][0]
+                if score > object_scores.get(object_number, 0):
+                    object_scores[object_number] = score
+            return object_scores
+        return scores
+
+    def term_words(self, term):
+        """
+        Words of the index matching a term with their score
+        Exact, prefix and substring matches - Words with a typo if there are none
+        """
+        term_words = self.term_cache.get(term)
+        if term_words is not None:
+            return term_words
+
+        term_words = []
+        if term in self.word_postings:
+            term_words.append((term, EXACT_SCORE))
+
+        term_trigrams = word_trigrams(term)
+        shared_counts = Counter()
+        for trigram in term_trigrams:
+            shared_counts.update(self.trigram_words.get(trigram, ()))
+
+        typo_words = []
+        for word, shared in shared_counts.items():
+            if word == term:
+                continue
+            elif word.startswith(term):
+                term_words.append((word, PREFIX_SCORE))
+            elif term in word:
+                term_words.append((word, SUBSTRING_SCORE))
+            elif shared >= FUZZY_MIN_TRIGRAMS:
+                # Part of the term trigrams in the word - Long words aren't penalized
+                similarity = shared / len(term_trigrams)
+                if similarity >= FUZZY_MIN_SIMILARITY:
+                    typo_words.append((word, FUZZY_SCORE * similarity))
+
+        if not term_words:
+            term_words = typo_words
+
+        if len(self.term_cache) >= TERM_CACHE_SIZE:
+            self.term_cache.clear()
+        self.term_cache[term] = term_words
+        return term_words
+
+
+def sum_scores(term_score_dicts):
+    """
+    Number -> sum of the term scores
+    """
+    total_scores = {}
+    for term_number, scores in enumerate(term_score_dicts):
+        if term_number == 0:
+            total_scores = scores
+            continue
+        for number, score in scores.items():
+            total_scores[number] = total_scores.get(number, 0) + score
+    return total_scores
+
+
+def search_terms(search_text):
+    """
+    [(param filter or None, term)] - Terms are lower case words, Param:word filters
+    """
+    terms = []
+    for term in search_text.split():
+        param_filter, _, term = term.rpartition(":")
+        term = term.strip("'\"").lower()
+        if term:
+            terms.append((param_filter.lower() or None, term))
+    return terms
+
+
+def text_words(text):
+    """
+    Lower case words of a text - Whole identifiers and their parts
+    WEAPON_CARBINERIFLE -> weapon_carbinerifle, weapon, carbinerifle
+    AimOffsetMin -> aimoffsetmin, aim, offset, min. Numbers are not words
+    """
+    words = set()
+    for identifier in WORD_RE.findall(text):
+        parts = [identifier]
+        if "_" in identifier:
+            parts.extend(part for part in identifier.split("_") if part)
+        for part in list(parts):
+            camel_parts = CAMEL_RE.findall(part)
+            if len(camel_parts) > 1:
+                parts.extend(camel_parts)
+
+        words.update(part.lower() for part in parts if not part.isdigit())
+    return words
+
+
+def word_trigrams(word):
+    """
+    Trigrams of a word padded with a space at both ends - Short words get one too
+    """
+    padded = f" {word} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+def value_texts(value):
+    """
+    Texts of a param value that are not numbers - Attribute values, child texts, flags
+    """
+    if value is None:
+        return
+    elif isinstance(value, str):
+        yield value
+    elif isinstance(value, dict):
+        for item in value.values():
+            yield from value_texts(item)
+    elif isinstance(value, ParamNode):
+        yield value.tag
+        for _, attr_text in value.attrs:
+            if not is_number(attr_text):
+                yield attr_text
+        yield from value_texts(value.text)
+        for child in value.children:
+            yield from value_texts(child)
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            yield from value_texts(item)
+    else:
+        # WeaponFlags -> flag names
+        yield str(value)
+
+
+def is_number(text):
+    try:
+        float(text)
+    except ValueError:
+        return False
+    return True
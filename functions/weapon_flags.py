@@ -0,0 +1,203 @@
+"""
+WeaponFlags as an integer bitmask
+Every flag name gets a bit in the global FLAG_REGISTRY the first time it is seen
+Flag strings are parsed once, set operations are int operations and the
+canonical string (flag names sorted) is only built when the flags are written
+"""
+
+import threading
+
+
+class FlagRegistry:
+
+    """
+    Flag name <-> bit number of every flag seen in this process
+    Bits are handed out in the order flags are seen so they differ between processes -
+    WeaponFlags are pickled by name (see WeaponFlags.__reduce__)
+    """
+
+    def __init__(self):
+        self.bits = {}
+        self.names = []
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, flag):
+        return flag in self.bits
+
+    def __iter__(self):
+        return iter(self.names)
+
+    def bit(self, flag):
+        """
+        Bit number of a flag - Unknown flags are registered
+        """
+        flag_bit = self.bits.get(flag)
+        if flag_bit is None:
+            with self.lock:
+                flag_bit = self.bits.get(flag)
+                if flag_bit is None:
+                    flag_bit = self.bits[flag] = len(self.names)
+                    self.names.append(flag)
+        return flag_bit
+
+    def mask(self, flags):
+        """
+        Bitmask of flag names
+        """
+        flag_mask = 0
+        for flag in flags:
+            flag_mask |= 1 << self.bit(flag)
+        return flag_mask
+
+    def lookup_mask(self, flags):
+        """
+        (bitmask, all flags known) without registering unknown flags - For queries
+        """
+        if isinstance(flags, str):
+            flags = flags.split()
+
+        flag_mask = 0
+        all_known = True
+        for flag in flags:
+            flag_bit = self.bits.get(flag)
+            if flag_bit is None:
+                all_known = False
+            else:
+                flag_mask |= 1 << flag_bit
+        return flag_mask, all_known
+
+    def flag_names(self, flag_mask):
+        """
+        Names of the bits set in a mask - In bit order
+        """
+        names = []
+        flag_bit = 0
+        while flag_mask:
+            if flag_mask & 1:
+                names.append(self.names[flag_bit])
+            flag_mask >>= 1
+            flag_bit += 1
+        return names
+
+
+FLAG_REGISTRY = FlagRegistry()
+
+# Flag string -> WeaponFlags. The same string is only parsed once
+parsed_flags = {}
+# Mask -> canonical string
+canonical_strings = {}
+
+
+class WeaponFlags(int):
+
+    """
+    Bitmask of weapon flags - An int, so masks can be compared, hashed and counted
+    WeaponFlags("Gun CarriedInHand"), WeaponFlags(["Gun", "CarriedInHand"]) or a mask
+    str() gives the canonical META string, iterating gives the flag names
+    """
+
+    __slots__ = ()
+
+    def __new__(cls, flags=0):
+        if isinstance(flags, WeaponFlags):
+            return flags
+        elif isinstance(flags, str):
+            weapon_flags = parsed_flags.get(flags)
+            if weapon_flags is None:
+                # Need to strip blank/ new line. Split flags to list
+                weapon_flags = super().__new__(cls, FLAG_REGISTRY.mask(flags.split()))
+                parsed_flags[flags] = weapon_flags
+            return weapon_flags
+        elif isinstance(flags, int):
+            return super().__new__(cls, flags)
+        return super().__new__(cls, FLAG_REGISTRY.mask(flags))
+
+    def __str__(self):
+        flag_string = canonical_strings.get(int(self))
+        if flag_string is None:
+            flag_string = " ".join(sorted(FLAG_REGISTRY.flag_names(self)))
+            canonical_strings[int(self)] = flag_string
+        return flag_string
+
+    def __repr__(self):
+        return f"WeaponFlags({str(self)!r})"
+
+    def __iter__(self):
+        return iter(FLAG_REGISTRY.flag_names(self))
+
+    def __len__(self):
+        return bin(self).count("1")
+
+    def __contains__(self, flag):
+        flag_bit = FLAG_REGISTRY.bits.get(flag)
+        return flag_bit is not None and bool(self >> flag_bit & 1)
+
+    def __or__(self, other):
+        return WeaponFlags(int(self) | int(WeaponFlags(other)))
+
+    def __and__(self, other):
+        return WeaponFlags(int(self) & int(WeaponFlags(other)))
+
+    def __sub__(self, other):
+        return WeaponFlags(int(self) & ~int(WeaponFlags(other)))
+
+    def __xor__(self, other):
+        return WeaponFlags(int(self) ^ int(WeaponFlags(other)))
+
+    __ror__ = __or__
+    __rand__ = __and__
+    __rxor__ = __xor__
+
+    def has_all(self, flags):
+        flag_mask, all_known = FLAG_REGISTRY.lookup_mask(flags)
+        return all_known and int(self) & flag_mask == flag_mask
+
+    def has_any(self, flags):
+        flag_mask, _ = FLAG_REGISTRY.lookup_mask(flags)
+        return bool(int(self) & flag_mask)
+
+    # Immutable - Copies of objects share their flags
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __reduce__(self):
+        # By name - Bit numbers of other processes (pool workers, cache files) differ
+        return WeaponFlags, (str(self),)
+
+
+def union(flag_values):
+    """
+    Every flag used by any of the values
+    """
+    flag_mask = 0
+    for weapon_flags in flag_values:
+        if weapon_flags is not None:
+            flag_mask |= int(WeaponFlags(weapon_flags))
+    return WeaponFlags(flag_mask)
+
+
+def filter_objects(object_list, with_flags=(), without_flags=()):
+    """
+    Objects (weapons) having all flags of with_flags and none of without_flags
+    """
+    include_mask, all_known = FLAG_REGISTRY.lookup_mask(with_flags)
+    exclude_mask, _ = FLAG_REGISTRY.lookup_mask(without_flags)
+    if not all_known:
+        # No object can have a flag that was never seen
+        return []
+
+    matches = []
+    for gta_object in object_list:
+        weapon_flags = getattr(gta_object, "WeaponFlags", None)
+        if weapon_flags is None:
+            continue
+        flag_mask = int(WeaponFlags(weapon_flags))
+        if flag_mask & include_mask == include_mask and not flag_mask & exclude_mask:
+            matches.append(gta_object)
+    return matches
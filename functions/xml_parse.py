@@ -1,15 +1,74 @@
 import lxml.etree as LET
+from collections import namedtuple
 from pathlib import Path
 import copy
 import logging
-
+import mmap
+import os
+import shutil
+import tempfile
+
+from functions import instrument
+from functions import meta_scan
+from functions.name_index import NameIndex
+from functions.param_index import param_value_sets
+from functions.weapon_flags import WeaponFlags
+
+# Handlers are set up by the application (see log_setup)
 logger = logging.getLogger(__name__)
-logger.setLevel(logging.DEBUG)
-file_handler = logging.FileHandler("program_log.log")
-file_format = logging.Formatter("%(asctime)s: %(name)s - %(levelname)s - %(message)s")
-file_handler.setFormatter(file_format)
 
-logger.addHandler(file_handler)
+
+# Root tag of each supported META/XML file -> object type
+META_ROOT_TAGS = {"CPedModelInfo__InitDataList": "ped", "CWeaponInfoBlob": "weap"}
+
+# Objects parsed between two progress reports of the streaming parser
+PROGRESS_STEP = 50
+
+
+class ParamNode(namedtuple("ParamNode", ["tag", "attrs", "text", "children"])):
+
+    """
+    Plain copy of a child element of a list parameter (<Fx>, <Explosion>, etc.)
+    Keeps objects independent of the parsed lxml tree
+    attrs/ children are tuples so nodes can be shared, hashed and pickled
+    """
+
+    __slots__ = ()
+
+    @property
+    def attrib(self):
+        return dict(self.attrs)
+
+
+def element_to_node(element):
+    """
+    lxml element -> ParamNode
+    """
+    children = tuple(
+        element_to_node(child) for child in element if isinstance(child.tag, str)
+    )
+    text = element.text
+    # Whitespace between child elements is only formatting
+    if children and text and not text.strip():
+        text = None
+
+    return ParamNode(element.tag, tuple(element.attrib.items()), text, children)
+
+
+def node_to_element(node, parent=None):
+    """
+    ParamNode -> lxml element (SubElement of parent if given)
+    """
+    if parent is None:
+        element = LET.Element(node.tag, node.attrib)
+    else:
+        element = LET.SubElement(parent, node.tag, node.attrib)
+    element.text = node.text
+
+    for child in node.children:
+        node_to_element(child, element)
+
+    return element
 
 
 class GTAObjects:
@@ -39,28 +98,108 @@ class GTAObjects:
             print(f"{counter}. Attribute: {attr} | Value: {val}")
             counter += 1
 
+    def peek_attr(self, name):
+        """
+        Current value of a param to look at only - Must not be changed
+        """
+        return getattr(self, name)
+
     def update_attr(self, new_val_dict):
         for k, v in new_val_dict.items():
-            if isinstance(getattr(self, k), dict):
-                setattr(self, k, {"value": v})
+            cur_val = self.peek_attr(k)
+            if isinstance(cur_val, dict) and not isinstance(v, dict):
+                # Attribute only params - Keep the attribute name (value or ref)
+                attrib_name = "ref" if "ref" in cur_val else "value"
+                setattr(self, k, {attrib_name: v})
+            elif k == "WeaponFlags" and isinstance(v, str):
+                setattr(self, k, WeaponFlags(v))
             else:
                 setattr(self, k, v)
 
-        logger.info(f"{self.Name} attributes updated.")
+        # Called for every generated object - Lazy formatting, debug level
+        logger.debug("%s attributes updated.", self.Name)
 
     def __repr__(self):
         return f"Name: {self.Name}"
 
 
-def xml_meta_parser(xml_file):
+class GTAObjectOverlay(GTAObjects):
+
+    """
+    Copy-on-write object created from a template (see generate_new_object)
+    Only changed parameters are stored, everything else is read from the template
+    Mutable parameters (lists, dicts) are copied from the template on first access
+    The template must not be changed while overlays of it are still in use
+    """
+
+    def __init__(self, template):
+        object.__setattr__(self, "_template", template)
+        object.__setattr__(self, "_overrides", {})
+
+    def __getattr__(self, name):
+        # Only called for parameters not set on the overlay itself
+        if name.startswith("__") or name in ("_template", "_overrides"):
+            raise AttributeError(name)
+
+        overrides = self._overrides
+        if name in overrides:
+            return overrides[name]
+
+        value = getattr(self._template, name)
+        if isinstance(value, (list, dict)):
+            with instrument.span("deepcopy", items=1):
+                value = copy.deepcopy(value)
+            overrides[name] = value
+        return value
+
+    def __setattr__(self, name, value):
+        self._overrides[name] = value
+
+    def peek_attr(self, name):
+        # Template value without the copy __getattr__ makes of lists/ dicts
+        overrides = self._overrides
+        if name in overrides:
+            return overrides[name]
+        return getattr(self._template, name)
+
+    def __deepcopy__(self, memo):
+        # Copies are standalone objects
+        return GTAObjects(copy.deepcopy(self.return_att_dict(), memo))
+
+    def __reduce__(self):
+        return GTAObjects, (self.return_att_dict(),)
+
+    def return_att_dict(self):
+        # Template params keep their order, new params are added at the end
+        att_dict = dict(self._template.return_att_dict())
+        att_dict.update(self._overrides)
+        return att_dict
+
+    def display_attributes(self):
+        # Internal use only - debugging purposes
+        counter = 1
+        for attr, val in self.return_att_dict().items():
+            print(f"{counter}. Attribute: {attr} | Value: {val}")
+            counter += 1
+
+
+def xml_meta_parser(xml_file, stream=False):
     """
     Parses xml file to create a list of gta objects
+    Returns object list, error message and object type
+    stream=True returns the same tuple with a generator of gta objects in place of the
+    list (see stream_meta_parser)
     """
 
     err_message = None
 
+    if stream:
+        return stream_meta_parser(xml_file)
+
     try:
-        file_parsed = LET.parse(xml_file)
+        file_size = os.path.getsize(xml_file)
+        with instrument.span("lxml_parse", items=1, bytes=file_size):
+            file_parsed = LET.parse(xml_file)
     except FileNotFoundError:
         err_message = "FILE NOT FOUND"
         logger.exception("File not found")
@@ -109,6 +248,136 @@ def xml_meta_parser(xml_file):
         return None, err_message, None
 
 
+def stream_meta_parser(xml_file, progress_callback=None):
+    """
+    Streaming version of xml_meta_parser for very large (merged DLC) files
+    Only the root tag is read up front, objects are parsed as the generator is consumed
+    progress_callback(objects parsed, bytes read) is called every PROGRESS_STEP objects
+    """
+
+    err_message = None
+
+    try:
+        root_tag = meta_root_tag(xml_file)
+    except FileNotFoundError:
+        err_message = "FILE NOT FOUND"
+        logger.exception("File not found")
+        return None, err_message, None
+    except LET.XMLSyntaxError:
+        err_message = "XML/META PARSE ERROR"
+        logger.exception(f"{xml_file} file not readable.")
+        return None, err_message, None
+
+    if root_tag not in META_ROOT_TAGS:
+        err_message = "NOT A VALID META/XML FILE"
+        logger.error("Not a peds.meta or weapons.meta file.")
+        return None, err_message, None
+
+    obj_type = META_ROOT_TAGS[root_tag]
+    logger.info(f"Streaming {obj_type} objects from {xml_file}.")
+    object_stream = iter_meta_objects(xml_file, obj_type, progress_callback)
+    return object_stream, err_message, obj_type
+
+
+def meta_root_tag(xml_file):
+    """
+    Return the root tag of a META/XML file without parsing the rest of it
+    """
+    # Closed right away - iterparse would keep the file open after the first event
+    with open(xml_file, "rb") as meta_file:
+        parse_events = LET.iterparse(meta_file, events=("start",))
+        _, xml_root = next(parse_events)
+        return xml_root.tag
+
+
+def iter_meta_objects(xml_file, obj_type, progress_callback=None):
+    """
+    Yield one GTAObjects at a time from a META/XML file using lxml iterparse
+    Peds -> InitDatas/Item, Weapons -> Item type="CWeaponInfo"
+    Processed elements are detached from the tree so memory stays flat on huge files
+    """
+    object_count = 0
+
+    if progress_callback:
+        # Count the bytes lxml reads from the file
+        xml_source = ProgressReader(open(xml_file, "rb"))
+    else:
+        xml_source = xml_file
+
+    try:
+        for gta_object in iter_object_elements(xml_source, obj_type):
+            object_count += 1
+            if progress_callback and object_count % PROGRESS_STEP == 0:
+                progress_callback(object_count, xml_source.bytes_read)
+            yield gta_object
+    finally:
+        if progress_callback:
+            xml_source.close()
+
+    if progress_callback:
+        progress_callback(object_count, xml_source.bytes_read)
+    instrument.count("lxml_parse", bytes=os.path.getsize(xml_file))
+    logger.info(f"Streamed {object_count} objects from {xml_file}.")
+
+
+def iter_object_elements(xml_source, obj_type, parse_element=None):
+    """
+    iterparse loop of iter_meta_objects
+    parse_element -> Builds what is yielded for each object element (parse_object_element)
+    """
+    if parse_element is None:
+        parse_element = parse_object_element
+
+    parse_events = LET.iterparse(xml_source, events=("end",), tag="Item")
+    if instrument.enabled:
+        # Time lxml apart from building the objects
+        parse_events = instrument.timed_iter("lxml_parse", parse_events)
+
+    for _, element in parse_events:
+        parent = element.getparent()
+
+        if obj_type == "ped":
+            # Only the direct InitDatas items - Not items of list parameters
+            is_object = (
+                parent.tag == "InitDatas" and parent.getparent().getparent() is None
+            )
+        else:
+            is_object = element.get("type") == "CWeaponInfo"
+
+        if is_object:
+            gta_object = parse_element(element, obj_type)
+            # Objects hold no references to the tree
+            element.clear()
+            parent.remove(element)
+            yield gta_object
+
+        # Other typed items (CAimingInfo, CAmmoInfo, etc.) are not used
+        elif element.get("type"):
+            element.clear()
+            parent.remove(element)
+
+
+class ProgressReader:
+
+    """
+    File wrapper that counts the bytes read from it
+    """
+
+    def __init__(self, meta_file):
+        self.meta_file = meta_file
+        self.bytes_read = 0
+
+    def read(self, size=-1):
+        with instrument.span("file_read") as read_span:
+            data = self.meta_file.read(size)
+            read_span.bytes = len(data)
+        self.bytes_read += len(data)
+        return data
+
+    def close(self):
+        self.meta_file.close()
+
+
 def create_parsed_objects(xml_elements, obj_type=None):
     """
     Parse elements of interest to create objects with their respective params
@@ -116,135 +385,126 @@ def create_parsed_objects(xml_elements, obj_type=None):
 
     parsed_object_list = []
     for element_object in xml_elements:
-        param_dictionary = {}
-        param_dictionary["object_type"] = obj_type
-        for param in element_object:
-            # Parameter has child elements
-            # Weapons.meta specific parse
-
-            # Weapon OverrideForces
-            if param.tag == "OverrideForces":
-                override_forces_parsed = []
-                # OverrideForces Item
-                for item in param.findall("Item"):
-                    force_item = {}
-                    force_item[item.tag] = []
-                    # BoneTag, Forcefront, forceback
-                    for item_param in item.findall("*"):
-                        if item_param.text:
-                            force_item[item.tag].append(
-                                {item_param.tag: item_param.text}
-                            )
-                        elif item_param.attrib:
-                            force_item[item.tag].append(
-                                {item_param.tag: item_param.attrib}
-                            )
-                    override_forces_parsed.append(force_item)
-                param_dictionary[param.tag] = override_forces_parsed
-
-            # Weapon AttachPoints - Has multiple children elements
-            elif param.tag == "AttachPoints":
-                attach_items = []
-                # All attachpoint <Item> elements
-                for item in param.findall("*"):
-                    attach_params = {}
-                    attach_params[item.tag] = []
-                    # AttachBone & Component elements
-                    for bone_component in item.findall("*"):
-                        # AttachBone Element
-                        if bone_component.tag == "AttachBone":
-                            attach_params[item.tag].append(
-                                {bone_component.tag: bone_component.text}
-                            )
-                        # Component Element - Has children
-                        elif bone_component.tag == "Components":
-                            comp_elements = {}
-                            comp_elements[bone_component.tag] = []
-                            # Component <Item> Elements
-                            for component_item in bone_component.findall("*"):
-                                name_default = {}
-                                name_default[component_item.tag] = []
-                                # Dictionary for component elements
-                                for comp_item_param in component_item.findall("*"):
-                                    # Add individual param for each component
-                                    if comp_item_param.text:
-                                        name_default[component_item.tag].append(
-                                            {comp_item_param.tag: comp_item_param.text}
-                                        )
-                                    elif comp_item_param.attrib:
-                                        name_default[component_item.tag].append(
-                                            {
-                                                comp_item_param.tag: comp_item_param.attrib
-                                            }
-                                        )
-                                comp_elements[bone_component.tag].append(name_default)
-                            attach_params[item.tag].append(comp_elements)
-                    attach_items.append(attach_params)
-                param_dictionary[param.tag] = attach_items
-
-            elif len(param) > 0:
-                param_dictionary[param.tag] = []
-                for item in param:
-                    param_dictionary[param.tag].append(item)
-            # Only has attribute with 'value'; Usually does not contain text as well
-            elif param.attrib:
-                param_dictionary[param.tag] = param.attrib
-            # Not an empty tag - Only has text
-            elif param.text:
-                param_dictionary[param.tag] = param.text
-            else:
-                # No attribute or text - Empty tag
-                param_dictionary[param.tag] = None
-
-        parsed_object_list.append(GTAObjects(param_dictionary))
+        parsed_object_list.append(parse_object_element(element_object, obj_type))
     logger.info("Parsed objects from file.")
     return parsed_object_list
 
 
-def attr_db(parsed_object_list):
+def parse_object_element(element_object, obj_type=None):
     """
-    Return a dictionary of available values for each parameter
-    Fills combo boxes for each parameter
+    Parse a single object element (Ped/ Weapon <Item>) into a GTAObjects
     """
-    parameter_database = {}
-
-    for gta_object in parsed_object_list:
-        for k, v in gta_object.return_att_dict().items():
-            if v == None:
-                continue
-            elif k == "OverrideForces":
-                continue
-            elif k == "AttachPoints":
-                continue
-            elif k == "WeaponFlags":
-                if k not in parameter_database:
-                    parameter_database[k] = set()
-                else:
-                    # Need to strip blank/ new line. Split flags to list
-                    for flag in v.strip().strip("\n").strip().split(" "):
-                        parameter_database[k].add(flag)
-            # elif k == 'WeaponFlags' and (k in parameter_database):
 
-            elif isinstance(v, LET._Attrib):
-                parameter_database[k] = v
+    with instrument.span("object_construction", items=1):
+        return GTAObjects(element_params(element_object, obj_type))
 
-            elif (k not in parameter_database) and isinstance(v, list):
-                parameter_database[k] = {child.text for child in v}
 
-            elif k not in parameter_database:
-                parameter_database[k] = {v}
+def element_params(element_object, obj_type=None):
+    """
+    Param dictionary of an object element - See parse_object_element
+    """
+
+    param_dictionary = {}
+    param_dictionary["object_type"] = obj_type
+    for param in element_object:
+        # Parameter has child elements
+        # Weapons.meta specific parse
+
+        # Weapon OverrideForces
+        if param.tag == "OverrideForces":
+            override_forces_parsed = []
+            # OverrideForces Item
+            for item in param.findall("Item"):
+                force_item = {}
+                force_item[item.tag] = []
+                # BoneTag, Forcefront, forceback
+                for item_param in item.findall("*"):
+                    if item_param.text:
+                        force_item[item.tag].append({item_param.tag: item_param.text})
+                    elif item_param.attrib:
+                        force_item[item.tag].append(
+                            {item_param.tag: dict(item_param.attrib)}
+                        )
+                override_forces_parsed.append(force_item)
+            param_dictionary[param.tag] = override_forces_parsed
+
+        # Weapon AttachPoints - Has multiple children elements
+        elif param.tag == "AttachPoints":
+            attach_items = []
+            # All attachpoint <Item> elements
+            for item in param.findall("*"):
+                attach_params = {}
+                attach_params[item.tag] = []
+                # AttachBone & Component elements
+                for bone_component in item.findall("*"):
+                    # AttachBone Element
+                    if bone_component.tag == "AttachBone":
+                        attach_params[item.tag].append(
+                            {bone_component.tag: bone_component.text}
+                        )
+                    # Component Element - Has children
+                    elif bone_component.tag == "Components":
+                        comp_elements = {}
+                        comp_elements[bone_component.tag] = []
+                        # Component <Item> Elements
+                        for component_item in bone_component.findall("*"):
+                            name_default = {}
+                            name_default[component_item.tag] = []
+                            # Dictionary for component elements
+                            for comp_item_param in component_item.findall("*"):
+                                # Add individual param for each component
+                                if comp_item_param.text:
+                                    name_default[component_item.tag].append(
+                                        {comp_item_param.tag: comp_item_param.text}
+                                    )
+                                elif comp_item_param.attrib:
+                                    name_default[component_item.tag].append(
+                                        {
+                                            comp_item_param.tag: dict(
+                                                comp_item_param.attrib
+                                            )
+                                        }
+                                    )
+                            comp_elements[bone_component.tag].append(name_default)
+                        attach_params[item.tag].append(comp_elements)
+                attach_items.append(attach_params)
+            param_dictionary[param.tag] = attach_items
+
+        # Children are kept as a tuple of ParamNodes
+        elif len(param) > 0:
+            param_dictionary[param.tag] = tuple(
+                element_to_node(item) for item in param if isinstance(item.tag, str)
+            )
+        # Only has attribute with 'value'; Usually does not contain text as well
+        elif param.attrib:
+            param_dictionary[param.tag] = dict(param.attrib)
+        # Space separated flags - Parsed once into a bitmask
+        elif param.tag == "WeaponFlags" and param.text:
+            param_dictionary[param.tag] = WeaponFlags(param.text)
+        # Not an empty tag - Only has text
+        elif param.text:
+            param_dictionary[param.tag] = param.text
+        else:
+            # No attribute or text - Empty tag
+            param_dictionary[param.tag] = None
+
+    return param_dictionary
+
+
+def attr_db(parsed_object_list):
+    """
+    Return a dictionary of available values for each parameter
+    Fills combo boxes for each parameter
+    Use ParamValueIndex directly to keep the values up to date as objects change
+    """
+    with instrument.span("attr_db", items=len(parsed_object_list)):
+        parameter_database = param_value_sets(parsed_object_list)
 
-            elif k in parameter_database and isinstance(v, list):
-                for child in v:
-                    parameter_database[k].add(child.text)
-            else:
-                parameter_database[k].add(v)
     logger.info("Parameter database populated")
     return parameter_database
 
 
 def generate_new_object(object_template=None, new_val_dict=None):
-
     """
     Create the new object (Ped, weapon, etc.) with a template
 
@@ -256,18 +516,316 @@ def generate_new_object(object_template=None, new_val_dict=None):
         logger.error("Failed to generate a new object.")
         return error_mess
     else:
-        # Deepcopy so I don't override the template ped
-        new_object = copy.deepcopy(object_template)
-        new_object.update_attr(new_val_dict)
+        # Copy-on-write overlay so I don't override the template ped
+        # Only the changed params are stored on the new object
+        with instrument.span("generate", items=1):
+            new_object = GTAObjectOverlay(object_template)
+            new_object.update_attr(new_val_dict)
 
-        logger.info("Created a new object with updated values")
+        logger.debug("Created a new object with updated values")
         return new_object, error_mess
 
 
-def xml_writer(new_object, save_path, object_type=None, other_params=None):
+def generate_batch(object_list, batch_rows):
+    """
+    Create many new objects from templates in one go
+    batch_rows -> list of (template name, new_val_dict, slot params)
+    Returns a list of (new object, slot params) pairs for xml_batch_writer and error messages
+    """
+    error_list = []
+    generated_objects = list(iter_generate_batch(object_list, batch_rows, error_list))
+
+    logger.info(f"Generated {len(generated_objects)} objects in batch.")
+    return generated_objects, error_list
+
+
+def iter_generate_batch(object_list, batch_rows, error_list):
+    """
+    Generator version of generate_batch for xml_stream_writer
+    Objects are created one at a time, error messages are added to error_list
+    """
+    # Template names are case insensitive like the template picker
+    templates = NameIndex(object_list)
+
+    for template_name, new_val_dict, slot_params in batch_rows:
+        object_template = templates.get(template_name.upper())
+        if object_template is None:
+            error_list.append(f"INVALID TEMPLATE: {template_name}")
+            logger.error(f"{template_name} is not a valid template.")
+            continue
+
+        err_message = check_new_values(object_template, new_val_dict)
+        if err_message:
+            error_list.append(f"{err_message}: {template_name}")
+            logger.error(f"{template_name} batch row skipped: {err_message}")
+            continue
+
+        new_object, error_mess = generate_new_object(object_template, new_val_dict)
+        yield new_object, slot_params
+
+
+def check_new_values(object_template, new_val_dict):
+    """
+    Error message if new_val_dict can't be applied to the template - None if it can
+    Params must exist on the template and values must fit them: text (or None),
+    attribute dict or text for attribute params, WeaponFlags or text, lists for children
+    """
+    if not isinstance(new_val_dict, dict):
+        return "GENERATE FAILED"
+
+    for param, value in new_val_dict.items():
+        try:
+            cur_val = object_template.peek_attr(param)
+        except AttributeError:
+            return f"UNKNOWN PARAMETER: {param}"
+
+        if param == "WeaponFlags":
+            value_fits = value is None or isinstance(value, (str, WeaponFlags))
+        elif isinstance(cur_val, dict):
+            value_fits = isinstance(value, str) or (
+                isinstance(value, dict)
+                and all(isinstance(item, str) for item in value.values())
+            )
+        elif isinstance(cur_val, (list, tuple)):
+            value_fits = isinstance(value, (list, tuple))
+        else:
+            # None -> empty tag
+            value_fits = value is None or isinstance(value, str)
+
+        if not value_fits:
+            return f"INVALID VALUE FOR {param}: {value!r}"
+
+    return None
+
+
+def batch_slot_entries(object_list, batch_rows):
+    """
+    (weapon slot, slot params) of each batch row without generating the objects
+    xml_stream_writer needs them before the first weapon is written
+    """
+    templates = NameIndex(object_list)
+    slot_entries = []
+
+    for template_name, new_val_dict, slot_params in batch_rows:
+        object_template = templates.get(template_name.upper())
+        # Rows iter_generate_batch skips get no slot entries
+        if (
+            object_template is not None
+            and slot_params
+            and not check_new_values(object_template, new_val_dict)
+        ):
+            weapon_slot = new_val_dict.get("Slot", object_template.Slot)
+            slot_entries.append((weapon_slot, slot_params))
+
+    return slot_entries
+
+
+def xml_writer(
+    new_object, save_path, object_type=None, other_params=None, in_place=False
+):
     """
     Appends the custom object to the respective META file. If no file is present, will create one first.
+    in_place=True splices the object into an existing file (see append_in_place)
+    """
+    xml_batch_writer([(new_object, other_params)], save_path, object_type, in_place)
+
+
+def xml_batch_writer(new_objects, save_path, object_type=None, in_place=False):
+    """
+    Appends many custom objects to the respective META file with a single read and write
+    new_objects -> list of (object, slot params) pairs. Slot params only used for weapons
+    in_place=True keeps the bytes of an existing file and only inserts the new objects
+    """
+    meta_file_path = meta_path(save_path, object_type)
+
+    if in_place and meta_file_path.exists():
+        if append_in_place(meta_file_path, new_objects, object_type):
+            logger.info(f"{len(new_objects)} objects appended to {meta_file_path}")
+            return
+        logger.info(f"{meta_file_path} layout not recognized. Rewriting the file.")
+
+    if meta_file_path.exists():
+        # Need parser to reset formating of existing file
+        xml_parser = LET.XMLParser(remove_blank_text=True)
+        file_size = meta_file_path.stat().st_size
+        with instrument.span("lxml_parse", items=1, bytes=file_size):
+            object_tree = LET.ElementTree(file=str(meta_file_path), parser=xml_parser)
+
+        logger.info(f"{meta_file_path} file found. Objects will be appended to it.")
+    # Reconstruct the tree from scratch if no existing file
+    else:
+        object_tree = new_meta_tree(object_type)
+        logger.info(f"{meta_file_path} file not found. Will generate a new one.")
+
+    for new_object, other_params in new_objects:
+        object_item = append_object_item(object_tree, object_type)
+        if object_type == "weap":
+            append_weapon_slots(object_tree, new_object.Slot, other_params)
+        build_object_element(new_object, object_item)
+
+    with instrument.span("serialization", items=len(new_objects)) as write_span:
+        object_tree.write(
+            str(meta_file_path),
+            encoding="utf-8",
+            xml_declaration=True,
+            pretty_print=True,
+        )
+        write_span.bytes = meta_file_path.stat().st_size
+
+    logger.info(f"{len(new_objects)} objects written to {meta_file_path}")
+
+
+def xml_stream_writer(new_objects, save_path, object_type, slot_entries=()):
+    """
+    Write a new META file object by object with lxml's incremental writer (xmlfile)
+    Memory use does not grow with the number of objects. Replaces an existing file
+    only once every object was written
+    new_objects -> iterable of (object, slot params) pairs, e.g. iter_generate_batch
+    slot_entries -> (weapon slot, slot params) written before the weapons (batch_slot_entries)
+    Output is the same as xml_batch_writer writing the objects to a new file
+    """
+    meta_file_path = meta_path(save_path, object_type)
+    object_count = 0
+
+    # Streamed to a temp file next to the target - A failed run leaves the old file
+    temp_file = tempfile.NamedTemporaryFile(
+        dir=meta_file_path.parent,
+        prefix=f".{meta_file_path.name}.",
+        suffix=".tmp",
+        delete=False,
+    )
+
+    try:
+        with temp_file as meta_file:
+            with LET.xmlfile(meta_file, encoding="UTF-8") as xml_out:
+                xml_out.write_declaration()
+
+                if object_type == "ped":
+                    with xml_out.element("CPedModelInfo__InitDataList"):
+                        xml_out.write("\n  ")
+                        with xml_out.element("InitDatas"):
+                            for new_object, _ in new_objects:
+                                write_object_item(xml_out, new_object, object_type, 2)
+                                object_count += 1
+                            xml_out.write("\n  ")
+                        xml_out.write("\n")
+
+                elif object_type == "weap":
+                    with xml_out.element("CWeaponInfoBlob"):
+                        write_weapon_slot_lists(xml_out, slot_entries)
+
+                        for tag in (
+                            "TintSpecValues",
+                            "FiringPatternAliases",
+                            "UpperBodyFixupExpressionData",
+                            "AimingInfos",
+                        ):
+                            xml_out.write("\n  ")
+                            xml_out.write(LET.Element(tag))
+
+                        # CWeaponInfoBlob/Infos/Item/Infos/<Weapon items>
+                        xml_out.write("\n  ")
+                        with xml_out.element("Infos"):
+                            xml_out.write("\n    ")
+                            with xml_out.element("Item"):
+                                xml_out.write("\n      ")
+                                with xml_out.element("Infos"):
+                                    for new_object, _ in new_objects:
+                                        write_object_item(
+                                            xml_out, new_object, object_type, 4
+                                        )
+                                        object_count += 1
+                                    xml_out.write("\n      ")
+                                xml_out.write("\n    ")
+                            xml_out.write("\n  ")
+
+                        xml_out.write("\n  ")
+                        xml_out.write(LET.Element("VehicleWeaponInfos"))
+                        xml_out.write("\n  ")
+                        name_element = LET.Element("Name")
+                        name_element.text = "Custom Weapon Addons"
+                        xml_out.write(name_element)
+                        xml_out.write("\n")
+
+            meta_file.write(b"\n")
+            meta_file.flush()
+            os.fsync(meta_file.fileno())
+            instrument.count("serialization", items=0, bytes=meta_file.tell())
+
+        copy_file_mode(meta_file_path, temp_file.name)
+    except BaseException:
+        os.unlink(temp_file.name)
+        raise
 
+    # The file has to be closed before it can be replaced on Windows
+    os.replace(temp_file.name, meta_file_path)
+
+    logger.info(f"{object_count} objects streamed to {meta_file_path}")
+
+
+def copy_file_mode(meta_file_path, temp_path):
+    """
+    Give a temp file the permissions of the file it replaces
+    New files get the default permissions open() would give them
+    """
+    if meta_file_path.exists():
+        shutil.copymode(meta_file_path, temp_path)
+    else:
+        # umask can only be read by setting it
+        umask = os.umask(0)
+        os.umask(umask)
+        os.chmod(temp_path, 0o666 & ~umask)
+
+
+def write_object_item(xml_out, new_object, object_type, level):
+    """
+    Build, indent and write one object <Item> - The element is dropped afterwards
+    """
+    object_item = LET.Element("Item")
+    if object_type == "weap":
+        object_item.set("type", "CWeaponInfo")
+    build_object_element(new_object, object_item)
+
+    write_indented(xml_out, object_item, level)
+
+
+def write_indented(xml_out, element, level):
+    """
+    Write an element pretty printed at an indent level (2 spaces per level)
+    """
+    with instrument.span("serialization", items=1):
+        LET.indent(element, space="  ", level=level)
+        xml_out.write("\n" + "  " * level)
+        xml_out.write(element)
+
+
+def write_weapon_slot_lists(xml_out, slot_entries):
+    """
+    SlotNavigateOrder (2 identical WeaponSlots lists) and SlotBestOrder
+    """
+    slot_items = {"SlotNavigateOrder": [], "SlotBestOrder": []}
+    for weapon_slot, slot_params in slot_entries:
+        for slot_label, slot_number in slot_params:
+            slot_items[slot_label].append(weapon_slot_item(weapon_slot, slot_number))
+
+    slot_nav_base = LET.Element("SlotNavigateOrder")
+    for _ in range(2):
+        slot_weap_list = LET.SubElement(
+            LET.SubElement(slot_nav_base, "Item"), "WeaponSlots"
+        )
+        slot_weap_list.extend(
+            copy.deepcopy(slot_item) for slot_item in slot_items["SlotNavigateOrder"]
+        )
+    write_indented(xml_out, slot_nav_base, 1)
+
+    slot_best_base = LET.Element("SlotBestOrder")
+    LET.SubElement(slot_best_base, "WeaponSlots").extend(slot_items["SlotBestOrder"])
+    write_indented(xml_out, slot_best_base, 1)
+
+
+def meta_path(save_path, object_type):
+    """
+    Path of the META file for an object type in the save directory
     """
     object_type_dict = {
         "ped": "peds",
@@ -280,106 +838,285 @@ def xml_writer(new_object, save_path, object_type=None, other_params=None):
         "pickup": "pickups",
     }
 
-    meta_file_path = Path(f"{save_path}/{object_type_dict[object_type]}.meta")
+    return Path(f"{save_path}/{object_type_dict[object_type]}.meta")
 
-    if meta_file_path.exists():
-        # Need parser to reset formating of existing file
-        xml_parser = LET.XMLParser(remove_blank_text=True)
-        object_tree = LET.ElementTree(file=str(meta_file_path), parser=xml_parser)
 
-        if object_type == "ped":
-            # InitDatas is the root for all ped items
-            tree_root = object_tree.getroot().find("InitDatas")
-            object_item = LET.SubElement(tree_root, "Item")
+def new_meta_tree(object_type):
+    """
+    Empty META file skeleton for an object type
+    """
+    if object_type == "ped":
+        ped_xml_root = LET.Element("CPedModelInfo__InitDataList")
+        LET.SubElement(ped_xml_root, "InitDatas")
+
+        return LET.ElementTree(ped_xml_root)
+
+    elif object_type == "weap":
+        # CWeaponInfoBlob/Infos/Item/Infos/<Weapon items>
+        main_weap_tags = [
+            "TintSpecValues",
+            "FiringPatternAliases",
+            "UpperBodyFixupExpressionData",
+            "AimingInfos",
+        ]
+        weap_xml_root = LET.Element("CWeaponInfoBlob")
+
+        # SlotNavigateOrder needs 2 identical WeaponSlots lists
+        slot_nav_base = LET.SubElement(weap_xml_root, "SlotNavigateOrder")
+        for _ in range(2):
+            LET.SubElement(LET.SubElement(slot_nav_base, "Item"), "WeaponSlots")
+        # No initial item tag in SlotBestOrder
+        slot_best_base = LET.SubElement(weap_xml_root, "SlotBestOrder")
+        LET.SubElement(slot_best_base, "WeaponSlots")
+
+        # ALl other empty tags
+        for tag in main_weap_tags:
+            LET.SubElement(weap_xml_root, tag)
 
-        elif object_type == "weap":
-            tree_root = object_tree.getroot().find("Infos/Item/Infos")
-            object_item = LET.SubElement(tree_root, "Item", {"type": "CWeaponInfo"})
+        weap_info_root = LET.SubElement(weap_xml_root, "Infos")
+        weap_item_root = LET.SubElement(weap_info_root, "Item")
+        LET.SubElement(weap_item_root, "Infos")
 
-            # Slot creation
-            slotnav_root = object_tree.getroot().find("SlotNavigateOrder")
-            slotbest_root = object_tree.getroot().find("SlotBestOrder/WeaponSlots")
+        LET.SubElement(weap_xml_root, "VehicleWeaponInfos")
+        LET.SubElement(weap_xml_root, "Name").text = "Custom Weapon Addons"
 
-            for slot_item in other_params:
-                slot_label, slot_number = slot_item
+        return LET.ElementTree(weap_xml_root)
 
-                if slot_label == "SlotNavigateOrder":
-                    slot_base_item = slotnav_root.findall("Item/WeaponSlots")
 
-                    slot_nav_item = LET.Element("Item")
-                    LET.SubElement(slot_nav_item, "OrderNumber", {"value": slot_number})
-                    LET.SubElement(slot_nav_item, "Entry").text = new_object.Slot
+def append_object_item(object_tree, object_type):
+    """
+    Add an empty object <Item> to a META tree and return it
+    """
+    if object_type == "ped":
+        # InitDatas is the root for all ped items
+        tree_root = object_tree.getroot().find("InitDatas")
+        return LET.SubElement(tree_root, "Item")
 
-                    for slot_weap_item in slot_base_item:
-                        slot_weap_item.append(copy.deepcopy(slot_nav_item))
+    elif object_type == "weap":
+        tree_root = object_tree.getroot().find("Infos/Item/Infos")
+        return LET.SubElement(tree_root, "Item", {"type": "CWeaponInfo"})
 
-                else:
-                    slot_best_item = LET.Element("Item")
-                    LET.SubElement(
-                        slot_best_item, "OrderNumber", {"value": slot_number}
-                    )
-                    LET.SubElement(slot_best_item, "Entry").text = new_object.Slot
-                    slotbest_root.append(copy.deepcopy(slot_best_item))
-
-        logger.info(f"{meta_file_path} file found. Object will be appended to it.")
-    # Reconstruct the tree from scratch if no existing file
+
+def append_weapon_slots(object_tree, weapon_slot, other_params):
+    """
+    Add the weapon slot to SlotNavigateOrder/ SlotBestOrder
+    other_params -> List of Tuples (slotname label, number)
+    """
+    slotnav_root = object_tree.getroot().find("SlotNavigateOrder")
+    slotbest_root = object_tree.getroot().find("SlotBestOrder/WeaponSlots")
+
+    for slot_item in other_params or []:
+        slot_label, slot_number = slot_item
+
+        slot_weap_item = weapon_slot_item(weapon_slot, slot_number)
+
+        if slot_label == "SlotNavigateOrder":
+            for slot_weap_list in slotnav_root.findall("Item/WeaponSlots"):
+                slot_weap_list.append(copy.deepcopy(slot_weap_item))
+        else:
+            slotbest_root.append(slot_weap_item)
+
+
+def weapon_slot_item(weapon_slot, slot_number):
+    """
+    <Item> of a WeaponSlots list
+    """
+    slot_weap_item = LET.Element("Item")
+    LET.SubElement(slot_weap_item, "OrderNumber", {"value": slot_number})
+    LET.SubElement(slot_weap_item, "Entry").text = weapon_slot
+    return slot_weap_item
+
+
+def append_in_place(meta_file_path, new_objects, object_type):
+    """
+    Splice new objects into an existing META file without parsing it
+    Insertion points are found with a byte scan (meta_scan), only the new objects
+    are serialized and the file is replaced atomically (temp file + rename)
+    Returns False if the file layout is not understood - Nothing is written then
+    """
+    with open(meta_file_path, "rb") as meta_file:
+        try:
+            meta_data = mmap.mmap(meta_file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Empty file
+            return False
+
+        with meta_data:
+            needs_slots = any(other_params for _, other_params in new_objects)
+            insert_points = meta_insert_points(meta_data, object_type, needs_slots)
+            if insert_points is None:
+                return False
+
+            insertions = []
+            for new_object, other_params in new_objects:
+                object_item = LET.Element("Item")
+                if object_type == "weap":
+                    object_item.set("type", "CWeaponInfo")
+                build_object_element(new_object, object_item)
+                insertions.append(
+                    fragment_insertion(insert_points["objects"], object_item)
+                )
+
+                for slot_label, slot_number in other_params or []:
+                    slot_weap_item = weapon_slot_item(new_object.Slot, slot_number)
+                    for slot_point in insert_points[slot_label]:
+                        insertions.append(
+                            fragment_insertion(slot_point, slot_weap_item)
+                        )
+
+            temp_path = write_spliced_file(meta_file_path, meta_data, insertions)
+
+    # The file has to be closed before it can be replaced on Windows
+    os.replace(temp_path, meta_file_path)
+    return True
+
+
+def meta_insert_points(meta_data, object_type, needs_slots=False):
+    """
+    Where new items go in a META file - Label -> list of closing_line points
+    Peds -> end of InitDatas, Weapons -> end of Infos/Item/Infos and the WeaponSlots lists
+    None if a list is missing, empty (<Tag/>) or not pretty printed
+    """
+    insert_points = {}
+
+    if object_type == "ped":
+        object_list = meta_scan.find_element(meta_data, "InitDatas")
     else:
-        if object_type == "ped":
-            ped_xml_root = LET.Element("CPedModelInfo__InitDataList")
-            ped_data_root = LET.SubElement(ped_xml_root, "InitDatas")
-            object_item = LET.SubElement(ped_data_root, "Item")
-
-            object_tree = LET.ElementTree(ped_xml_root)
-        elif object_type == "weap":
-            # CWeaponInfoBlob/Infos/Item/Infos/<Weapon items>
-            main_weap_tags = [
-                "TintSpecValues",
-                "FiringPatternAliases",
-                "UpperBodyFixupExpressionData",
-                "AimingInfos",
+        object_list = None
+        infos_root = meta_scan.find_element(meta_data, "Infos")
+        if infos_root:
+            object_list = meta_scan.find_element(meta_data, "Infos", infos_root[0] + 1)
+            if object_list and object_list[1] > infos_root[1]:
+                object_list = None
+
+    insert_points["objects"] = [closing_line(meta_data, object_list)]
+
+    if needs_slots:
+        for slot_label in ("SlotNavigateOrder", "SlotBestOrder"):
+            insert_points[slot_label] = [
+                closing_line(meta_data, slot_list)
+                for slot_list in weapon_slot_lists(meta_data, slot_label)
             ]
-            weap_xml_root = LET.Element("CWeaponInfoBlob")
-
-            # slotnavigate/slotbest order items.
-            # List of Tuples (slotname label, number)
-            for slot_item in other_params:
-                slot_label, slot_number = slot_item
-
-                slot_base = LET.SubElement(weap_xml_root, slot_label)
-                # No initial item tag in slotnavigate order
-                if slot_label == "SlotNavigateOrder":
-                    slot_base_item = LET.Element("Item")
-                    slot_weaponslots = LET.SubElement(slot_base_item, "WeaponSlots")
-                else:
-                    slot_weaponslots = LET.Element("WeaponSlots")
+            if not insert_points[slot_label]:
+                return None
 
-                slot_weapslot_item = LET.SubElement(slot_weaponslots, "Item")
-                LET.SubElement(
-                    slot_weapslot_item, "OrderNumber", {"value": slot_number}
-                )
-                LET.SubElement(slot_weapslot_item, "Entry").text = new_object.Slot
+    if any(None in points for points in insert_points.values()):
+        return None
+
+    insert_points["objects"] = insert_points["objects"][0]
+    return insert_points
 
-                if slot_label == "SlotNavigateOrder":
-                    slot_base.append(copy.deepcopy(slot_base_item))
-                    slot_base.append(copy.deepcopy(slot_base_item))
-                else:
-                    slot_base.append(slot_weaponslots)
 
-            # ALl other empty tags
-            for tag in main_weap_tags:
-                LET.SubElement(weap_xml_root, tag)
+def weapon_slot_lists(meta_data, slot_label):
+    """
+    (start offset, end offset) of every WeaponSlots list of SlotNavigateOrder/ SlotBestOrder
+    """
+    slot_root = meta_scan.find_element(meta_data, slot_label)
+    if not slot_root:
+        return []
 
-            weap_info_root = LET.SubElement(weap_xml_root, "Infos")
-            weap_item_root = LET.SubElement(weap_info_root, "Item")
-            weap_sub_info = LET.SubElement(weap_item_root, "Infos")
-            object_item = LET.SubElement(weap_sub_info, "Item", {"type": "CWeaponInfo"})
+    slot_lists = []
+    position = slot_root[0] + 1
+    while True:
+        slot_list = meta_scan.find_element(meta_data, "WeaponSlots", position)
+        if not slot_list or slot_list[1] > slot_root[1]:
+            return slot_lists
+        slot_lists.append(slot_list)
+        position = slot_list[1]
 
-            LET.SubElement(weap_xml_root, "VehicleWeaponInfos")
-            LET.SubElement(weap_xml_root, "Name").text = "Custom Weapon Addons"
 
-            object_tree = LET.ElementTree(weap_xml_root)
-        logger.info(f"{meta_file_path} file not found. Will generate a new one.")
-    # All children elements under object Item
+def closing_line(meta_data, element_span):
+    """
+    (line offset, indent, newline) of the closing tag of an element
+    New children are inserted at the start of that line, one indent level deeper
+    None if the element is missing, empty or its closing tag is not on its own line
+    """
+    if not element_span:
+        return None
+
+    element_start, element_end = element_span
+    if meta_data[element_end - 2 : element_end] == b"/>":
+        return None
+
+    close_start = meta_data.rfind(b"</", element_start, element_end)
+    line_start = meta_data.rfind(b"\n", element_start, close_start) + 1
+    indent = meta_data[line_start:close_start]
+    if line_start == 0 or indent.strip(b" \t"):
+        return None
+
+    newline = "\r\n" if meta_data[line_start - 2 : line_start] == b"\r\n" else "\n"
+    return line_start, indent.decode("ascii"), newline
+
+
+def fragment_insertion(insert_point, element):
+    """
+    (offset, bytes) of a pretty printed element to insert at a closing_line point
+    Only whitespace between tags is added - Text values are written as is
+    """
+    line_start, indent, newline = insert_point
+    child_indent = indent + "  "
+
+    element = copy.deepcopy(element)
+    LET.indent(element, space="  ")
+    for sub_element in element.iter():
+        if len(sub_element) and sub_element.text and not sub_element.text.strip():
+            sub_element.text = sub_element.text.replace("\n", newline + child_indent)
+        if sub_element is not element and sub_element.tail:
+            sub_element.tail = sub_element.tail.replace("\n", newline + child_indent)
+
+    with instrument.span("serialization", items=1) as write_span:
+        fragment = child_indent + LET.tostring(element, encoding="unicode") + newline
+        fragment = fragment.encode("utf-8")
+        write_span.bytes = len(fragment)
+    return line_start, fragment
+
+
+def write_spliced_file(meta_file_path, meta_data, insertions):
+    """
+    Write the file data with the insertions (offset, bytes) to a temp file next to it
+    Returns the temp file path - The caller renames it over the original
+    """
+    temp_file = tempfile.NamedTemporaryFile(
+        dir=meta_file_path.parent,
+        prefix=f".{meta_file_path.name}.",
+        suffix=".tmp",
+        delete=False,
+    )
+
+    try:
+        with temp_file, instrument.span("file_write", items=1) as write_span:
+            position = 0
+            # Stable sort - Items for the same list keep their order
+            for offset, fragment in sorted(insertions, key=lambda item: item[0]):
+                temp_file.write(meta_data[position:offset])
+                temp_file.write(fragment)
+                position = offset
+            temp_file.write(meta_data[position:])
+
+            temp_file.flush()
+            os.fsync(temp_file.fileno())
+            write_span.bytes = temp_file.tell()
+
+        shutil.copymode(meta_file_path, temp_file.name)
+    except BaseException:
+        os.unlink(temp_file.name)
+        raise
+
+    return temp_file.name
+
+
+def build_object_element(new_object, object_item):
+    """
+    Fill an object <Item> element with all parameters of the object
+    """
+    with instrument.span("tree_build", items=1):
+        fill_object_element(new_object, object_item)
+
+
+def fill_object_element(new_object, object_item):
+    """
+    Parameter elements of build_object_element
+    """
     for attr, val in new_object.return_att_dict().items():
         # List datatype specifies parameter has more child elements
         if attr == "object_type":
@@ -422,12 +1159,12 @@ def xml_writer(new_object, save_path, object_type=None, other_params=None):
                             else:
                                 LET.SubElement(component_item, k, v)
 
-        # Elements with items are elements already
-        elif isinstance(val, list):
+        # Params with children - Rebuild elements from the ParamNodes
+        elif isinstance(val, (list, tuple)):
             item1_subset = LET.SubElement(object_item, attr)
             for subitem in val:
-                if isinstance(subitem, LET._Element):
-                    item1_subset.append(subitem)
+                if isinstance(subitem, ParamNode):
+                    node_to_element(subitem, item1_subset)
                 else:
                     LET.SubElement(item1_subset, "Item").text = subitem
 
@@ -435,16 +1172,14 @@ def xml_writer(new_object, save_path, object_type=None, other_params=None):
         elif isinstance(val, dict):
             LET.SubElement(object_item, attr, val)
 
+        # Canonical flag string - Only built here
+        elif isinstance(val, WeaponFlags):
+            LET.SubElement(object_item, attr).text = str(val) or None
+
         # Everything else should have text only
         else:
             LET.SubElement(object_item, attr).text = val
 
-    object_tree.write(
-        str(meta_file_path), encoding="utf-8", xml_declaration=True, pretty_print=True
-    )
-
-    logger.info(f"Object written to {meta_file_path}")
-
 
 # Weapon specific functions
 def weapon_slots(slot_groups):
@@ -456,7 +1191,7 @@ def weapon_slots(slot_groups):
     for item in slot_groups.iter("OrderNumber", "Entry"):
         if item.tag == "OrderNumber":
             # OrderNumber is attribute {value: <int>}
-            weap_slot[item.tag] = item.attrib
+            weap_slot[item.tag] = dict(item.attrib)
         if item.tag == "Entry":
             weap_slot[item.tag] = item.text
         if len(weap_slot) == 2:
@@ -584,4 +1319,10 @@ def element_maker(param, new_param_list):
             new_ele.text = pair[1]
             element_dict[param].append(new_ele)
 
+    # Objects only store plain values, not lxml elements
+    if param not in ("OverrideForces", "AttachPoints"):
+        element_dict[param] = tuple(
+            element_to_node(element) for element in element_dict[param]
+        )
+
     return element_dict
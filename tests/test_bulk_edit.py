@@ -0,0 +1,52 @@
+from pathlib import Path
+import warnings
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from functions import xml_parse
+from functions.bulk_edit import bulk_edit
+
+DATABASE_DIR = Path(__file__).resolve().parents[1] / "database"
+
+
+@pytest.fixture(scope="module")
+def weapons():
+    object_list, _, _ = xml_parse.xml_meta_parser(str(DATABASE_DIR / "weapons.meta"))
+    return object_list
+
+
+def test_bulk_edit_changes_selected_objects(weapons):
+    edited, err_message = bulk_edit(
+        weapons, ["Name=WEAPON_PISTOL"], ["Damage = clip(Damage * 2, 0, 30)"]
+    )
+
+    assert err_message is None
+    assert [edited_object.Damage for edited_object in edited] == [
+        {"value": "30.000000"}
+    ]
+
+
+@pytest.mark.parametrize(
+    "expression",
+    ["Damage = min(Damage)", "Damage = abs(Damage, 1)", "Damage = clip(Damage)"],
+)
+def test_bulk_edit_wrong_argument_count(weapons, expression):
+    edited, err_message = bulk_edit(weapons, ["Name=WEAPON_PISTOL"], [expression])
+
+    assert edited == []
+    assert "ARGUMENTS" in err_message
+
+
+@pytest.mark.parametrize(
+    "expression",
+    ["Damage = Damage ** 1000", "Damage = Damage / 0", "HudDamage = HudDamage ** 40"],
+)
+def test_bulk_edit_overflow_is_an_error(weapons, expression):
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        edited, err_message = bulk_edit(weapons, ["Name=WEAPON_PISTOL"], [expression])
+
+    assert edited == []
+    assert "INVALID RESULT" in err_message
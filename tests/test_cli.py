@@ -0,0 +1,272 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from functions import cli
+from functions import xml_parse
+from functions.name_index import NameIndex
+
+DATABASE_DIR = Path(__file__).resolve().parents[1] / "database"
+
+
+def write_file(path, text):
+    path.write_text(text, encoding="utf-8")
+    return str(path)
+
+
+def test_read_batch_file_csv(tmp_path):
+    batch_file = write_file(
+        tmp_path / "batch.csv",
+        "Template,Name,SlotNavigateOrder\nWEAPON_PISTOL,MY_PISTOL,500\n",
+    )
+    batch_rows, err_message = cli.read_batch_file(batch_file, "weap")
+
+    assert err_message is None
+    assert batch_rows == [
+        (
+            "WEAPON_PISTOL",
+            {"Name": "MY_PISTOL"},
+            [("SlotNavigateOrder", "500"), ("SlotBestOrder", "0")],
+        )
+    ]
+
+
+def test_read_batch_file_csv_without_template_column(tmp_path):
+    batch_file = write_file(tmp_path / "batch.csv", "Name\nMY_PISTOL\n")
+    batch_rows, err_message = cli.read_batch_file(batch_file, "weap")
+
+    assert batch_rows == []
+    assert "MISSING Template COLUMN" in err_message
+
+
+def test_read_batch_file_csv_with_empty_template(tmp_path):
+    batch_file = write_file(
+        tmp_path / "batch.csv", "Template,Name\nWEAPON_PISTOL,A\n,B\n"
+    )
+    batch_rows, err_message = cli.read_batch_file(batch_file, "weap")
+
+    assert batch_rows == []
+    assert "line 3: MISSING TEMPLATE" in err_message
+
+
+def test_read_batch_file_json_with_null_overrides(tmp_path):
+    batch_file = write_file(
+        tmp_path / "batch.json",
+        json.dumps([{"template": "A_C_Boar", "overrides": None}]),
+    )
+    batch_rows, err_message = cli.read_batch_file(batch_file, "ped")
+
+    assert batch_rows == []
+    assert "entry 1: OVERRIDES MUST BE AN OBJECT" in err_message
+
+
+def test_read_batch_file_json_without_template(tmp_path):
+    batch_file = write_file(
+        tmp_path / "batch.json", json.dumps([{"overrides": {"Name": "my_boar"}}])
+    )
+    batch_rows, err_message = cli.read_batch_file(batch_file, "ped")
+
+    assert batch_rows == []
+    assert "entry 1: MISSING TEMPLATE" in err_message
+
+
+def test_generate_reports_invalid_batch_file(tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    batch_file = write_file(tmp_path / "batch.csv", "Name\nMY_PISTOL\n")
+
+    exit_code = cli.main(
+        [
+            "generate",
+            str(DATABASE_DIR / "weapons.meta"),
+            batch_file,
+            "-o",
+            str(tmp_path),
+            "--no-cache",
+        ]
+    )
+
+    assert exit_code == 1
+    assert "MISSING Template COLUMN" in capsys.readouterr().err
+    assert not Path(xml_parse.meta_path(str(tmp_path), "weap")).exists()
+
+
+def test_iter_generate_batch_skips_rows_that_fail():
+    object_list, _, _ = xml_parse.xml_meta_parser(str(DATABASE_DIR / "weapons.meta"))
+    error_list = []
+    batch_rows = [
+        ("WEAPON_PISTOL", None, None),
+        ("WEAPON_PISTOL", {"Name": "MY_PISTOL"}, None),
+    ]
+
+    generated = list(xml_parse.iter_generate_batch(object_list, batch_rows, error_list))
+
+    assert [new_object.Name for new_object, _ in generated] == ["MY_PISTOL"]
+    assert error_list == ["GENERATE FAILED: WEAPON_PISTOL"]
+
+
+def test_iter_generate_batch_records_bad_values():
+    object_list, _, _ = xml_parse.xml_meta_parser(str(DATABASE_DIR / "weapons.meta"))
+    error_list = []
+    batch_rows = [
+        ("WEAPON_PISTOL", {"NotAParam": "5"}, None),
+        ("WEAPON_PISTOL", {"Damage": 30}, None),
+        ("WEAPON_PISTOL", {"Name": "MY_PISTOL", "Damage": "30"}, None),
+    ]
+
+    generated = list(xml_parse.iter_generate_batch(object_list, batch_rows, error_list))
+
+    assert [new_object.Damage for new_object, _ in generated] == [{"value": "30"}]
+    assert error_list == [
+        "UNKNOWN PARAMETER: NotAParam: WEAPON_PISTOL",
+        "INVALID VALUE FOR Damage: 30: WEAPON_PISTOL",
+    ]
+
+
+def test_xml_stream_writer_keeps_the_old_file_on_failure(tmp_path):
+    object_list, _, _ = xml_parse.xml_meta_parser(str(DATABASE_DIR / "peds.ymt.xml"))
+    meta_file = tmp_path / "peds.meta"
+    meta_file.write_bytes(b"OLD FILE")
+
+    def failing_objects():
+        yield object_list[0], None
+        raise RuntimeError("generate failed")
+
+    with pytest.raises(RuntimeError):
+        xml_parse.xml_stream_writer(failing_objects(), tmp_path, "ped")
+
+    assert meta_file.read_bytes() == b"OLD FILE"
+    assert [path.name for path in tmp_path.iterdir()] == ["peds.meta"]
+
+    xml_parse.xml_stream_writer([(object_list[0], None)], tmp_path, "ped")
+    streamed_list, _, _ = xml_parse.xml_meta_parser(str(meta_file))
+    assert [ped.Name for ped in streamed_list] == [object_list[0].Name]
+    assert [path.name for path in tmp_path.iterdir()] == ["peds.meta"]
+
+
+@pytest.fixture(scope="module")
+def weapon_templates():
+    object_list, _, _ = xml_parse.xml_meta_parser(str(DATABASE_DIR / "weapons.meta"))
+    return NameIndex(object_list)
+
+
+def test_read_batch_file_unknown_param(tmp_path, weapon_templates):
+    batch_file = write_file(
+        tmp_path / "batch.csv", "Template,NotAParam\nWEAPON_PISTOL,5\n"
+    )
+    batch_rows, err_message = cli.read_batch_file(batch_file, "weap", weapon_templates)
+
+    assert batch_rows == []
+    assert "line 2: UNKNOWN PARAMETER: NotAParam" in err_message
+
+
+def test_read_batch_file_unknown_template(tmp_path, weapon_templates):
+    batch_file = write_file(tmp_path / "batch.csv", "Template,Name\nNOT_A_WEAPON,A\n")
+    batch_rows, err_message = cli.read_batch_file(batch_file, "weap", weapon_templates)
+
+    assert batch_rows == []
+    assert "line 2: INVALID TEMPLATE: NOT_A_WEAPON" in err_message
+
+
+def test_read_batch_file_json_numbers_are_text(tmp_path, weapon_templates):
+    batch_file = write_file(
+        tmp_path / "batch.json",
+        json.dumps(
+            [
+                {
+                    "template": "WEAPON_PISTOL",
+                    "overrides": {"Damage": 30, "AimOffsetMin": {"x": 0.5}},
+                }
+            ]
+        ),
+    )
+    batch_rows, err_message = cli.read_batch_file(batch_file, "weap", weapon_templates)
+
+    assert err_message is None
+    assert batch_rows[0][1] == {"Damage": "30", "AimOffsetMin": {"x": "0.5"}}
+
+
+def test_read_batch_file_json_rejects_other_values(tmp_path, weapon_templates):
+    batch_file = write_file(
+        tmp_path / "batch.json",
+        json.dumps([{"template": "WEAPON_PISTOL", "overrides": {"Damage": [30]}}]),
+    )
+    batch_rows, err_message = cli.read_batch_file(batch_file, "weap", weapon_templates)
+
+    assert batch_rows == []
+    assert "entry 1: INVALID VALUE FOR Damage" in err_message
+
+
+@pytest.mark.parametrize("stream", [False, True])
+def test_generate_reports_unknown_param(tmp_path, monkeypatch, capsys, stream):
+    monkeypatch.chdir(tmp_path)
+    batch_file = write_file(
+        tmp_path / "batch.csv", "Template,NotAParam\nWEAPON_PISTOL,5\n"
+    )
+    argv = [
+        "generate",
+        str(DATABASE_DIR / "weapons.meta"),
+        batch_file,
+        "-o",
+        str(tmp_path),
+        "--no-cache",
+    ]
+
+    exit_code = cli.main(argv + ["--stream"] if stream else argv)
+
+    assert exit_code == 1
+    assert "UNKNOWN PARAMETER: NotAParam" in capsys.readouterr().err
+    assert not Path(xml_parse.meta_path(str(tmp_path), "weap")).exists()
+
+
+def test_generate_json_number_override(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    batch_file = write_file(
+        tmp_path / "batch.json",
+        json.dumps(
+            [
+                {
+                    "template": "WEAPON_PISTOL",
+                    "overrides": {"Name": "MY_PISTOL", "Damage": 30},
+                }
+            ]
+        ),
+    )
+
+    exit_code = cli.main(
+        [
+            "generate",
+            str(DATABASE_DIR / "weapons.meta"),
+            batch_file,
+            "-o",
+            str(tmp_path),
+            "--no-cache",
+        ]
+    )
+
+    assert exit_code == 0
+    meta_text = Path(xml_parse.meta_path(str(tmp_path), "weap")).read_text()
+    assert '<Damage value="30"/>' in meta_text
+
+
+@pytest.mark.parametrize("stream", [False, True])
+def test_generate_makes_the_output_dir(tmp_path, monkeypatch, stream):
+    monkeypatch.chdir(tmp_path)
+    batch_file = write_file(
+        tmp_path / "batch.csv", "Template,Name\nWEAPON_PISTOL,MY_PISTOL\n"
+    )
+    output_dir = tmp_path / "missing" / "output"
+    argv = [
+        "generate",
+        str(DATABASE_DIR / "weapons.meta"),
+        batch_file,
+        "-o",
+        str(output_dir),
+        "--no-cache",
+    ]
+
+    exit_code = cli.main(argv + ["--stream"] if stream else argv)
+
+    assert exit_code == 0
+    new_list, _, _ = xml_parse.xml_meta_parser(str(output_dir / "weapons.meta"))
+    assert [weapon.Name for weapon in new_list] == ["MY_PISTOL"]
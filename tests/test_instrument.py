@@ -0,0 +1,24 @@
+import tracemalloc
+
+from functions import instrument
+
+
+def test_disable_leaves_tracemalloc_started_elsewhere():
+    tracemalloc.start()
+    try:
+        instrument.enable(allocations=True)
+        instrument.disable()
+        assert tracemalloc.is_tracing()
+    finally:
+        tracemalloc.stop()
+
+
+def test_disable_stops_tracemalloc_started_by_enable():
+    assert not tracemalloc.is_tracing()
+
+    instrument.enable(allocations=True)
+    assert tracemalloc.is_tracing()
+    instrument.disable()
+
+    assert not tracemalloc.is_tracing()
+    assert not instrument.enabled
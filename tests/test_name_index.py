@@ -0,0 +1,35 @@
+from types import SimpleNamespace
+
+from functions.name_index import NameIndex
+
+
+def named_objects(*names):
+    return [SimpleNamespace(Name=name) for name in names]
+
+
+def test_names_stay_sorted_through_adds_and_removes():
+    name_index = NameIndex(named_objects("WEAPON_PISTOL", "WEAPON_SMG", "A_C_Boar"))
+    name_index.add_objects(named_objects("weapon_pistol", "WEAPON_MG"))
+    name_index.add_objects(named_objects(*(f"ADDON_{i}" for i in range(50))))
+    name_index.remove_names(["WEAPON_SMG", "ADDON_7", "NOT_A_NAME"])
+
+    assert name_index.sorted_names == sorted(name_index.objects)
+    assert len(name_index) == 52
+    assert name_index.get("Weapon_Pistol").Name == "weapon_pistol"
+
+
+def test_prefix_search():
+    name_index = NameIndex(
+        named_objects("WEAPON_PISTOL", "WEAPON_PISTOL50", "WEAPON_SMG", "A_C_Boar")
+    )
+
+    assert [gta_object.Name for gta_object in name_index.prefix_search("weapon_p")] == [
+        "WEAPON_PISTOL",
+        "WEAPON_PISTOL50",
+    ]
+    assert len(name_index.prefix_search("WEAPON", limit=2)) == 2
+    assert name_index.prefix_search("Z") == []
+    assert [gta_object.Name for gta_object in name_index.search("pistol")] == [
+        "WEAPON_PISTOL",
+        "WEAPON_PISTOL50",
+    ]
@@ -0,0 +1,39 @@
+import pytest
+
+pytest.importorskip("numpy")
+
+from functions.numeric_view import NumericView
+from functions.xml_parse import GTAObjects
+
+
+def weapon(damage, spread):
+    return GTAObjects(
+        {
+            "Name": "WEAPON_TEST",
+            "Damage": {"value": damage},
+            "BulletBendingNearRadius": {"value": spread},
+        }
+    )
+
+
+def test_exponent_and_non_finite_values_round_trip():
+    object_list = [weapon("1e-05", "nan"), weapon("12", "inf"), weapon("30", "0.5")]
+    numeric_view = NumericView(object_list)
+
+    # Exponents and nan/inf make float columns - Not ints truncated to 0
+    assert numeric_view["Damage"].dtype.kind == "f"
+    assert numeric_view["BulletBendingNearRadius"].dtype.kind == "f"
+    assert numeric_view.write_back() == 0
+
+    numeric_view["Damage"] = numeric_view["Damage"] * 2
+    numeric_view["BulletBendingNearRadius"] = numeric_view["BulletBendingNearRadius"]
+    assert numeric_view.write_back() == 3
+
+    assert [gta_object.Damage["value"] for gta_object in object_list] == [
+        "2e-05",
+        "24",
+        "60",
+    ]
+    assert [
+        gta_object.BulletBendingNearRadius["value"] for gta_object in object_list
+    ] == ["nan", "inf", "0.5"]
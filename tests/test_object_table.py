@@ -0,0 +1,43 @@
+from pathlib import Path
+
+from functions import xml_parse
+from functions.object_table import load_object_table
+from functions.param_index import ParamValueIndex
+
+DATABASE_DIR = Path(__file__).resolve().parents[1] / "database"
+WEAPONS_FILE = str(DATABASE_DIR / "weapons.meta")
+
+
+def test_rows_with_equal_dicts_are_independent():
+    object_table, _, _ = load_object_table(WEAPONS_FILE)
+    # AimingInfo {"ref": "NULL"} is shared by many weapons
+    rows = [row for row in object_table if row.AimingInfo == {"ref": "NULL"}]
+    assert len(rows) > 1
+
+    rows[0].AimingInfo["ref"] = "CHANGED"
+    assert rows[1].AimingInfo == {"ref": "NULL"}
+    assert rows[0].AimingInfo == {"ref": "NULL"}
+
+    rows[0].AimingInfo = {"ref": "CHANGED"}
+    assert rows[0].AimingInfo == {"ref": "CHANGED"}
+    assert rows[1].AimingInfo == {"ref": "NULL"}
+
+
+def test_attr_db_matches_param_value_index():
+    object_list, _, _ = xml_parse.xml_meta_parser(WEAPONS_FILE)
+    object_table, _, _ = load_object_table(WEAPONS_FILE)
+
+    param_index = ParamValueIndex(object_list)
+    table_index = object_table.attr_db()
+
+    assert table_index.value_counts == param_index.value_counts
+    assert table_index.attrib_counts == param_index.attrib_counts
+
+
+def test_update_attr_on_a_row():
+    object_table, _, _ = load_object_table(WEAPONS_FILE)
+
+    object_table[0].update_attr({"Damage": "5", "Name": "ROW_WEAPON"})
+
+    assert object_table[0].Damage == {"value": "5"}
+    assert object_table[0].Name == "ROW_WEAPON"
@@ -0,0 +1,68 @@
+from pathlib import Path
+
+import pytest
+
+from functions import meta_scan
+from functions import parallel_parse
+from functions import xml_parse
+
+DATABASE_DIR = Path(__file__).resolve().parents[1] / "database"
+
+
+def param_dicts(object_list):
+    return [gta_object.return_att_dict() for gta_object in object_list]
+
+
+@pytest.mark.parametrize("meta_file", ["peds.ymt.xml", "weapons.meta"])
+def test_chunks_parse_like_the_whole_file(meta_file):
+    xml_file = str(DATABASE_DIR / meta_file)
+    object_list, _, object_type = xml_parse.xml_meta_parser(xml_file)
+
+    err_message, plan_type, chunks = parallel_parse.plan_file(xml_file, 1 << 16)
+    assert err_message is None
+    assert plan_type == object_type
+    assert len(chunks) > 1
+
+    # Workers run in this process - Same records the pool would send back
+    chunk_objects = []
+    for chunk in chunks:
+        chunk_records, chunk_error = parallel_parse.parse_chunk(
+            (xml_file, object_type, chunk)
+        )
+        assert chunk_error is None
+        chunk_objects.extend(parallel_parse.record_objects(chunk_records))
+
+    assert param_dicts(chunk_objects) == param_dicts(object_list)
+
+
+def test_parallel_meta_parser_matches_xml_meta_parser():
+    xml_files = [str(DATABASE_DIR / "peds.ymt.xml"), str(DATABASE_DIR / "weapons.meta")]
+
+    parsed_files = parallel_parse.parallel_meta_parser(xml_files, chunk_bytes=1 << 20)
+
+    for xml_file, (object_list, err_message, object_type) in zip(
+        xml_files, parsed_files
+    ):
+        serial_list, _, serial_type = xml_parse.xml_meta_parser(xml_file)
+        assert err_message is None
+        assert object_type == serial_type
+        assert param_dicts(object_list) == param_dicts(serial_list)
+
+
+def test_next_object_start_reads_past_the_scan_window():
+    xml_file = DATABASE_DIR / "weapons.meta"
+    file_data = xml_file.read_bytes()
+    object_starts = [span[0] for span in meta_scan.object_spans(file_data, "weap")]
+
+    with open(xml_file, "rb") as meta_file:
+        # First object is after the first scan window
+        assert object_starts[0] > meta_scan.SCAN_WINDOW
+        assert meta_scan.next_object_start(meta_file, 0, "weap") == object_starts[0]
+        assert (
+            meta_scan.next_object_start(meta_file, object_starts[3] + 1, "weap")
+            == object_starts[4]
+        )
+        assert (
+            meta_scan.next_object_start(meta_file, object_starts[-1] + 1, "weap")
+            is None
+        )
@@ -0,0 +1,40 @@
+from pathlib import Path
+
+import pytest
+
+from functions import xml_parse
+from functions.param_index import ParamValueIndex
+
+DATABASE_DIR = Path(__file__).resolve().parents[1] / "database"
+
+
+@pytest.mark.parametrize("meta_file", ["peds.ymt.xml", "weapons.meta"])
+def test_add_objects_counts_like_add_object(meta_file):
+    object_list, _, _ = xml_parse.xml_meta_parser(str(DATABASE_DIR / meta_file))
+
+    param_index = ParamValueIndex(object_list)
+    single_index = ParamValueIndex()
+    for gta_object in object_list:
+        single_index.add_object(gta_object)
+
+    assert param_index.object_count == single_index.object_count
+    assert param_index.value_counts == single_index.value_counts
+    assert param_index.attrib_counts == single_index.attrib_counts
+    # Same first seen order - Ties of the most used attributes pick the same dict
+    for param, attrib_counts in param_index.attrib_counts.items():
+        assert list(attrib_counts) == list(single_index.attrib_counts[param])
+
+
+@pytest.mark.parametrize("meta_file", ["peds.ymt.xml", "weapons.meta"])
+def test_attr_db_has_the_index_values(meta_file):
+    object_list, _, _ = xml_parse.xml_meta_parser(str(DATABASE_DIR / meta_file))
+
+    parameter_database = xml_parse.attr_db(object_list)
+    index_database = ParamValueIndex(object_list).as_attr_db()
+
+    assert parameter_database.keys() == index_database.keys()
+    for param, param_values in index_database.items():
+        if isinstance(param_values, set):
+            assert parameter_database[param] == param_values
+        else:
+            assert isinstance(parameter_database[param], dict)
@@ -0,0 +1,45 @@
+from pathlib import Path
+
+import pytest
+
+from functions import xml_parse
+from functions.query import QueryIndex, is_query
+
+DATABASE_DIR = Path(__file__).resolve().parents[1] / "database"
+
+
+@pytest.fixture(scope="module")
+def weapon_index():
+    object_list, _, _ = xml_parse.xml_meta_parser(str(DATABASE_DIR / "weapons.meta"))
+    return QueryIndex(object_list)
+
+
+@pytest.mark.parametrize(
+    "text",
+    ["Damage>=40", "Pedtype = COP", "Group!=GROUP_PISTOL", "WeaponFlags has Gun"],
+)
+def test_is_query(text):
+    assert is_query(text)
+
+
+@pytest.mark.parametrize(
+    "text", ["carbine", "Pedtype:cop", "hash", "who has", "has gun"]
+)
+def test_plain_search_is_not_a_query(text):
+    assert not is_query(text)
+
+
+def test_has_only_counts_after_a_param(weapon_index):
+    assert weapon_index.is_query("WeaponFlags has Gun")
+    assert weapon_index.is_query("weaponflags has Gun and Damage>=40")
+    assert not weapon_index.is_query("who has gun")
+    assert not weapon_index.is_query("the pistol has a silencer")
+
+
+def test_find_has(weapon_index):
+    matches, err_message = weapon_index.find("WeaponFlags has Gun and Damage>=40")
+
+    assert err_message is None
+    assert matches
+    assert all("Gun" in gta_object.WeaponFlags for gta_object in matches)
+    assert all(float(gta_object.Damage["value"]) >= 40 for gta_object in matches)
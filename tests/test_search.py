@@ -0,0 +1,44 @@
+from pathlib import Path
+
+import pytest
+
+from functions import xml_parse
+from functions.search import SearchIndex, text_words
+
+DATABASE_DIR = Path(__file__).resolve().parents[1] / "database"
+
+
+@pytest.fixture(scope="module")
+def ped_index():
+    object_list, _, _ = xml_parse.xml_meta_parser(str(DATABASE_DIR / "peds.ymt.xml"))
+    return SearchIndex(object_list)
+
+
+def test_search_objects_ranks_names(ped_index):
+    results = ped_index.search_objects("boar")
+
+    assert results[0][1].Name == "A_C_Boar"
+
+
+def test_param_filter_only_returns_matching_objects(ped_index):
+    results = ped_index.search_objects("Pedtype:cop male", None)
+
+    assert results
+    assert all(gta_object.Pedtype == "COP" for _, gta_object in results)
+
+
+def test_param_filter_only_returns_hits_of_matching_objects(ped_index):
+    hits = ped_index.search("Pedtype:cop male", None)
+
+    assert hits
+    assert all(hit.gta_object.Pedtype == "COP" for hit in hits)
+    assert any(hit.param != "Pedtype" for hit in hits)
+
+
+def test_param_filters_must_all_match(ped_index):
+    results = ped_index.search_objects("Pedtype:cop Name:sheriff", None)
+
+    assert results
+    for _, gta_object in results:
+        assert gta_object.Pedtype == "COP"
+        assert "sheriff" in text_words(gta_object.Name)
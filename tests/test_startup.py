@@ -0,0 +1,15 @@
+import pytest
+
+pytest.importorskip("PyQt5")
+
+from benchmarks import startup
+
+
+def test_startup_within_budget():
+    results = startup.measure_startup(3)
+
+    window_s = min(result["window_s"] for result in results)
+    loaded = sorted({name for result in results for name in result["loaded"]})
+
+    assert window_s <= startup.STARTUP_BUDGET
+    assert loaded == []